@@ -1,18 +1,22 @@
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import requests
 import json
 import os
 from scipy import stats
 
+from figures import FigureRenderer, FigureSpec
+from output_sinks import DEFAULT_FORMAT, SINKS, get_sink
+from profiling import add_profile_arguments, finish_profiling, profile_stage, start_profiling
+
 class GreenAIAnalysis:
     def __init__(self):
         self.data_dir = '../data'
         os.makedirs(self.data_dir, exist_ok=True)
         
+    @profile_stage()
     def load_or_download_mlperf_data(self):
         """
         Load MLPerf training data from local cache or download from GitHub
@@ -27,6 +31,7 @@ class GreenAIAnalysis:
         print("https://github.com/mlcommons/training_results_v3.0/tree/main/NVIDIA/benchmarks/bert/implementations/pytorch-22.09")
         return None
 
+    @profile_stage()
     def load_or_download_egrid_data(self):
         """
         Load EPA eGRID data from local cache or guide for download
@@ -41,6 +46,7 @@ class GreenAIAnalysis:
         print("https://www.epa.gov/egrid/download-data")
         return None
 
+    @profile_stage()
     def load_carbon_intensity_data(self):
         """
         Load or create carbon intensity data for different regions
@@ -53,6 +59,7 @@ class GreenAIAnalysis:
         }
         return pd.DataFrame(data)
 
+    @profile_stage()
     def analyze_model_efficiency(self, training_data=None):
         """
         Analyze model training efficiency with sample data if real data not available
@@ -73,38 +80,48 @@ class GreenAIAnalysis:
         
         return training_data
 
+    @profile_stage()
     def plot_efficiency_metrics(self, efficiency_data):
         """
         Create visualizations for model efficiency metrics
         """
-        plt.figure(figsize=(15, 10))
-        
-        # Plot 1: Model Size vs Power Consumption
-        plt.subplot(2, 2, 1)
-        sns.scatterplot(data=efficiency_data, 
-                       x='params_millions', 
-                       y='power_consumption_kwh',
-                       s=100)
-        plt.xscale('log')
-        plt.yscale('log')
-        plt.title('Model Size vs Power Consumption')
-        plt.xlabel('Model Parameters (Millions)')
-        plt.ylabel('Power Consumption (kWh)')
-        
-        # Plot 2: Training Efficiency
-        plt.subplot(2, 2, 2)
-        sns.barplot(data=efficiency_data,
-                   x='model_name',
-                   y='training_efficiency')
-        plt.title('Training Efficiency by Model')
-        plt.xticks(rotation=45)
-        plt.ylabel('Power per Training Hour (kWh/h)')
-        
-        plt.tight_layout()
-        plt.savefig(os.path.join('..', 'images', 'efficiency_analysis.png'))
-        plt.close()
+        spec = FigureSpec('efficiency_analysis.png', draw_efficiency_metrics, efficiency_data,
+                          figsize=(15, 10))
+        FigureRenderer(os.path.join('..', 'images')).render([spec])
+
+def draw_efficiency_metrics(fig, efficiency_data):
+    """Model size against energy, and energy per training hour by model"""
+    import seaborn as sns
+    
+    # Plot 1: Model Size vs Power Consumption
+    ax = fig.add_subplot(2, 2, 1)
+    sns.scatterplot(data=efficiency_data, 
+                   x='params_millions', 
+                   y='power_consumption_kwh',
+                   s=100, ax=ax)
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_title('Model Size vs Power Consumption')
+    ax.set_xlabel('Model Parameters (Millions)')
+    ax.set_ylabel('Power Consumption (kWh)')
+    
+    # Plot 2: Training Efficiency
+    ax = fig.add_subplot(2, 2, 2)
+    sns.barplot(data=efficiency_data,
+               x='model_name',
+               y='training_efficiency', ax=ax)
+    ax.set_title('Training Efficiency by Model')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.set_ylabel('Power per Training Hour (kWh/h)')
 
 def main():
+    parser = argparse.ArgumentParser(description="Analyze model training efficiency")
+    parser.add_argument('--output-format', choices=list(SINKS), default=DEFAULT_FORMAT,
+                        help="File format of the saved efficiency table")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args)
+    
     analysis = GreenAIAnalysis()
     
     # Try to load real data
@@ -120,7 +137,8 @@ def main():
         analysis.plot_efficiency_metrics(efficiency_data)
         
         # Save results
-        efficiency_data.to_csv(os.path.join(analysis.data_dir, 'model_efficiency_results.csv'), index=False)
+        get_sink(args.output_format).write(
+            efficiency_data, os.path.join(analysis.data_dir, 'model_efficiency_results'))
         
         print("\nAnalysis Summary:")
         print("-----------------")
@@ -134,6 +152,8 @@ def main():
     print("\nPlace the downloaded files in the 'data' directory as:")
     print("- mlperf_results.csv")
     print("- egrid2022_data.csv")
+    
+    finish_profiling(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,197 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import make_egrid_plants, make_mlperf_inference
+
+STAGES = ['load_and_clean', 'regional', 'power', 'plot']
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+CLI_PATH = Path(__file__).resolve().parent / 'green_ai.py'
+# Wall-time budget for CLI commands that should not load the analysis stack
+STARTUP_BUDGET_S = 0.150
+STARTUP_COMMANDS = [['--help'], ['report']]
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+def _setup(stage, rows, seed, workdir):
+    """
+    Build the inputs of a stage and return a zero-argument callable running it.
+    The eGRID frame is typed (no field-code row), as loaded from the cache.
+    """
+    from carbon_footprint_analysis import CarbonFootprintAnalyzer
+
+    analyzer = CarbonFootprintAnalyzer()
+    analyzer.images_dir = Path(workdir)
+
+    if stage == 'load_and_clean':
+        path = Path(workdir) / 'plants.parquet'
+        make_egrid_plants(rows, seed, include_code_row=False).to_parquet(path, index=False)
+        return lambda: analyzer.clean_egrid_data(pd.read_parquet(path))
+
+    if stage in ('regional', 'plot'):
+        egrid_df = analyzer.clean_egrid_data(make_egrid_plants(rows, seed, include_code_row=False))
+        if stage == 'regional':
+            return lambda: analyzer.calculate_regional_carbon_intensity(egrid_df)
+
+    mlperf_df = make_mlperf_inference(rows, seed=seed)
+    if stage == 'power':
+        return lambda: analyzer.analyze_system_power_profiles(mlperf_df)
+
+    regional = analyzer.calculate_regional_carbon_intensity(egrid_df)
+    system_stats = analyzer.analyze_system_power_profiles(mlperf_df)
+    return lambda: analyzer.plot_results(regional, system_stats)
+
+
+def run_case(stage, rows, seed=0):
+    """
+    Time one stage on synthetic data of the given size. Meant to run in a
+    fresh process so the peak RSS belongs to this case alone.
+    """
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        run = _setup(stage, rows, seed, workdir)
+        rss_before = _peak_rss_mb()
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        run()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+    return {
+        'stage': stage,
+        'rows': rows,
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'peak_rss_mb': _peak_rss_mb(),
+        'setup_peak_rss_mb': rss_before,
+        'rows_per_s': rows / wall if wall else float('inf'),
+    }
+
+
+def run_suite(stages=STAGES, sizes=DEFAULT_SIZES, seed=0, isolate=True):
+    """Run every stage at every size, each case in its own process by default"""
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for rows in sizes:
+        for stage in stages:
+            if isolate:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    result = pool.submit(run_case, stage, rows, seed).result()
+            else:
+                result = run_case(stage, rows, seed)
+            results.append(result)
+            print("{:<16} {:>12,} rows {:>9.3f}s wall {:>9.3f}s cpu {:>9.0f} MB {:>14,.0f} rows/s".format(
+                stage, rows, result['wall_s'], result['cpu_s'], result['peak_rss_mb'], result['rows_per_s']))
+    return results
+
+
+def measure_startup(commands=STARTUP_COMMANDS, repeats=5):
+    """
+    Best-of-``repeats`` wall time of CLI invocations in fresh interpreters,
+    alongside a bare interpreter start for reference
+    """
+    def best(args):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + args, check=True, stdout=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    results = [{'command': 'python -c pass', 'wall_s': best(['-c', 'pass'])}]
+    for command in commands:
+        results.append({'command': ' '.join(['green_ai.py'] + command),
+                        'wall_s': best([str(CLI_PATH)] + command)})
+    for result in results:
+        print(f"{result['command']:<24} {result['wall_s'] * 1000:>8.1f} ms")
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Return the cases whose wall time exceeds the baseline's by more than
+    ``threshold`` (a fraction, e.g. 0.2 for 20%)
+    """
+    previous = {(r['stage'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        base = previous.get((result['stage'], result['rows']))
+        if base is None:
+            continue
+        ratio = result['wall_s'] / base['wall_s'] if base['wall_s'] else float('inf')
+        if ratio > 1 + threshold:
+            regressions.append({**result, 'baseline_wall_s': base['wall_s'], 'ratio': ratio})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='../data/benchmark_results.json')
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed slowdown versus the baseline before failing (fraction)")
+    parser.add_argument('--no-isolate', action='store_true',
+                        help="Run cases in this process (faster, but peak RSS accumulates)")
+    parser.add_argument('--startup', action='store_true',
+                        help=f"Only time CLI startup and fail if a command exceeds "
+                             f"{STARTUP_BUDGET_S * 1000:.0f} ms")
+    args = parser.parse_args()
+
+    if args.startup:
+        over = [r for r in measure_startup()[1:] if r['wall_s'] > STARTUP_BUDGET_S]
+        for r in over:
+            print(f"- {r['command']} took {r['wall_s'] * 1000:.1f} ms, over the "
+                  f"{STARTUP_BUDGET_S * 1000:.0f} ms budget")
+        sys.exit(1 if over else 0)
+
+    results = run_suite(args.stages, args.sizes, args.seed, isolate=not args.no_isolate)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'results': results,
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved benchmark results to {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"- {r['stage']} @ {r['rows']:,} rows: {r['baseline_wall_s']:.3f}s -> "
+                      f"{r['wall_s']:.3f}s ({r['ratio']:.2f}x)")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,113 @@
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
-from scipy import stats
+
+import egrid_cache
+import egrid_loader
+import egrid_schema
+import figures
+import mlperf_ingest
+import outlier_filter
+import output_sinks
+import power_profiles
+import regional_aggregation
+from egrid_loader import format_memory_report, load_plant_columns
+from egrid_schema import EMISSIONS_COL, STATE_COL
+from figures import FigureRenderer, FigureSpec
+from outlier_filter import filter_outliers
+from output_sinks import DEFAULT_FORMAT, SINKS, get_sink, read_table
+from pipeline import PipelineRunner, Stage
+from power_profiles import PowerCatalog, resolve_system_power
+from profiling import add_profile_arguments, finish_profiling, profile_stage, start_profiling
+from regional_aggregation import GENERATION_COL, GROUPING_COLUMNS, aggregate_by_group
+
+def draw_regional_emissions(fig, data):
+    """Mean carbon intensity per region with its confidence interval"""
+    ax = fig.subplots()
+    ax.errorbar(
+        x=range(len(data)),
+        y=data['mean'],
+        yerr=[
+            data['mean'] - data['ci_lower'],
+            data['ci_upper'] - data['mean']
+        ],
+        fmt='o', capsize=5, color='blue', alpha=0.6,
+        label='95% Confidence Interval'
+    )
+    
+    region_col = data.columns[0]
+    region_label = region_col.replace('_', ' ').title()
+    ax.set_xticks(range(len(data)))
+    ax.set_xticklabels(data[region_col], rotation=45, ha='right')
+    ax.set_title(f'Regional Carbon Intensity by {region_label}')
+    ax.set_xlabel(region_label)
+    ax.set_ylabel('CO2 Emissions Rate (lb/MWh)')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+
+
+def draw_system_power(fig, data):
+    """Stacked power components of the given systems"""
+    ax = fig.subplots()
+    bottom = np.zeros(len(data))
+    
+    # Stacked bar chart for power components
+    components = ['base_power', 'cpu_power', 'acc_power']
+    colors = ['lightgray', 'lightblue', 'darkblue']
+    labels = ['Base System', 'CPU', 'Accelerators']
+    
+    for component, color, label in zip(components, colors, labels):
+        ax.bar(data['system'], data[component], bottom=bottom, 
+               label=label, color=color)
+        bottom += data[component].to_numpy()
+    
+    for tick in ax.get_xticklabels():
+        tick.set_rotation(45)
+        tick.set_ha('right')
+    ax.set_title('Estimated Power Consumption by System Component')
+    ax.set_xlabel('System')
+    ax.set_ylabel('Estimated Power (Watts)')
+    ax.legend()
 
 class CarbonFootprintAnalyzer:
-    def __init__(self):
+    # PLNT22 columns read by each stage; loading projects onto their union
+    STAGE_COLUMNS = {
+        'clean': [STATE_COL, EMISSIONS_COL],
+        'regional': [EMISSIONS_COL, GENERATION_COL] + list(GROUPING_COLUMNS.values()),
+    }
+    
+    def __init__(self, float32=False, outlier_method='zscore', outlier_group=None,
+                 output_format=DEFAULT_FORMAT):
         self.data_dir = Path('../data')
         self.images_dir = Path('../images')
         self.images_dir.mkdir(exist_ok=True)
+        self.power_catalog = PowerCatalog.load()
+        self.float32 = float32
+        self.outlier_method = outlier_method
+        self.outlier_group = outlier_group
+        self.sink = get_sink(output_format)
         
+    @profile_stage()
     def load_and_clean_data(self):
         """Load and clean both datasets"""
         print("Loading and cleaning data...")
         
-        # Load eGRID data
-        egrid_df = pd.read_excel(self.data_dir / 'egrid2022_data.xlsx', sheet_name='PLNT22')
+        # Load only the eGRID columns the stages use, with compact dtypes
+        columns = [col for stage_columns in self.STAGE_COLUMNS.values() for col in stage_columns]
+        egrid_df, memory_report = load_plant_columns(
+            self.data_dir / 'egrid2022_data.xlsx', columns, float32=self.float32)
+        print(format_memory_report(memory_report))
+        egrid_df = self.clean_egrid_data(egrid_df)
+        
+        # Load MLPerf data
+        mlperf_df = read_table(self.data_dir / 'mlperf_inference_clean.parquet')
         
-        # Clean eGRID data
+        return egrid_df, mlperf_df
+    
+    @profile_stage()
+    def clean_egrid_data(self, egrid_df):
+        """Clean the PLNT22 plant table and summarize its emission rates"""
         emissions_col = 'Plant annual CO2 total output emission rate (lb/MWh)'
         location_col = 'Plant state abbreviation'
         
@@ -28,11 +117,12 @@ class CarbonFootprintAnalyzer:
         # Convert emissions to numeric
         egrid_df[emissions_col] = pd.to_numeric(egrid_df[emissions_col], errors='coerce')
         
-        # Handle outliers
-        emissions_data = egrid_df[emissions_col].dropna()
-        z_scores = np.abs(stats.zscore(emissions_data))
-        valid_mask = z_scores < 3
-        egrid_df.loc[emissions_data[~valid_mask].index, emissions_col] = np.nan
+        # Handle outliers, nationally or against each region's own distribution
+        group_col = GROUPING_COLUMNS[self.outlier_group] if self.outlier_group else None
+        egrid_df, fitted_filter = filter_outliers(
+            egrid_df, emissions_col, group_col=group_col, method=self.outlier_method)
+        print(f"Outlier filter: {self.outlier_method}, |score| < {fitted_filter.threshold:g}"
+              f"{f' within each {self.outlier_group}' if group_col else ''}")
         
         print(f"\neGRID Data Summary:")
         print(f"Total plants: {len(egrid_df)}")
@@ -43,126 +133,47 @@ class CarbonFootprintAnalyzer:
         print("\nEmissions Rate Statistics (lb/MWh):")
         print(egrid_df[emissions_col].describe())
         
-        # Load MLPerf data
-        mlperf_df = pd.read_csv(self.data_dir / 'mlperf_inference_clean.csv')
-        
-        return egrid_df, mlperf_df
+        return egrid_df
     
-    def calculate_regional_carbon_intensity(self, egrid_df):
+    @profile_stage()
+    def calculate_regional_carbon_intensity(self, egrid_df, group_by='state', weighted=False):
         """Calculate average carbon intensity by region with proper error handling"""
         print("\nCalculating regional carbon intensity...")
         
         emissions_col = 'Plant annual CO2 total output emission rate (lb/MWh)'
-        location_col = 'Plant state abbreviation'
-        
-        # Create summary statistics by state
-        regional_stats = []
+        location_col = GROUPING_COLUMNS[group_by]
         
-        for state in egrid_df[location_col].unique():
-            state_data = egrid_df[egrid_df[location_col] == state][emissions_col].dropna()
-            
-            if len(state_data) > 0:
-                stats_dict = {
-                    'state': state,
-                    'mean': state_data.mean(),
-                    'std': state_data.std() if len(state_data) > 1 else 0,
-                    'count': len(state_data),
-                    'median': state_data.median(),
-                    'min': state_data.min(),
-                    'max': state_data.max()
-                }
-                
-                # Calculate confidence intervals using t-distribution
-                if len(state_data) > 1:
-                    conf_level = 0.95
-                    degrees_of_freedom = len(state_data) - 1
-                    t_value = stats.t.ppf((1 + conf_level) / 2, degrees_of_freedom)
-                    margin_of_error = t_value * (stats_dict['std'] / np.sqrt(len(state_data)))
-                    
-                    stats_dict['ci_lower'] = stats_dict['mean'] - margin_of_error
-                    stats_dict['ci_upper'] = stats_dict['mean'] + margin_of_error
-                else:
-                    # For single data points, use the value itself
-                    stats_dict['ci_lower'] = stats_dict['mean']
-                    stats_dict['ci_upper'] = stats_dict['mean']
-                
-                regional_stats.append(stats_dict)
-        
-        regional_intensity = pd.DataFrame(regional_stats)
+        # Summary statistics and confidence intervals for every region in one pass
+        regional_intensity = aggregate_by_group(
+            egrid_df, location_col, emissions_col,
+            weight_col=GENERATION_COL if weighted else None,
+            name=group_by
+        )
         
         # Sort by mean emissions rate
         regional_intensity = regional_intensity.sort_values('mean', ascending=False)
         
         print("\nRegional Carbon Intensity Summary:")
-        print(f"Number of states analyzed: {len(regional_intensity)}")
-        print("\nTop 5 states by average emissions rate (lb/MWh):")
-        print(regional_intensity.head()[['state', 'mean', 'count', 'std']].to_string(index=False))
+        print(f"Number of regions analyzed ({group_by}): {len(regional_intensity)}")
+        print("\nTop 5 regions by average emissions rate (lb/MWh):")
+        print(regional_intensity.head()[[group_by, 'mean', 'count', 'std']].to_string(index=False))
         
-        print("\nBottom 5 states by average emissions rate (lb/MWh):")
-        print(regional_intensity.tail()[['state', 'mean', 'count', 'std']].to_string(index=False))
+        print("\nBottom 5 regions by average emissions rate (lb/MWh):")
+        print(regional_intensity.tail()[[group_by, 'mean', 'count', 'std']].to_string(index=False))
         
         return regional_intensity
     
+    @profile_stage()
     def analyze_system_power_profiles(self, mlperf_df):
         """Analyze power profiles of different ML systems"""
         print("\nAnalyzing system power profiles...")
         
-        # Power consumption estimates (Watts)
-        accelerator_power = {
-            'H100-SXM': 700,
-            'H100-PCIe': 350,
-            'A100-SXM': 400,
-            'A100-PCIe': 300,
-            'L4': 72,
-            'T4': 70
-        }
-        
-        # Process system data
-        systems = mlperf_df['System Name (click + for details)'].unique()
-        system_stats = []
-        
-        for system in systems:
-            system_data = mlperf_df[mlperf_df['System Name (click + for details)'] == system].iloc[0]
-            
-            # Calculate power consumption
-            base_power = 200  # Base system power
-            
-            # Accelerator power
-            acc_power = 0
-            if pd.notna(system_data['Accelerator']) and pd.notna(system_data['# of Accelerators']):
-                for acc_type, power in accelerator_power.items():
-                    if acc_type in str(system_data['Accelerator']):
-                        try:
-                            acc_count = float(system_data['# of Accelerators'])
-                            acc_power = power * acc_count
-                        except:
-                            pass
-                        break
-            
-            # CPU power
-            cpu_power = 150  # Default
-            if pd.notna(system_data['Host Processor Core Count']):
-                try:
-                    cores = float(system_data['Host Processor Core Count'])
-                    cpu_power = cores * 5  # 5W per core estimate
-                except:
-                    pass
-            
-            total_power = base_power + acc_power + cpu_power
-            
-            system_stats.append({
-                'system': system,
-                'accelerator': system_data['Accelerator'],
-                'accelerator_count': system_data['# of Accelerators'],
-                'processor': system_data['Processor'],
-                'core_count': system_data['Host Processor Core Count'],
-                'base_power': base_power,
-                'acc_power': acc_power,
-                'cpu_power': cpu_power,
-                'total_power': total_power
-            })
-        
-        system_stats_df = pd.DataFrame(system_stats)
+        # Resolve power for every system at once from the hardware power catalog
+        system_stats_df, unparsed = resolve_system_power(mlperf_df, self.power_catalog)
+        if unparsed:
+            print(f"Warning: could not parse accelerator or core counts for {len(unparsed)} systems:")
+            for system in unparsed[:5]:
+                print(f"- {system}")
         
         print("\nSystem Power Profile Summary:")
         print(f"Number of unique systems: {len(system_stats_df)}")
@@ -182,82 +193,84 @@ class CarbonFootprintAnalyzer:
         
         return system_stats_df
     
-    def plot_results(self, regional_intensity, system_stats):
-        """Create visualizations"""
+    @profile_stage()
+    def plot_results(self, regional_intensity, system_stats, force=False):
+        """Create visualizations, redrawing only figures whose data changed"""
         print("\nGenerating visualizations...")
         
-        # Plot 1: Regional Carbon Intensity
-        plt.figure(figsize=(15, 8))
-        data = regional_intensity.copy()
-        
-        plt.errorbar(
-            x=range(len(data)),
-            y=data['mean'],
-            yerr=[
-                data['mean'] - data['ci_lower'],
-                data['ci_upper'] - data['mean']
-            ],
-            fmt='o', capsize=5, color='blue', alpha=0.6,
-            label='95% Confidence Interval'
-        )
-        
-        plt.xticks(range(len(data)), data['state'], rotation=45, ha='right')
-        plt.title('Regional Carbon Intensity by State')
-        plt.xlabel('State')
-        plt.ylabel('CO2 Emissions Rate (lb/MWh)')
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(self.images_dir / 'regional_emissions.png')
-        plt.close()
-        
-        # Plot 2: System Power Consumption
-        plt.figure(figsize=(15, 8))
-        data = system_stats.nlargest(20, 'total_power')
-        
-        bottom = np.zeros(len(data))
-        
-        # Stacked bar chart for power components
-        components = ['base_power', 'cpu_power', 'acc_power']
-        colors = ['lightgray', 'lightblue', 'darkblue']
-        labels = ['Base System', 'CPU', 'Accelerators']
-        
-        for component, color, label in zip(components, colors, labels):
-            plt.bar(data['system'], data[component], bottom=bottom, 
-                   label=label, color=color)
-            bottom += data[component]
-        
-        plt.xticks(rotation=45, ha='right')
-        plt.title('Estimated Power Consumption by System Component')
-        plt.xlabel('System')
-        plt.ylabel('Estimated Power (Watts)')
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(self.images_dir / 'system_power.png')
-        plt.close()
+        specs = [
+            FigureSpec('regional_emissions.png', draw_regional_emissions, regional_intensity),
+            FigureSpec('system_power.png', draw_system_power, system_stats.nlargest(20, 'total_power')),
+        ]
+        FigureRenderer(self.images_dir).render(specs, force=force)
     
-    def run_analysis(self):
-        """Run the complete analysis pipeline"""
-        # Load and clean data
-        egrid_df, mlperf_df = self.load_and_clean_data()
-        
-        # Calculate regional carbon intensity
-        regional_intensity = self.calculate_regional_carbon_intensity(egrid_df)
-        
-        # Analyze system power profiles
-        system_stats = self.analyze_system_power_profiles(mlperf_df)
-        
-        # Generate visualizations
-        self.plot_results(regional_intensity, system_stats)
-        
-        # Save processed data
-        regional_intensity.to_csv(self.data_dir / 'regional_carbon_intensity.csv', index=False)
-        system_stats.to_csv(self.data_dir / 'system_power_profiles.csv', index=False)
+    @profile_stage()
+    def save_results(self, regional_intensity, system_stats):
+        """Save processed data in the configured output format"""
+        self.sink.write(regional_intensity, self.data_dir / 'regional_carbon_intensity')
+        self.sink.write(system_stats, self.data_dir / 'system_power_profiles')
+    
+    def build_pipeline(self):
+        """Describe the analysis as stages for the memoizing pipeline runner"""
+        mlperf_files = [self.data_dir / 'mlperf_inference_clean.parquet',
+                        self.data_dir / 'mlperf_inference_clean.csv']
+        stages = [
+            Stage('load', self.load_and_clean_data,
+                  files=[self.data_dir / 'egrid2022_data.xlsx'] + mlperf_files,
+                  params={'float32': self.float32, 'outlier_method': self.outlier_method,
+                          'outlier_group': self.outlier_group},
+                  code=[self.clean_egrid_data, egrid_cache, egrid_loader, egrid_schema,
+                        outlier_filter, output_sinks, mlperf_ingest]),
+            Stage('regional', lambda data: self.calculate_regional_carbon_intensity(data[0]),
+                  inputs=['load'],
+                  code=[self.calculate_regional_carbon_intensity, regional_aggregation, egrid_schema]),
+            Stage('power', lambda data: self.analyze_system_power_profiles(data[1]),
+                  inputs=['load'], files=[power_profiles.DEFAULT_CATALOG_PATH],
+                  code=[self.analyze_system_power_profiles, power_profiles]),
+            Stage('plot', self.plot_results, inputs=['regional', 'power'],
+                  code=[draw_regional_emissions, draw_system_power, figures],
+                  outputs=[self.images_dir / 'regional_emissions.png',
+                           self.images_dir / 'system_power.png']),
+            Stage('save', self.save_results, inputs=['regional', 'power'],
+                  params={'output_format': self.sink.name}, code=[output_sinks],
+                  outputs=[self.sink.path_for(self.data_dir / 'regional_carbon_intensity'),
+                           self.sink.path_for(self.data_dir / 'system_power_profiles')]),
+        ]
+        return PipelineRunner(stages, cache_dir=self.data_dir / 'cache' / 'pipeline')
+    
+    def run_analysis(self, force=()):
+        """
+        Run the complete analysis pipeline
+
+        Stages whose inputs, code and parameters are unchanged since the
+        last run are skipped and their stored results reused; ``force``
+        names stages to rerun anyway ('all' reruns everything).
+        """
+        results = self.build_pipeline().run(force=force)
         
         print("\nAnalysis complete! Check the 'images' directory for visualizations.")
         
-        return regional_intensity, system_stats
+        return results['regional'], results['power']
 
 if __name__ == "__main__":
-    analyzer = CarbonFootprintAnalyzer()
-    regional_intensity, system_stats = analyzer.run_analysis()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Estimate the carbon footprint of ML systems")
+    parser.add_argument('--force', action='append', default=[],
+                        choices=['load', 'regional', 'power', 'plot', 'save', 'all'],
+                        help="Rerun a stage (and everything downstream) even if unchanged")
+    parser.add_argument('--float32', action='store_true',
+                        help="Store eGRID emission rates in single precision")
+    parser.add_argument('--outliers', choices=['zscore', 'mad'], default='zscore',
+                        help="Outlier rule for emission rates: |z| < 3 or median/MAD modified z < 3.5")
+    parser.add_argument('--outlier-group', choices=list(GROUPING_COLUMNS),
+                        help="Judge outliers within each region instead of nationally")
+    parser.add_argument('--output-format', choices=list(SINKS), default=DEFAULT_FORMAT,
+                        help="File format of the saved result tables")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    start_profiling(args)
+    analyzer = CarbonFootprintAnalyzer(float32=args.float32, outlier_method=args.outliers,
+                                       outlier_group=args.outlier_group,
+                                       output_format=args.output_format)
+    regional_intensity, system_stats = analyzer.run_analysis(force=args.force)
+    finish_profiling(args)
@@ -1,3 +1,4 @@
+import argparse
 import os
 import requests
 import zipfile
@@ -9,6 +10,19 @@ import sys
 from tqdm import tqdm
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from egrid_cache import file_sha256, read_egrid_sheet
+from http_cache import DEFAULT_TTL_S, HttpCache
+from mlperf_fetcher import MLPerfFetcher
+from profiling import add_profile_arguments, finish_profiling, profile_stage, record_bytes, start_profiling
+
+# Using GitHub API to get the latest release data
+MLPERF_RESULTS_URL = "https://api.github.com/repos/mlcommons/training_results_v3.0/contents/NVIDIA/benchmarks/bert/implementations/pytorch-22.09/results"
+
+BLOCK_SIZE = 1 << 16
+# Files at least this large are downloaded as parallel byte-range segments
+SEGMENT_MIN_SIZE = 32 * 1024 * 1024
 
 # Set up logging
 logging.basicConfig(
@@ -21,15 +35,36 @@ logging.basicConfig(
 )
 
 class DataDownloader:
-    def __init__(self):
+    def __init__(self, offline=False, cache_ttl=DEFAULT_TTL_S):
         self.data_dir = Path('../data')
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        # API responses are cached on disk; offline runs make no requests at all
+        self.offline = offline
+        self.http_cache = HttpCache(self.data_dir / 'cache' / 'http', ttl=cache_ttl, offline=offline)
         
-    def download_file(self, url, filename, expected_hash=None):
+    @profile_stage()
+    def download_file(self, url, filename, expected_hash=None, segments=4,
+                      segment_min_size=SEGMENT_MIN_SIZE):
         """
         Download a file with progress bar and verification
+
+        Data is written to ``<filename>.part`` and renamed into place only
+        after it is complete and verified. An interrupted download resumes
+        from the partial file via an HTTP Range request, and large files are
+        fetched as ``segments`` parallel byte ranges when the server supports
+        it. The SHA-256 is computed while writing, so verification needs no
+        second pass over the file.
         """
         filepath = self.data_dir / filename
+        part_path = filepath.with_name(filepath.name + '.part')
+        validator_path = filepath.with_name(filepath.name + '.part.json')
+        
+        if self.offline:
+            if filepath.exists():
+                logging.info(f"Offline: using existing {filename}")
+                return filepath
+            logging.error(f"Offline: {filename} has not been downloaded")
+            return None
         
         # If file exists and hash matches, skip download
         if filepath.exists() and expected_hash:
@@ -38,40 +73,153 @@ class DataDownloader:
                 return filepath
         
         try:
-            response = requests.get(url, stream=True)
+            sha256_hash = hashlib.sha256()
+            offset = 0
+            headers = {}
+            if part_path.exists() and part_path.stat().st_size > 0:
+                offset = part_path.stat().st_size
+                self._hash_range(part_path, 0, offset, sha256_hash)
+                headers['Range'] = f"bytes={offset}-"
+                if validator_path.exists():
+                    # Ask for the full file instead if it changed since the partial download
+                    headers['If-Range'] = json.loads(validator_path.read_text())['validator']
+            
+            response = requests.get(url, stream=True, headers=headers)
+            if offset and response.status_code == 416:
+                response.close()
+                if response.headers.get('content-range', '').strip() == f"bytes */{offset}":
+                    # The partial file already holds every byte; only the rename is missing
+                    return self._finish_download(filepath, part_path, validator_path,
+                                                 sha256_hash, expected_hash)
+                # The remote file is now shorter than the partial one, or its size is unknown
+                logging.info(f"{filename} does not match the partial download; restarting")
+                part_path.unlink()
+                validator_path.unlink(missing_ok=True)
+                offset = 0
+                sha256_hash = hashlib.sha256()
+                response = requests.get(url, stream=True)
             response.raise_for_status()
             
-            total_size = int(response.headers.get('content-length', 0))
-            block_size = 8192
+            if offset and not response.headers.get('content-range', '').startswith(f"bytes {offset}-"):
+                logging.info(f"Server did not resume {filename}; restarting download")
+                offset = 0
+                sha256_hash = hashlib.sha256()
+            elif offset:
+                logging.info(f"Resuming {filename} from byte {offset}")
             
-            with tqdm(total=total_size, unit='iB', unit_scale=True) as pbar:
-                with open(filepath, 'wb') as f:
-                    for data in response.iter_content(block_size):
-                        size = f.write(data)
-                        pbar.update(size)
+            validator = response.headers.get('etag') or response.headers.get('last-modified')
+            if validator and not offset:
+                validator_path.write_text(json.dumps({'url': url, 'validator': validator}))
             
-            if expected_hash and not self._verify_file(filepath, expected_hash):
-                raise ValueError(f"Downloaded file {filename} failed hash verification")
-                
-            logging.info(f"Successfully downloaded {filename}")
-            return filepath
+            total_size = offset + int(response.headers.get('content-length', 0))
+            use_segments = (
+                offset == 0 and segments > 1 and total_size >= segment_min_size
+                and response.headers.get('accept-ranges') == 'bytes'
+            )
+            
+            with tqdm(total=total_size, initial=offset, unit='iB', unit_scale=True) as pbar:
+                if use_segments:
+                    response.close()
+                    self._download_segments(url, part_path, total_size, segments, sha256_hash, pbar)
+                else:
+                    with open(part_path, 'ab' if offset else 'wb') as f:
+                        for data in response.iter_content(BLOCK_SIZE):
+                            size = f.write(data)
+                            sha256_hash.update(data)
+                            pbar.update(size)
+                            record_bytes(size)
+            
+            return self._finish_download(filepath, part_path, validator_path,
+                                         sha256_hash, expected_hash)
             
         except Exception as e:
             logging.error(f"Error downloading {filename}: {str(e)}")
-            if filepath.exists():
-                filepath.unlink()
+            if part_path.exists():
+                logging.info(f"Kept {part_path.name} ({part_path.stat().st_size} bytes) for resuming")
             return None
 
+    def _finish_download(self, filepath, part_path, validator_path, sha256_hash, expected_hash):
+        """
+        Verify a completed partial file and atomically move it into place
+        """
+        if expected_hash and sha256_hash.hexdigest() != expected_hash:
+            part_path.unlink()
+            if validator_path.exists():
+                validator_path.unlink()
+            raise ValueError(f"Downloaded file {filepath.name} failed hash verification")
+        
+        os.replace(part_path, filepath)
+        if validator_path.exists():
+            validator_path.unlink()
+            
+        logging.info(f"Successfully downloaded {filepath.name}")
+        return filepath
+
+    def _download_segments(self, url, part_path, total_size, segments, sha256_hash, pbar):
+        """
+        Download byte ranges of a file in parallel into a preallocated file.
+
+        The first segment is hashed as it streams in; each later segment is
+        hashed in order as soon as it and all segments before it are on disk,
+        while the remaining segments are still downloading.
+        """
+        bounds = [total_size * i // segments for i in range(segments + 1)]
+        with open(part_path, 'wb') as f:
+            f.truncate(total_size)
+        
+        def fetch_segment(index):
+            start, end = bounds[index], bounds[index + 1]
+            response = requests.get(url, stream=True, headers={'Range': f"bytes={start}-{end - 1}"})
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise ValueError(f"Server ignored range request for segment {index}")
+            
+            written = 0
+            with open(part_path, 'r+b') as f:
+                f.seek(start)
+                for data in response.iter_content(BLOCK_SIZE):
+                    f.write(data)
+                    if index == 0:
+                        sha256_hash.update(data)
+                    written += len(data)
+                    pbar.update(len(data))
+                    record_bytes(len(data))
+            if written != end - start:
+                raise ValueError(f"Segment {index} is incomplete: {written} of {end - start} bytes")
+        
+        try:
+            with ThreadPoolExecutor(max_workers=segments) as pool:
+                futures = [pool.submit(fetch_segment, i) for i in range(segments)]
+                futures[0].result()
+                for index in range(1, segments):
+                    futures[index].result()
+                    self._hash_range(part_path, bounds[index], bounds[index + 1], sha256_hash)
+        except Exception:
+            # A preallocated file with gaps cannot be resumed from its size
+            part_path.unlink()
+            raise
+
+    def _hash_range(self, filepath, start, end, sha256_hash):
+        """
+        Feed bytes [start, end) of a file into a running hash
+        """
+        with open(filepath, 'rb') as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = f.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                sha256_hash.update(block)
+                remaining -= len(block)
+
     def _verify_file(self, filepath, expected_hash):
         """
         Verify file integrity using SHA-256
         """
-        sha256_hash = hashlib.sha256()
-        with open(filepath, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest() == expected_hash
+        return file_sha256(filepath) == expected_hash
 
+    @profile_stage()
     def download_egrid_data(self):
         """
         Download latest eGRID data from EPA
@@ -83,7 +231,7 @@ class DataDownloader:
         if filepath:
             try:
                 # Convert Excel to CSV for easier handling
-                df = pd.read_excel(filepath)
+                df = read_egrid_sheet(filepath)
                 csv_path = self.data_dir / "egrid2022_data.csv"
                 df.to_csv(csv_path, index=False)
                 logging.info(f"Converted eGRID data to CSV: {csv_path}")
@@ -93,26 +241,31 @@ class DataDownloader:
                 return None
         return None
 
-    def download_mlperf_data(self):
+    @profile_stage()
+    def download_mlperf_data(self, api_url=MLPERF_RESULTS_URL, workers=None):
         """
         Download MLPerf training results
+
+        With ``workers`` set, the results tree under ``api_url`` is walked
+        recursively and fetched concurrently over a pooled session.
         """
-        # Using GitHub API to get the latest release data
-        api_url = "https://api.github.com/repos/mlcommons/training_results_v3.0/contents/NVIDIA/benchmarks/bert/implementations/pytorch-22.09/results"
-        
         try:
-            response = requests.get(api_url)
-            response.raise_for_status()
-            
-            results_data = []
-            files = response.json()
-            
-            for file in files:
-                if file['name'].endswith('.json'):
-                    raw_url = file['download_url']
-                    result_response = requests.get(raw_url)
-                    result_response.raise_for_status()
-                    results_data.append(result_response.json())
+            if workers:
+                fetcher = MLPerfFetcher(max_workers=workers, cache=self.http_cache)
+                results_data = fetcher.fetch(api_url)
+            else:
+                response = self.http_cache.get(api_url)
+                response.raise_for_status()
+                
+                results_data = []
+                files = response.json()
+                
+                for file in files:
+                    if file['name'].endswith('.json'):
+                        raw_url = file['download_url']
+                        result_response = self.http_cache.get(raw_url)
+                        result_response.raise_for_status()
+                        results_data.append(result_response.json())
             
             # Save combined results
             output_file = self.data_dir / "mlperf_results.json"
@@ -154,6 +307,7 @@ class DataDownloader:
         
         return pd.DataFrame(parsed_data)
 
+    @profile_stage()
     def verify_downloads(self):
         """
         Verify all required data files exist and are valid
@@ -177,8 +331,9 @@ class DataDownloader:
         logging.info("All required files present")
         return True
 
-def main():
-    downloader = DataDownloader()
+def download_all(offline=False, cache_ttl=DEFAULT_TTL_S):
+    """Download and verify the eGRID workbook and the MLPerf results"""
+    downloader = DataDownloader(offline=offline, cache_ttl=cache_ttl)
     
     # Download eGRID data
     logging.info("Downloading eGRID data...")
@@ -198,5 +353,17 @@ def main():
     else:
         logging.error("Some data files are missing. Check the log for details.")
 
+def main():
+    parser = argparse.ArgumentParser(description="Download eGRID and MLPerf data")
+    parser.add_argument('--offline', action='store_true',
+                        help="Serve everything from cached responses and existing files")
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL_S,
+                        help="Seconds a cached API response is used before revalidating it")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args)
+    download_all(offline=args.offline, cache_ttl=args.cache_ttl)
+    finish_profiling(args)
+
 if __name__ == "__main__":
     main()
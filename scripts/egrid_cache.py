@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Workbook digests seen by this process, keyed by (path, size, mtime)
+_digest_memo = {}
+# Parsed sheets kept in memory by the default SheetRegistry
+REGISTRY_SIZE = 8
+
+
+def file_sha256(filepath, block_size=1 << 20):
+    """
+    Compute the SHA-256 hex digest of a file
+    """
+    sha256_hash = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for byte_block in iter(lambda: f.read(block_size), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def _to_arrow_safe(df):
+    """
+    Make a frame parsed by openpyxl storable as Parquet.
+
+    eGRID sheets carry a row of field codes (e.g. PSTATABB) under the
+    descriptive header, so numeric columns come back as object columns
+    mixing strings and numbers. Arrow cannot store those, so they are
+    written as strings with missing values preserved; pd.to_numeric
+    gives the same result on either form.
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns[df.dtypes == object]:
+        kind = pd.api.types.infer_dtype(df[col], skipna=True)
+        if kind in ('mixed', 'mixed-integer'):
+            values = df[col]
+            df[col] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+class EgridCache:
+    """
+    Content-addressed Parquet cache for sheets of the eGRID workbook.
+
+    Each sheet is parsed with openpyxl once and stored under a name that
+    includes the workbook's SHA-256, so later loads read the Parquet file
+    instead. Entries built from an older version of the workbook are
+    removed as soon as a new version is seen.
+    """
+
+    def __init__(self, cache_dir=Path('../data/cache')):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, workbook_path, sheet_name, digest):
+        return self.cache_dir / f"{workbook_path.stem}__{sheet_name}__{digest[:16]}.parquet"
+
+    def _sheet_list_path(self, workbook_path, digest):
+        return self.cache_dir / f"{workbook_path.stem}__sheets__{digest[:16]}.json"
+
+    def _evict_stale(self, workbook_path, digest):
+        """Remove cached sheets built from other versions of the workbook"""
+        removed = 0
+        for entry in self.cache_dir.glob(f"{workbook_path.stem}__*"):
+            if entry.suffix in ('.parquet', '.json') and not entry.stem.endswith(f"__{digest[:16]}"):
+                entry.unlink()
+                removed += 1
+        return removed
+
+    def digest(self, workbook_path):
+        """
+        SHA-256 of the workbook, rehashed only when its size or mtime change
+        """
+        stat = workbook_path.stat()
+        key = (str(workbook_path.resolve()), stat.st_size, stat.st_mtime_ns)
+        if key not in _digest_memo:
+            _digest_memo[key] = file_sha256(workbook_path)
+        return _digest_memo[key]
+
+    def sheet_columns(self, workbook_path, sheet_name=0):
+        """
+        Column names of a sheet, read from the cached file's schema
+        """
+        workbook_path = Path(workbook_path)
+        entry = self._entry_path(workbook_path, sheet_name, self.digest(workbook_path))
+        if entry.exists():
+            return pq.read_schema(entry).names
+        return list(self.load_sheet(workbook_path, sheet_name).columns)
+
+    def column_sizes(self, workbook_path, sheet_name=0):
+        """
+        Uncompressed bytes of each column of a sheet, summed over the row
+        groups of the cached file's metadata
+        """
+        workbook_path = Path(workbook_path)
+        entry = self._entry_path(workbook_path, sheet_name, self.digest(workbook_path))
+        if not entry.exists():
+            self.load_sheet(workbook_path, sheet_name)
+        metadata = pq.read_metadata(entry)
+        sizes = dict.fromkeys(metadata.schema.to_arrow_schema().names, 0)
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                sizes[column.path_in_schema] += column.total_uncompressed_size
+        return sizes
+
+    def sheet_names(self, workbook_path):
+        """
+        Names of the workbook's sheets, read from the archive once per
+        version of the workbook
+        """
+        workbook_path = Path(workbook_path)
+        path = self._sheet_list_path(workbook_path, self.digest(workbook_path))
+        if not path.exists():
+            with pd.ExcelFile(workbook_path) as workbook:
+                self._store_sheet_names(path, workbook.sheet_names)
+        return json.loads(path.read_text())
+
+    def _store_sheet_names(self, path, names):
+        tmp_path = path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(names))
+        os.replace(tmp_path, path)
+
+    def load_sheets(self, workbook_path, sheet_names, columns=None):
+        """
+        Load several sheets as a dict by sheet name. Sheets missing from the
+        cache are parsed from a single open of the workbook; the others
+        never touch it. With ``columns``, only those columns are returned.
+        """
+        workbook_path = Path(workbook_path)
+        digest = self.digest(workbook_path)
+        entries = {name: self._entry_path(workbook_path, name, digest) for name in sheet_names}
+        missing = [name for name, entry in entries.items() if not entry.exists()]
+
+        frames = {}
+        if missing:
+            self._evict_stale(workbook_path, digest)
+            with pd.ExcelFile(workbook_path) as workbook:
+                self._store_sheet_names(self._sheet_list_path(workbook_path, digest), workbook.sheet_names)
+                for name in missing:
+                    df = _to_arrow_safe(workbook.parse(name))
+                    tmp_path = entries[name].with_suffix('.parquet.tmp')
+                    df.to_parquet(tmp_path, index=False)
+                    os.replace(tmp_path, entries[name])
+                    frames[name] = df if columns is None else df[list(columns)]
+
+        for name in sheet_names:
+            if name not in frames:
+                frames[name] = pd.read_parquet(entries[name], columns=columns)
+        return frames
+
+    def load_sheet(self, workbook_path, sheet_name=0, columns=None):
+        """
+        Load one sheet of the workbook, parsing it only on a cache miss.
+        With ``columns``, only those columns are read from the cache.
+        """
+        return self.load_sheets(workbook_path, [sheet_name], columns)[sheet_name]
+
+    def clear(self):
+        """Remove every cached sheet"""
+        for pattern in ("*.parquet", "*__sheets__*.json"):
+            for entry in self.cache_dir.glob(pattern):
+                entry.unlink()
+
+
+class SheetRegistry:
+    """
+    In-process memo of parsed workbook sheets, shared by every analysis
+    running in one process and bounded to ``maxsize`` frames with LRU
+    eviction.
+
+    Frames are keyed by workbook digest, sheet and column selection, so a
+    changed workbook is never served stale. A projection is also answered
+    from a memoized full sheet. Misses for several sheets go to
+    ``EgridCache.load_sheets`` together, so the workbook is opened at most
+    once per call. Callers get shallow copies and may add or replace
+    columns freely.
+    """
+
+    def __init__(self, maxsize=REGISTRY_SIZE):
+        self.maxsize = maxsize
+        self._frames = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        digest, sheet_name, columns = key
+        for candidate in (key, (digest, sheet_name, None)):
+            if candidate in self._frames:
+                self._frames.move_to_end(candidate)
+                df = self._frames[candidate]
+                if columns is None or candidate[2] is not None:
+                    return df
+                if all(col in df.columns for col in columns):
+                    return df[list(columns)]
+        return None
+
+    def _remember(self, key, df):
+        self._frames[key] = df
+        self._frames.move_to_end(key)
+        while len(self._frames) > self.maxsize:
+            self._frames.popitem(last=False)
+
+    def sheets(self, workbook_path, sheet_names, columns=None, cache_dir=None):
+        """Sheets of a workbook as a dict by name, parsing each at most once"""
+        workbook_path = Path(workbook_path)
+        cache = EgridCache(cache_dir or workbook_path.parent / 'cache')
+        digest = cache.digest(workbook_path)
+        column_key = None if columns is None else tuple(columns)
+
+        frames, missing = {}, []
+        for name in dict.fromkeys(sheet_names):
+            df = self._lookup((digest, name, column_key))
+            if df is None:
+                missing.append(name)
+            else:
+                frames[name] = df
+        self.hits += len(frames)
+        self.misses += len(missing)
+
+        if missing:
+            for name, df in cache.load_sheets(workbook_path, missing, columns).items():
+                self._remember((digest, name, column_key), df)
+                frames[name] = df
+        return {name: frames[name].copy(deep=False) for name in sheet_names}
+
+    def clear(self):
+        self._frames.clear()
+
+
+_registry = SheetRegistry()
+
+
+def read_egrid_sheets(workbook_path, sheet_names, columns=None, cache_dir=None):
+    """
+    Read several sheets of an eGRID workbook through the process-wide
+    registry and the on-disk cache
+    """
+    return _registry.sheets(workbook_path, sheet_names, columns, cache_dir)
+
+
+def read_egrid_sheet(workbook_path, sheet_name=0, columns=None, cache_dir=None):
+    """
+    Read a sheet of an eGRID workbook through the process-wide registry
+    and the on-disk cache
+    """
+    return read_egrid_sheets(workbook_path, [sheet_name], columns, cache_dir)[sheet_name]
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from egrid_cache import EgridCache, read_egrid_sheet
+from egrid_schema import (BA_COL, CAPACITY_COL, CO2_TONS_COL, EMISSIONS_COL, FUEL_COL,
+                          GENERATION_COL, LAT_COL, LON_COL, NERC_COL, PLANT_COLUMNS,
+                          STATE_COL, SUBREGION_COL)
+
+# Low-cardinality text columns stored as categoricals
+CATEGORICAL_COLUMNS = [STATE_COL, SUBREGION_COL, NERC_COL, BA_COL, FUEL_COL, PLANT_COLUMNS['PLPRMFL']]
+# Columns parsed as numbers (the field-code row makes them text in the sheet)
+NUMERIC_COLUMNS = [EMISSIONS_COL, GENERATION_COL, CAPACITY_COL, CO2_TONS_COL, LAT_COL, LON_COL]
+# Emission-rate columns that may be downcast to float32
+RATE_COLUMNS = [EMISSIONS_COL]
+
+
+def compact_plant_frame(df, float32=False):
+    """
+    Convert the known PLNT columns of a frame to compact dtypes: categoricals
+    for region/fuel codes, floats for measures and, with ``float32``,
+    single-precision emission rates
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype('category')
+        elif col in NUMERIC_COLUMNS:
+            values = pd.to_numeric(df[col], errors='coerce')
+            dtype = np.float32 if float32 and col in RATE_COLUMNS else np.float64
+            df[col] = values.astype(dtype)
+    return df
+
+
+def load_plant_columns(workbook_path, columns, sheet_name='PLNT22', float32=False, cache_dir=None):
+    """
+    Load only ``columns`` of a plant sheet through the Parquet cache, drop the
+    field-code row and compact the dtypes.
+
+    Columns missing from the sheet are skipped. Returns the frame and a dict
+    reporting the two savings separately: how much of the sheet's data the
+    column projection skipped (uncompressed Parquet bytes of the loaded
+    columns against the whole sheet), and the resident memory of the
+    loaded columns before and after dtype compaction.
+    """
+    workbook_path = Path(workbook_path)
+    cache = EgridCache(cache_dir or workbook_path.parent / 'cache')
+    column_bytes = cache.column_sizes(workbook_path, sheet_name)
+    wanted = [col for col in dict.fromkeys([STATE_COL] + list(columns)) if col in column_bytes]
+
+    df = read_egrid_sheet(workbook_path, sheet_name, columns=wanted, cache_dir=cache.cache_dir)
+    df = df[df[STATE_COL] != 'PSTATABB'].reset_index(drop=True)
+
+    bytes_before = int(df.memory_usage(index=False, deep=True).sum())
+    df = compact_plant_frame(df, float32)
+    bytes_after = int(df.memory_usage(index=False, deep=True).sum())
+
+    report = {
+        'columns_loaded': len(wanted),
+        'columns_available': len(column_bytes),
+        'sheet_bytes': sum(column_bytes.values()),
+        'projected_bytes': sum(column_bytes[col] for col in wanted),
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+    }
+    return df, report
+
+
+def format_memory_report(report):
+    """One-line summary of what column projection and dtype compaction each saved"""
+    ratio = report['bytes_before'] / report['bytes_after'] if report['bytes_after'] else float('inf')
+    return (f"Loaded {report['columns_loaded']} of {report['columns_available']} columns "
+            f"({report['projected_bytes'] / 1e6:.1f} of {report['sheet_bytes'] / 1e6:.1f} MB of sheet data); "
+            f"compaction took them from {report['bytes_before'] / 1e6:.1f} MB to "
+            f"{report['bytes_after'] / 1e6:.1f} MB resident ({ratio:.1f}x smaller)")
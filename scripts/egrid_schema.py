@@ -0,0 +1,34 @@
+# Column names of the eGRID plant sheet (PLNTyy), keyed by eGRID field code.
+# The sheets carry the descriptive names as the header and the field codes
+# as the first data row.
+PLANT_COLUMNS = {
+    'SEQPLT': 'Plant file sequence number',
+    'YEAR': 'Data Year',
+    'PSTATABB': 'Plant state abbreviation',
+    'PNAME': 'Plant name',
+    'ORISPL': 'DOE/EIA ORIS plant or facility code',
+    'BACODE': 'Balancing Authority Code',
+    'NERC': 'NERC region acronym',
+    'SUBRGN': 'eGRID subregion acronym',
+    'LAT': 'Plant latitude',
+    'LON': 'Plant longitude',
+    'PLPRMFL': 'Plant primary fuel',
+    'PLFUELCT': 'Plant primary fuel category',
+    'NAMEPCAP': 'Plant nameplate capacity (MW)',
+    'PLNGENAN': 'Plant annual net generation (MWh)',
+    'PLCO2AN': 'Plant annual CO2 emissions (tons)',
+    'PLCO2RTA': 'Plant annual CO2 total output emission rate (lb/MWh)',
+}
+
+STATE_COL = PLANT_COLUMNS['PSTATABB']
+SUBREGION_COL = PLANT_COLUMNS['SUBRGN']
+NERC_COL = PLANT_COLUMNS['NERC']
+BA_COL = PLANT_COLUMNS['BACODE']
+ORIS_COL = PLANT_COLUMNS['ORISPL']
+LAT_COL = PLANT_COLUMNS['LAT']
+LON_COL = PLANT_COLUMNS['LON']
+FUEL_COL = PLANT_COLUMNS['PLFUELCT']
+CAPACITY_COL = PLANT_COLUMNS['NAMEPCAP']
+GENERATION_COL = PLANT_COLUMNS['PLNGENAN']
+CO2_TONS_COL = PLANT_COLUMNS['PLCO2AN']
+EMISSIONS_COL = PLANT_COLUMNS['PLCO2RTA']
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from egrid_cache import EgridCache, read_egrid_sheet
+from egrid_loader import NUMERIC_COLUMNS, compact_plant_frame
+from egrid_schema import EMISSIONS_COL, GENERATION_COL, ORIS_COL, PLANT_COLUMNS, STATE_COL
+from regional_aggregation import GROUPING_COLUMNS, aggregate_by_group
+
+DEFAULT_STORE_DIR = Path('../data/egrid_store')
+MANIFEST_NAME = '_manifest.json'
+PARTITIONING = ds.partitioning(pa.schema([('year', pa.int32()), ('state', pa.string())]),
+                               flavor='hive')
+
+
+def plant_sheet_name(year):
+    """Name of the plant sheet of an eGRID release, e.g. PLNT22 for 2022"""
+    return f"PLNT{year % 100:02d}"
+
+
+def workbook_year(workbook_path):
+    """Data year of a workbook named like egrid2022_data.xlsx"""
+    match = re.search(r'(?:19|20)\d\d', Path(workbook_path).stem)
+    if match is None:
+        raise ValueError(f"Cannot tell the eGRID year of {workbook_path}; pass it explicitly")
+    return int(match.group())
+
+
+def normalize_plant_sheet(df):
+    """
+    Rename a PLNTyy sheet's year-specific headers to the PLANT_COLUMNS names.
+
+    Descriptive headers change wording between releases but the field-code
+    row under them does not, so columns are matched on their code. Fields
+    outside PLANT_COLUMNS are dropped and the code row is removed.
+    """
+    codes = df.iloc[0].astype(str).str.strip()
+    rename = {col: PLANT_COLUMNS[code] for col, code in codes.items() if code in PLANT_COLUMNS}
+    df = df.iloc[1:][list(rename)].rename(columns=rename).reset_index(drop=True)
+
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    df[ORIS_COL] = pd.to_numeric(df[ORIS_COL], errors='coerce').astype('Int64')
+    for col in df.columns:
+        if col not in NUMERIC_COLUMNS and col != ORIS_COL:
+            df[col] = df[col].astype(str).where(df[col].notna())
+    return df
+
+
+class EgridStore:
+    """
+    On-disk store of eGRID plant tables across releases, partitioned as
+    ``year=YYYY/state=XX`` Parquet files.
+
+    Adding a year writes only that year's partitions, and a year whose
+    workbook is unchanged since it was added is skipped. Reads prune
+    partitions by year and state before touching any file.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.store_dir / MANIFEST_NAME
+
+    def _read_manifest(self):
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text())
+        return {}
+
+    def _write_manifest(self, manifest):
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.manifest_path)
+
+    def years(self):
+        return sorted(int(year) for year in self._read_manifest())
+
+    def add_year(self, workbook_path, year=None, sheet_name=None, force=False):
+        """
+        Ingest the plant sheet of one eGRID workbook, replacing any earlier
+        version of that year. Returns the number of plants written, or 0 if
+        the year was already stored from the same workbook.
+        """
+        workbook_path = Path(workbook_path)
+        year = year or workbook_year(workbook_path)
+        sheet_name = sheet_name or plant_sheet_name(year)
+        cache = EgridCache(workbook_path.parent / 'cache')
+        digest = cache.digest(workbook_path)
+
+        manifest = self._read_manifest()
+        entry = manifest.get(str(year), {})
+        if not force and entry.get('sha256') == digest and entry.get('sheet') == sheet_name:
+            print(f"eGRID {year} already stored from {workbook_path.name}, skipping")
+            return 0
+
+        df = normalize_plant_sheet(read_egrid_sheet(workbook_path, sheet_name, cache_dir=cache.cache_dir))
+        df = df[df[STATE_COL].notna()]
+
+        # Write the year beside the store, then swap it in
+        final_dir = self.store_dir / f"year={year}"
+        tmp_dir = self.store_dir / f".year={year}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        for state, plants in df.groupby(STATE_COL, sort=True):
+            state_dir = tmp_dir / f"state={state}"
+            state_dir.mkdir(parents=True)
+            pq.write_table(pa.Table.from_pandas(plants, preserve_index=False), state_dir / 'part-0.parquet')
+
+        old_dir = self.store_dir / f".year={year}.old"
+        # Left behind if an earlier swap crashed before its cleanup
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if final_dir.exists():
+            os.replace(final_dir, old_dir)
+        os.replace(tmp_dir, final_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        manifest[str(year)] = {'sha256': digest, 'sheet': sheet_name, 'workbook': workbook_path.name,
+                               'plants': len(df), 'states': int(df[STATE_COL].nunique())}
+        self._write_manifest(manifest)
+        print(f"Stored eGRID {year}: {len(df):,} plants in {manifest[str(year)]['states']} states")
+        return len(df)
+
+    def load(self, years=None, states=None, columns=None):
+        """
+        Plants of the given years and states (all by default) with compact
+        dtypes and a ``year`` column. Only matching partitions are read.
+        """
+        # Only the requested partitions' files are listed, and releases carry
+        # different fields: read them against the union of their schemas
+        year_dirs = ['year=*'] if years is None else [f"year={int(y)}" for y in years]
+        state_dirs = ['state=*'] if states is None else [f"state={s}" for s in states]
+        files = sorted({f for year_dir in year_dirs for state_dir in state_dirs
+                        for f in self.store_dir.glob(f"{year_dir}/{state_dir}/*.parquet")})
+        if not files:
+            return pd.DataFrame(columns=[STATE_COL, ORIS_COL, 'year'] + list(columns or []))
+        schema = pa.unify_schemas([pq.read_schema(f) for f in files] + [PARTITIONING.schema],
+                                  promote_options='permissive')
+        dataset = ds.dataset(files, schema=schema, format='parquet', partitioning=PARTITIONING,
+                             partition_base_dir=str(self.store_dir))
+
+        if columns is not None:
+            columns = list(dict.fromkeys([STATE_COL, ORIS_COL] + list(columns))) + ['year']
+        table = dataset.to_table(columns=columns)
+        df = table.to_pandas()
+        df = df.drop(columns=['state'], errors='ignore')
+        df['year'] = df['year'].astype(int)
+        return compact_plant_frame(df)
+
+    def plant_panel(self, value_col=EMISSIONS_COL, years=None, states=None):
+        """One row per plant (ORIS code) and one column per year of ``value_col``"""
+        df = self.load(years, states, columns=[value_col])
+        df = df[df[ORIS_COL].notna()]
+        return df.pivot_table(index=ORIS_COL, columns='year', values=value_col,
+                              aggfunc='first', observed=True).sort_index()
+
+    def regional_trend(self, group_by='state', value_col=EMISSIONS_COL, years=None, states=None,
+                       weighted=False):
+        """Regional summary statistics for each stored year, stacked by year"""
+        group_col = GROUPING_COLUMNS[group_by]
+        columns = [group_col, value_col] + ([GENERATION_COL] if weighted else [])
+        df = self.load(years, states, columns=columns)
+        frames = []
+        for year, plants in df.groupby('year', sort=True):
+            summary = aggregate_by_group(plants, group_col, value_col,
+                                         weight_col=GENERATION_COL if weighted else None, name=group_by)
+            frames.append(summary.assign(year=year))
+        if not frames:
+            return pd.DataFrame()
+        trend = pd.concat(frames, ignore_index=True)
+        return trend[['year'] + [col for col in trend.columns if col != 'year']]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-year eGRID plant store")
+    parser.add_argument('--store', default=str(DEFAULT_STORE_DIR))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="Ingest eGRID workbooks (one per year)")
+    add.add_argument('workbooks', nargs='+')
+    add.add_argument('--year', type=int, help="Data year, if not in the file name (single workbook only)")
+    add.add_argument('--force', action='store_true', help="Re-ingest even if unchanged")
+
+    trend = commands.add_parser('trend', help="Print regional emission-rate trends across years")
+    trend.add_argument('--group-by', choices=list(GROUPING_COLUMNS), default='state')
+    trend.add_argument('--states', nargs='+')
+    trend.add_argument('--years', nargs='+', type=int)
+    trend.add_argument('--weighted', action='store_true')
+    args = parser.parse_args()
+
+    store = EgridStore(args.store)
+    if args.command == 'add':
+        if args.year and len(args.workbooks) > 1:
+            parser.error("--year applies to a single workbook")
+        for workbook in args.workbooks:
+            store.add_year(workbook, year=args.year, force=args.force)
+    else:
+        trend_df = store.regional_trend(args.group_by, years=args.years, states=args.states,
+                                        weighted=args.weighted)
+        print(trend_df.pivot(index=args.group_by, columns='year', values='mean').round(1).to_string())
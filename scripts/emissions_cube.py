@@ -0,0 +1,267 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from egrid_cache import EgridCache
+from egrid_loader import load_plant_columns
+from egrid_schema import (CAPACITY_COL, CO2_TONS_COL, EMISSIONS_COL, FUEL_COL, GENERATION_COL,
+                          STATE_COL, SUBREGION_COL)
+from regional_aggregation import GROUPING_COLUMNS
+
+# Nameplate capacity bucket edges (MW); the last bucket is open-ended
+CAPACITY_EDGES = [0, 1, 10, 50, 100, 500, 1000]
+# Label of plants with no value for a dimension
+MISSING_LABEL = 'UNKNOWN'
+# Additive statistics kept in every cell
+STATISTICS = ['plants', 'capacity_mw', 'generation_mwh', 'co2_tons',
+              'rate_count', 'rate_sum', 'rate_sumsq']
+CUBE_COLUMNS = [STATE_COL, SUBREGION_COL, FUEL_COL, CAPACITY_COL, GENERATION_COL, CO2_TONS_COL,
+                EMISSIONS_COL]
+TONS_TO_LB = 2000
+
+
+def capacity_labels(edges=CAPACITY_EDGES):
+    """Bucket labels such as '10-50' for the capacity edges, plus '1000+'"""
+    labels = [f"{lo:g}-{hi:g}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return labels + [f"{edges[-1]:g}+"]
+
+
+def _codes(values):
+    """Dimension codes and labels of a column, with missing values labelled"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    labels = [str(label) for label in uniques]
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes)
+        labels.append(MISSING_LABEL)
+    return codes, labels
+
+
+class EmissionsCube:
+    """
+    Dense cube of additive plant statistics over region, primary fuel and
+    nameplate-capacity bucket.
+
+    Each cell holds the plant count, capacity, generation and CO2 totals
+    and the count, sum and sum of squares of the plant emission rate, so
+    any slice or roll-up is a sum over cells. Means, standard deviations,
+    generation-weighted intensities and fuel shares are derived from those
+    sums at query time, without going back to plant rows.
+    """
+
+    def __init__(self, dims, labels, values, capacity_edges=CAPACITY_EDGES):
+        self.dims = list(dims)
+        self.labels = [list(labels_) for labels_ in labels]
+        self.values = values
+        self.capacity_edges = list(capacity_edges)
+        self._positions = [{label: i for i, label in enumerate(labels_)} for labels_ in self.labels]
+
+    @classmethod
+    def build(cls, plants, regions=('state', 'subregion'), capacity_edges=CAPACITY_EDGES):
+        """
+        Aggregate a PLNT-shaped frame into a cube with one dimension per
+        region grouping in ``regions``, then fuel and capacity
+        """
+        codes, labels = [], []
+        for region in regions:
+            region_codes, region_labels = _codes(plants[GROUPING_COLUMNS[region]])
+            codes.append(region_codes)
+            labels.append(region_labels)
+        fuel_codes, fuel_labels = _codes(plants[FUEL_COL])
+        codes.append(fuel_codes)
+        labels.append(fuel_labels)
+
+        capacity = pd.to_numeric(plants[CAPACITY_COL], errors='coerce').to_numpy(dtype=float)
+        bucket_labels = capacity_labels(capacity_edges)
+        buckets = np.searchsorted(capacity_edges, capacity, side='right') - 1
+        buckets = np.where(np.isnan(capacity), len(bucket_labels), buckets.clip(0))
+        codes.append(buckets)
+        labels.append(bucket_labels + [MISSING_LABEL])
+
+        shape = tuple(len(labels_) for labels_ in labels)
+        flat = np.ravel_multi_index(codes, shape)
+        size = int(np.prod(shape))
+
+        def numeric(col):
+            return pd.to_numeric(plants[col], errors='coerce').to_numpy(dtype=float)
+
+        rate = numeric(EMISSIONS_COL)
+        has_rate = ~np.isnan(rate)
+        rate = np.where(has_rate, rate, 0.0)
+        weights = {
+            'plants': None,
+            'capacity_mw': np.nan_to_num(capacity),
+            'generation_mwh': np.nan_to_num(numeric(GENERATION_COL)),
+            'co2_tons': np.nan_to_num(numeric(CO2_TONS_COL)),
+            'rate_count': has_rate.astype(float),
+            'rate_sum': rate,
+            'rate_sumsq': rate * rate,
+        }
+        values = np.stack([np.bincount(flat, weights=weights[stat], minlength=size).astype(float)
+                           for stat in STATISTICS]).reshape((len(STATISTICS),) + shape)
+        return cls(list(regions) + ['fuel', 'capacity'], labels, values, capacity_edges)
+
+    @classmethod
+    def load_or_build(cls, workbook_path=Path('../data/egrid2022_data.xlsx'), sheet_name='PLNT22',
+                      cache_dir=None, regions=('state', 'subregion')):
+        """
+        Load the cube stored for this version of the workbook, building and
+        storing it on first use
+        """
+        workbook_path = Path(workbook_path)
+        cache_dir = Path(cache_dir or workbook_path.parent / 'cache')
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        digest = EgridCache(cache_dir).digest(workbook_path)
+        path = cache_dir / f"emissions_cube__{sheet_name}__{'_'.join(regions)}__{digest[:16]}.npz"
+        if path.exists():
+            return cls.load(path)
+
+        columns = [GROUPING_COLUMNS[region] for region in regions] + CUBE_COLUMNS
+        plants, _ = load_plant_columns(workbook_path, columns, sheet_name, cache_dir=cache_dir)
+        cube = cls.build(plants, regions)
+        for stale in cache_dir.glob(f"emissions_cube__{sheet_name}__{'_'.join(regions)}__*.npz"):
+            stale.unlink()
+        cube.save(path)
+        return cube
+
+    def save(self, path):
+        """Write the cube to an .npz file atomically"""
+        path = Path(path)
+        meta = {'dims': self.dims, 'labels': self.labels, 'statistics': STATISTICS,
+                'capacity_edges': self.capacity_edges}
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        np.savez(tmp_path, values=self.values, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['statistics'] != STATISTICS:
+                raise ValueError(f"{path} was built with different statistics; rebuild it")
+            return cls(meta['dims'], meta['labels'], data['values'], meta['capacity_edges'])
+
+    @property
+    def shape(self):
+        return self.values.shape[1:]
+
+    def _capacity_buckets(self, min_capacity, max_capacity):
+        """Buckets covering [min_capacity, max_capacity) MW, which must fall on bucket edges"""
+        edges = self.capacity_edges + [np.inf]
+        lo = 0 if min_capacity is None else min_capacity
+        hi = np.inf if max_capacity is None else max_capacity
+        if lo not in edges or hi not in edges:
+            raise ValueError(f"Capacity bounds must be bucket edges: {self.capacity_edges}")
+        return [i for i in range(len(edges) - 1) if edges[i] >= lo and edges[i + 1] <= hi]
+
+    def _selection(self, criteria, min_capacity=None, max_capacity=None):
+        """Positions selected along each constrained dimension"""
+        selection = {}
+        for dim, wanted in criteria.items():
+            if dim not in self.dims:
+                raise KeyError(f"Unknown cube dimension '{dim}'; have {self.dims}")
+            if wanted is None:
+                continue
+            axis = self.dims.index(dim)
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            try:
+                selection[axis] = [self._positions[axis][label] for label in wanted]
+            except KeyError as e:
+                raise KeyError(f"No '{dim}' value {e.args[0]!r} in the cube") from None
+        if min_capacity is not None or max_capacity is not None:
+            axis = self.dims.index('capacity')
+            buckets = self._capacity_buckets(min_capacity, max_capacity)
+            if axis in selection:
+                buckets = [b for b in selection[axis] if b in buckets]
+            selection[axis] = buckets
+        return selection
+
+    def totals(self, by=(), min_capacity=None, max_capacity=None, **criteria):
+        """
+        Raw statistic sums over the slice given by ``criteria`` (dimension
+        name to a label or list of labels), kept separate along the ``by``
+        dimensions. Returns an array of shape (statistics, *by).
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        selection = self._selection(criteria, min_capacity, max_capacity)
+        values = self.values
+        # Narrow the most selective dimension first so later steps touch less data
+        for axis in sorted(selection, key=lambda axis: len(selection[axis]) / self.shape[axis]):
+            values = np.take(values, selection[axis], axis=axis + 1)
+        summed = tuple(axis + 1 for axis, dim in enumerate(self.dims) if dim not in by)
+        values = values.sum(axis=summed)
+        # Put the kept dimensions in the order requested
+        kept = [dim for dim in self.dims if dim in by]
+        order = [0] + [kept.index(dim) + 1 for dim in by]
+        return values.transpose(order), selection
+
+    def query(self, by=(), min_capacity=None, max_capacity=None, **criteria):
+        """
+        Summary of a slice of the cube: plant count, capacity, generation
+        and CO2 totals, the mean and standard deviation of plant emission
+        rates, and the generation-weighted intensity (lb/MWh).
+
+        Without ``by`` a dict is returned; with it, a DataFrame indexed by
+        the ``by`` labels that also carries each row's share of the slice's
+        generation. For example ``query(by='fuel', subregion='RFCW')``.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        totals, selection = self.totals(by, min_capacity, max_capacity, **criteria)
+        stats = dict(zip(STATISTICS, totals))
+        n, s, ss = stats['rate_count'], stats['rate_sum'], stats['rate_sumsq']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_rate = s / n
+            var = np.maximum(ss - n * mean_rate ** 2, 0) / (n - 1)
+            summary = {
+                'plants': stats['plants'],
+                'capacity_mw': stats['capacity_mw'],
+                'generation_mwh': stats['generation_mwh'],
+                'co2_tons': stats['co2_tons'],
+                'mean_rate': mean_rate,
+                'std_rate': np.where(n > 1, np.sqrt(var), np.where(n == 1, 0.0, np.nan)),
+                'intensity_lb_mwh': stats['co2_tons'] * TONS_TO_LB / stats['generation_mwh'],
+            }
+        if not by:
+            return {key: float(value) for key, value in summary.items()}
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            summary['generation_share'] = stats['generation_mwh'] / stats['generation_mwh'].sum()
+        index_labels = []
+        for dim in by:
+            axis = self.dims.index(dim)
+            positions = selection.get(axis, range(self.shape[axis]))
+            index_labels.append([self.labels[axis][i] for i in positions])
+        index = (pd.Index(index_labels[0], name=by[0]) if len(by) == 1
+                 else pd.MultiIndex.from_product(index_labels, names=by))
+        result = pd.DataFrame({key: np.ravel(value) for key, value in summary.items()}, index=index)
+        result['plants'] = result['plants'].astype(int)
+        return result[result['plants'] > 0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the region x fuel x capacity emissions cube")
+    parser.add_argument('--workbook', default='../data/egrid2022_data.xlsx')
+    parser.add_argument('--by', nargs='+', default=[], help="Dimensions to break the result down by")
+    parser.add_argument('--state', nargs='+')
+    parser.add_argument('--subregion', nargs='+')
+    parser.add_argument('--fuel', nargs='+')
+    parser.add_argument('--min-capacity', type=float, help="Lower capacity bound (MW), a bucket edge")
+    parser.add_argument('--max-capacity', type=float, help="Upper capacity bound (MW), a bucket edge")
+    args = parser.parse_args()
+
+    cube = EmissionsCube.load_or_build(args.workbook)
+    start = time.perf_counter()
+    result = cube.query(by=args.by, min_capacity=args.min_capacity, max_capacity=args.max_capacity,
+                        state=args.state, subregion=args.subregion, fuel=args.fuel)
+    elapsed = time.perf_counter() - start
+
+    if isinstance(result, dict):
+        for key, value in result.items():
+            print(f"{key:>18}: {value:,.2f}")
+    else:
+        print(result.round(2).to_string())
+    print(f"\nAnswered from {np.prod(cube.shape):,} cells in {elapsed * 1e6:.0f} us")
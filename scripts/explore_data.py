@@ -1,8 +1,18 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from egrid_cache import read_egrid_sheet
+from egrid_loader import CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, compact_plant_frame
+from egrid_schema import ORIS_COL, PLANT_COLUMNS, STATE_COL
+from mlperf_ingest import read_mlperf_csv
+from output_sinks import DEFAULT_FORMAT, SINKS, get_sink
+
+# Columns kept in processed_egrid_plant_data.csv
+PROCESSED_COLUMNS = [ORIS_COL, PLANT_COLUMNS['PNAME']] + CATEGORICAL_COLUMNS + NUMERIC_COLUMNS
+
 def explore_egrid_data():
     """
     Explore and summarize the eGRID data focusing on plant-level emissions
@@ -12,7 +22,7 @@ def explore_egrid_data():
     
     try:
         # Read the PLNT22 sheet (plant-level data)
-        df = pd.read_excel(data_path, sheet_name='PLNT22')
+        df = read_egrid_sheet(data_path, sheet_name='PLNT22')
         
         print("\neGRID Plant Data Overview:")
         print(f"Number of plants: {len(df)}")
@@ -47,7 +57,7 @@ def explore_mlperf_data():
     print(f"\nExploring MLPerf data from: {data_path}")
     
     try:
-        df = pd.read_csv(data_path)
+        df = read_mlperf_csv(data_path)
         
         print("\nMLPerf Inference Data Overview:")
         print(f"Number of entries: {len(df)}")
@@ -71,6 +81,11 @@ def explore_mlperf_data():
         return None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explore the eGRID and MLPerf data")
+    parser.add_argument('--output-format', choices=list(SINKS), default=DEFAULT_FORMAT,
+                        help="File format of the processed eGRID table")
+    args = parser.parse_args()
+    
     # Explore eGRID data
     egrid_df = explore_egrid_data()
     
@@ -80,9 +95,11 @@ if __name__ == "__main__":
     if egrid_df is not None and mlperf_df is not None:
         print("\nBoth datasets loaded successfully!")
         
-        # Save processed versions if needed
-        egrid_df.to_csv('../data/processed_egrid_plant_data.csv', index=False)
-        print("Saved processed eGRID data to: processed_egrid_plant_data.csv")
+        # Save processed versions if needed, keeping only the columns the analysis uses
+        processed = egrid_df[egrid_df[STATE_COL] != 'PSTATABB']
+        processed = compact_plant_frame(processed[[c for c in PROCESSED_COLUMNS if c in processed]])
+        processed_path = get_sink(args.output_format).write(processed, '../data/processed_egrid_plant_data')
+        print(f"Saved processed eGRID data to: {processed_path.name}")
         
         # Output key findings that can help us link the datasets
         print("\nKey Findings:")
@@ -3,6 +3,13 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from pathlib import Path
+
+from egrid_cache import EgridCache, read_egrid_sheets
+
+# State and eGRID subregion summary sheets of the 2022 release
+SUMMARY_SHEETS = ['ST22', 'SRL22']
+
 def explore_egrid_data():
     """
     Explore and summarize the eGRID data
@@ -13,12 +20,16 @@ def explore_egrid_data():
     
     try:
         # First, let's list all sheets in the Excel file
-        xls = pd.ExcelFile(data_path)
+        sheet_names = EgridCache(Path(data_path).parent / 'cache').sheet_names(data_path)
         print("\nAvailable sheets in the Excel file:")
-        print(xls.sheet_names)
+        print(sheet_names)
         
-        # Read the first sheet to start
-        df = pd.read_excel(data_path, sheet_name=0)
+        # Read the first sheet and the regional summaries in one pass over the workbook
+        wanted = [sheet_names[0]] + [name for name in SUMMARY_SHEETS if name in sheet_names]
+        sheets = read_egrid_sheets(data_path, wanted)
+        df = sheets[sheet_names[0]]
+        for name in wanted[1:]:
+            print(f"\n{name}: {len(sheets[name])} rows, {len(sheets[name].columns)} columns")
         
         print("\nDataset Overview:")
         print(f"Number of rows: {len(df)}")
@@ -1,12 +1,14 @@
 import pandas as pd
 import numpy as np
 
+from egrid_cache import read_egrid_sheet
+
 def explore_egrid_data():
     """
     Explore and clean eGRID data
     """
     print("Loading eGRID data...")
-    df = pd.read_excel('../data/egrid2022_data.xlsx', sheet_name='PLNT22')
+    df = read_egrid_sheet('../data/egrid2022_data.xlsx', sheet_name='PLNT22')
     
     emissions_col = 'Plant annual CO2 total output emission rate (lb/MWh)'
     location_col = 'Plant state abbreviation'
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline import source_digest
+
+MANIFEST_NAME = 'figures_manifest.json'
+
+
+class FigureSpec:
+    """
+    One figure to render: ``draw(fig, data, **params)`` fills a blank
+    matplotlib Figure of size ``figsize``, which is then saved as
+    ``filename``. ``draw`` must be a module-level function so it can be
+    sent to a worker process.
+    """
+
+    def __init__(self, filename, draw, data, figsize=(15, 8), params=None):
+        self.filename = filename
+        self.draw = draw
+        self.data = data
+        self.figsize = tuple(figsize)
+        self.params = params or {}
+
+
+def _data_digest(data):
+    """Content hash of a figure's input data"""
+    sha = hashlib.sha256()
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        sha.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        frame = data.to_frame() if isinstance(data, pd.Series) else data
+        sha.update(repr([(str(col), str(dtype)) for col, dtype in frame.dtypes.items()]).encode())
+    else:
+        sha.update(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    return sha.hexdigest()
+
+
+def _use_agg():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render(path, draw, data, figsize, params):
+    """Draw and save one figure (runs in a worker process)"""
+    _use_agg()
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    draw(fig, data, **params)
+    fig.tight_layout()
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    fig.savefig(tmp_path, format=path.suffix.lstrip('.'))
+    os.replace(tmp_path, path)
+    return path
+
+
+class FigureRenderer:
+    """
+    Render figures on the Agg backend, in parallel and only when needed.
+
+    Each figure's key covers its input data, size, parameters and the
+    source of its draw function, and is recorded in a sidecar manifest in
+    ``images_dir``. Figures whose key matches the manifest and whose file
+    exists are skipped; the rest are drawn in a process pool with up to
+    ``max_workers`` processes (one per core by default). matplotlib is only
+    imported when something has to be drawn.
+    """
+
+    def __init__(self, images_dir=Path('../images'), max_workers=None):
+        self.images_dir = Path(images_dir)
+        self.images_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.manifest_path = self.images_dir / MANIFEST_NAME
+
+    def _read_manifest(self):
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except json.JSONDecodeError:
+            return {}
+
+    def _write_manifest(self, manifest):
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def figure_key(spec):
+        payload = {
+            'data': _data_digest(spec.data),
+            'figsize': spec.figsize,
+            'params': spec.params,
+            'draw': source_digest(spec.draw),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def render(self, specs, force=False):
+        """
+        Render the figures that changed since the last run (all of them with
+        ``force``). Returns the paths drawn and the paths skipped.
+        """
+        manifest = self._read_manifest()
+        pending, skipped = [], []
+        for spec in specs:
+            path = self.images_dir / spec.filename
+            key = self.figure_key(spec)
+            if not force and path.exists() and manifest.get(spec.filename) == key:
+                skipped.append(path)
+            else:
+                pending.append((spec, path, key))
+
+        workers = min(self.max_workers, len(pending))
+        jobs = [(path, spec.draw, spec.data, spec.figsize, spec.params) for spec, path, _ in pending]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg) as pool:
+                rendered = list(pool.map(_render, *zip(*jobs)))
+        else:
+            rendered = [_render(*job) for job in jobs]
+
+        for spec, _, key in pending:
+            manifest[spec.filename] = key
+        if pending:
+            self._write_manifest(manifest)
+
+        print(f"Rendered {len(rendered)} figure(s), {len(skipped)} unchanged")
+        return rendered, skipped
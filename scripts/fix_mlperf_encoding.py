@@ -1,39 +1,39 @@
 import pandas as pd
 
+from mlperf_ingest import read_mlperf_csv, sniff_format
+
 def load_mlperf_data():
     """
-    Try multiple encodings to load the MLPerf data
+    Load the MLPerf data using the encoding detected from its byte-order mark
     """
     file_path = '../data/Table - Inference_data.csv'
-    encodings = ['utf-16', 'latin1', 'iso-8859-1', 'cp1252']
     
-    for encoding in encodings:
-        try:
-            print(f"\nTrying {encoding} encoding...")
-            df = pd.read_csv(file_path, encoding=encoding)
-            print(f"Success! Data loaded with {encoding} encoding")
-            
-            print("\nDataset Overview:")
-            print(f"Number of rows: {len(df)}")
-            print(f"Number of columns: {len(df.columns)}")
-            
-            print("\nColumns:")
-            for col in df.columns:
-                print(f"- {col}")
-            
-            print("\nFirst few rows:")
-            print(df.head())
-            
-            # Save with proper encoding
-            df.to_csv('../data/mlperf_inference_processed.csv', index=False, encoding='utf-8')
-            print("\nSaved processed file as 'mlperf_inference_processed.csv'")
-            
-            return df
-            
-        except Exception as e:
-            print(f"Failed with {encoding}: {str(e)}")
+    try:
+        encoding, delimiter = sniff_format(file_path)
+        print(f"\nDetected {encoding} encoding, delimiter {delimiter!r}")
+        df = read_mlperf_csv(file_path)
+        print(f"Success! Data loaded with {encoding} encoding")
+        
+        print("\nDataset Overview:")
+        print(f"Number of rows: {len(df)}")
+        print(f"Number of columns: {len(df.columns)}")
+        
+        print("\nColumns:")
+        for col in df.columns:
+            print(f"- {col}")
+        
+        print("\nFirst few rows:")
+        print(df.head())
+        
+        # Save with proper encoding
+        df.to_csv('../data/mlperf_inference_processed.csv', index=False, encoding='utf-8')
+        print("\nSaved processed file as 'mlperf_inference_processed.csv'")
+        
+        return df
+        
+    except Exception as e:
+        print(f"Failed to load file: {str(e)}")
     
-    print("\nFailed to load file with common encodings")
     return None
 
 if __name__ == "__main__":
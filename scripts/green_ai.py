@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+Single entry point for the Green AI analysis:
+
+    python green_ai.py download
+    python green_ai.py regional --outlier-group subregion
+    python green_ai.py report
+
+Only the standard library is imported at startup; pandas, matplotlib and
+the analysis modules are loaded inside the subcommands that need them, so
+``--help`` and ``report`` on saved results stay fast. Paths resolve
+against the repository rather than the working directory.
+"""
+import argparse
+import csv
+import os
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DATA_DIR = SCRIPTS_DIR.parent / 'data'
+# Result tables, named without extension; the saved format is detected
+REGIONAL_TABLE = DATA_DIR / 'regional_carbon_intensity'
+SYSTEMS_TABLE = DATA_DIR / 'system_power_profiles'
+
+# Keys of regional_aggregation.GROUPING_COLUMNS and output_sinks.SINKS, spelled
+# out so the parser needs no pandas import; tests/test_green_ai.py keeps them in step
+GROUPING_CHOICES = ['state', 'subregion', 'nerc_region', 'balancing_authority']
+FORMAT_CHOICES = ['csv', 'parquet', 'feather']
+
+# Subcommands backed by a stage of the analysis pipeline
+PIPELINE_COMMANDS = {
+    'clean': ('load', "Load the eGRID and MLPerf data and filter outliers"),
+    'regional': ('regional', "Summarize carbon intensity by region"),
+    'power': ('power', "Estimate per-system power profiles"),
+    'plot': ('plot', "Render the figures that changed"),
+}
+
+
+def _analyzer(args):
+    from carbon_footprint_analysis import CarbonFootprintAnalyzer
+    return CarbonFootprintAnalyzer(float32=args.float32, outlier_method=args.outliers,
+                                   outlier_group=args.outlier_group, output_format=args.output_format)
+
+
+def run_download(args):
+    from download_data import DEFAULT_TTL_S, download_all
+    cache_ttl = DEFAULT_TTL_S if args.cache_ttl is None else args.cache_ttl
+    download_all(offline=args.offline, cache_ttl=cache_ttl)
+
+
+def run_pipeline_command(args):
+    stage = PIPELINE_COMMANDS[args.command][0]
+    results = _analyzer(args).build_pipeline().run(force=args.force, targets=[stage])
+    if stage in ('regional', 'power'):
+        print()
+        print(results[stage].head(args.top).to_string(index=False))
+
+
+def _read_rows(path, top):
+    """
+    First rows of a saved table as dicts of strings. CSV is read with the
+    csv module; only Parquet and Feather tables need pandas.
+    """
+    from output_sinks import detect_format, read_table
+
+    if detect_format(path) == 'csv':
+        with open(path, newline='') as f:
+            return [row for _, row in zip(range(top), csv.DictReader(f))]
+    head = read_table(path).head(top)
+    return [{col: str(value) for col, value in row.items()} for row in head.to_dict('records')]
+
+
+def _print_table(rows, columns):
+    """Print rows as right-aligned columns"""
+    cells = [columns] + [[_format_cell(row[col]) for col in columns] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    for line in cells:
+        print('  '.join(cell.rjust(width) for cell, width in zip(line, widths)))
+
+
+def _format_cell(value):
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return f"{number:,.0f}" if number.is_integer() else f"{number:,.1f}"
+
+
+def _saved_tables():
+    """Files of the saved regional and system tables, or None if either is missing"""
+    from output_sinks import resolve_table
+
+    try:
+        return resolve_table(REGIONAL_TABLE), resolve_table(SYSTEMS_TABLE)
+    except FileNotFoundError:
+        return None
+
+
+def run_report(args):
+    paths = None if args.refresh else _saved_tables()
+    if paths is None:
+        _analyzer(args).build_pipeline().run(force=args.force, targets=['save'])
+        paths = _saved_tables()
+    regional_path, systems_path = paths
+
+    regional_rows = _read_rows(regional_path, args.top)
+    region_col = next(iter(regional_rows[0])) if regional_rows else 'region'
+    print(f"Carbon intensity by {region_col} (lb/MWh), highest first:")
+    _print_table(regional_rows, [region_col, 'mean', 'ci_lower', 'ci_upper', 'count'])
+    print("\nEstimated system power (W):")
+    _print_table(_read_rows(systems_path, args.top),
+                 ['system', 'total_power', 'acc_power', 'cpu_power', 'base_power'])
+
+
+def _add_analysis_arguments(parser):
+    parser.add_argument('--force', action='append', default=[],
+                        choices=['load', 'regional', 'power', 'plot', 'save', 'all'],
+                        help="Rerun a stage (and everything downstream) even if unchanged")
+    parser.add_argument('--float32', action='store_true',
+                        help="Store eGRID emission rates in single precision")
+    parser.add_argument('--outliers', choices=['zscore', 'mad'], default='zscore',
+                        help="Outlier rule for emission rates")
+    parser.add_argument('--outlier-group', choices=GROUPING_CHOICES,
+                        help="Judge outliers within each region instead of nationally")
+    parser.add_argument('--output-format', choices=FORMAT_CHOICES, default='csv',
+                        help="File format of the saved result tables")
+    parser.add_argument('--top', type=int, default=10, help="Rows to print")
+
+
+def build_parser():
+    from profiling import add_profile_arguments
+
+    parser = argparse.ArgumentParser(prog='green-ai', description="Estimate the carbon footprint of ML systems")
+    add_profile_arguments(parser)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    download = commands.add_parser('download', help="Download the eGRID workbook and MLPerf results")
+    download.add_argument('--offline', action='store_true',
+                          help="Use only cached responses and files already downloaded")
+    download.add_argument('--cache-ttl', type=float,
+                          help="Seconds a cached API response is used before revalidating it "
+                               "(default: 6 hours)")
+    download.set_defaults(func=run_download)
+
+    for name, (_, help_text) in PIPELINE_COMMANDS.items():
+        command = commands.add_parser(name, help=help_text)
+        _add_analysis_arguments(command)
+        command.set_defaults(func=run_pipeline_command)
+
+    report = commands.add_parser('report', help="Print the saved regional and system summaries")
+    _add_analysis_arguments(report)
+    report.add_argument('--refresh', action='store_true',
+                        help="Rerun changed pipeline stages before reporting")
+    report.set_defaults(func=run_report)
+    return parser
+
+
+def main(argv=None):
+    # The analysis modules use paths relative to the scripts directory
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    os.chdir(SCRIPTS_DIR)
+
+    args = build_parser().parse_args(argv)
+    from profiling import finish_profiling, start_profiling
+
+    start_profiling(args)
+    args.func(args)
+    finish_profiling(args)
+
+
+if __name__ == "__main__":
+    main()
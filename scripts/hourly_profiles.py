@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from job_footprint import LB_TO_KG
+from output_sinks import read_table
+
+HOURS_PER_YEAR = 8760
+# Hour-of-year offsets of Feb 28 and Feb 29 in a leap year
+FEB28_HOUR = 58 * 24
+FEB29_HOUR = 59 * 24
+# Years are counted from here when integrating across year boundaries
+BASE_YEAR = 1970
+DEFAULT_STORE_DIR = Path('../data/hourly_intensity')
+
+
+def _leap_years_before(year):
+    """Number of leap years in [BASE_YEAR, year)"""
+    def through(y):
+        return y // 4 - y // 100 + y // 400
+    return through(np.asarray(year) - 1) - through(BASE_YEAR - 1)
+
+
+def _is_leap(year):
+    year = np.asarray(year)
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+class HourlyIntensityStore:
+    """
+    Region x hour-of-year carbon intensity profiles (lb/MWh) stored as
+    memory-mapped .npy files with a small JSON index.
+
+    ``values.npy`` holds the float32 profiles and ``cumulative.npy`` their
+    float64 running sums, so the integral of intensity over any interval
+    is two lookups per job rather than a scan of its hours. Both files are
+    opened read-only with mmap, so a query only pages in the entries it
+    touches. Leap days reuse the Feb 28 profile.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        index = json.loads((self.store_dir / 'index.json').read_text())
+        self.regions = pd.Index(index['regions'])
+        self.units = index['units']
+        self.source = index.get('source')
+        self.values = np.load(self.store_dir / 'values.npy', mmap_mode='r')
+        self.cumulative = np.load(self.store_dir / 'cumulative.npy', mmap_mode='r')
+
+    @classmethod
+    def write(cls, profiles, store_dir=DEFAULT_STORE_DIR, source=None):
+        """
+        Store a DataFrame of profiles (one row per region, 8760 hourly
+        columns) and return the opened store
+        """
+        store_dir = Path(store_dir)
+        store_dir.mkdir(parents=True, exist_ok=True)
+        values = profiles.to_numpy(dtype=np.float32)
+        if values.shape[1] != HOURS_PER_YEAR:
+            raise ValueError(f"Profiles need {HOURS_PER_YEAR} hourly columns, got {values.shape[1]}")
+        if np.isnan(values).any():
+            raise ValueError("Profiles contain missing hours")
+
+        cumulative = np.zeros((len(values), HOURS_PER_YEAR + 1))
+        np.cumsum(values, axis=1, dtype=np.float64, out=cumulative[:, 1:])
+
+        for name, array in (('values', values), ('cumulative', cumulative)):
+            tmp_path = store_dir / f"{name}.tmp.npy"
+            out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=array.dtype, shape=array.shape)
+            out[:] = array
+            out.flush()
+            del out
+            os.replace(tmp_path, store_dir / f"{name}.npy")
+
+        index = {'regions': [str(r) for r in profiles.index], 'units': 'lb/MWh',
+                 'hours': HOURS_PER_YEAR, 'source': source}
+        (store_dir / 'index.json').write_text(json.dumps(index, indent=2))
+        return cls(store_dir)
+
+    def region_positions(self, regions):
+        """Row of each region in the store; raises on unknown regions"""
+        positions = self.regions.get_indexer(np.asarray(regions, dtype=object))
+        if (positions < 0).any():
+            missing = sorted(set(np.asarray(regions, dtype=object)[positions < 0]))
+            raise KeyError(f"No hourly profile for regions: {missing[:10]}")
+        return positions
+
+    def profile(self, region):
+        """The 8760-hour profile of one region, as a view into the file"""
+        return self.values[self.region_positions([region])[0]]
+
+    def hourly_rates(self, regions, start, hours):
+        """
+        Region x hour intensity (lb/MWh) of ``hours`` consecutive hours from
+        ``start`` (a timestamp), following the calendar as ``integrate``
+        does: leap days repeat Feb 28 and years roll over on Jan 1
+        """
+        positions = self.region_positions(regions)
+        times = np.datetime64(start, 'h') + np.arange(hours).astype('timedelta64[h]')
+        year, hour = self._hour_of_year(times)
+        hour = hour.astype(int)
+        hour = np.where(_is_leap(year) & (hour >= FEB29_HOUR), hour - 24, hour)
+        return np.asarray(self.values[positions][:, np.minimum(hour, HOURS_PER_YEAR - 1)])
+
+    def _hour_of_year(self, times):
+        """Calendar year and fractional hour of the year of datetime64 values"""
+        times = np.asarray(times, dtype='datetime64[ns]')
+        year_start = times.astype('datetime64[Y]')
+        year = year_start.astype(int) + 1970
+        hours = (times - year_start.astype('datetime64[ns]')) / np.timedelta64(1, 'h')
+        return year, hours
+
+    def _running_sum(self, positions, hour):
+        """Running sum of the common-year profile at fractional hours"""
+        whole = np.minimum(np.floor(hour).astype(int), HOURS_PER_YEAR - 1)
+        frac = hour - whole
+        return self.cumulative[positions, whole] + frac * self.values[positions, whole]
+
+    def _integral_to(self, positions, times):
+        """Intensity integrated from BASE_YEAR to each time, in (lb/MWh) * h"""
+        year, hour = self._hour_of_year(times)
+        leap = _is_leap(year)
+        year_total = self.cumulative[positions, HOURS_PER_YEAR]
+        feb28 = self.cumulative[positions, FEB29_HOUR] - self.cumulative[positions, FEB28_HOUR]
+
+        # Leap years repeat Feb 28 on Feb 29: hours after Feb 29 00:00 read the
+        # common-year sum a day earlier plus one extra Feb 28
+        shifted = leap & (hour > FEB29_HOUR)
+        within = self._running_sum(positions, np.where(shifted, hour - 24, hour))
+        within = within + np.where(shifted, feb28, 0.0)
+
+        years_before = year - BASE_YEAR
+        return years_before * year_total + _leap_years_before(year) * feb28 + within
+
+    def integrate(self, regions, start, end):
+        """Intensity integrated over [start, end) for each job, in (lb/MWh) * h"""
+        positions = self.region_positions(regions)
+        return self._integral_to(positions, end) - self._integral_to(positions, start)
+
+    def mean_intensity(self, regions, start, end):
+        """Time-averaged intensity (lb/MWh) of each job's window"""
+        hours = (np.asarray(end, dtype='datetime64[ns]') - np.asarray(start, dtype='datetime64[ns]')) \
+            / np.timedelta64(1, 'h')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.integrate(regions, start, end) / hours
+
+    def job_emissions_kg(self, regions, start, end, power_kw):
+        """CO2 (kg) of jobs drawing ``power_kw`` between ``start`` and ``end``"""
+        lb = self.integrate(regions, start, end) * np.asarray(power_kw, dtype=float) / 1000
+        return lb * LB_TO_KG
+
+
+def derive_from_annual(regional_intensity, region_col='state', value_col='mean', shape=None):
+    """
+    Hourly profiles whose annual mean equals each region's annual rate.
+
+    ``shape`` gives the relative hourly pattern, as 24 hour-of-day or 8760
+    hour-of-year multipliers (rescaled to mean 1, shared by every region).
+    Without it the profiles are flat.
+    """
+    shape = np.ones(HOURS_PER_YEAR) if shape is None else np.asarray(shape, dtype=float)
+    if len(shape) == 24:
+        shape = np.tile(shape, HOURS_PER_YEAR // 24)
+    if len(shape) != HOURS_PER_YEAR:
+        raise ValueError("shape needs 24 or 8760 values")
+    shape = shape / shape.mean()
+
+    annual = regional_intensity.set_index(region_col)[value_col].astype(float)
+    return pd.DataFrame(np.outer(annual.to_numpy(), shape), index=annual.index.astype(str))
+
+
+def import_hourly_csv(path, region_col='region', time_col='datetime', value_col='intensity'):
+    """
+    Profiles from a long table of hourly intensities (lb/MWh) for one year.
+    Feb 29 is dropped and missing hours are interpolated within each region.
+    """
+    df = pd.read_csv(path, usecols=[region_col, time_col, value_col], parse_dates=[time_col])
+    times = df[time_col]
+    df = df[~((times.dt.month == 2) & (times.dt.day == 29))]
+    times = df[time_col]
+    hour = ((times.dt.dayofyear - 1) * 24 + times.dt.hour).to_numpy()
+    leap_shift = (times.dt.is_leap_year & (times.dt.month > 2)).to_numpy() * 24
+    df = df.assign(hour=hour - leap_shift)
+
+    wide = df.pivot_table(index=region_col, columns='hour', values=value_col, aggfunc='mean')
+    wide = wide.reindex(columns=range(HOURS_PER_YEAR))
+    wide = wide.interpolate(axis=1, limit_direction='both')
+    wide.index = wide.index.astype(str)
+    return wide
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the hourly carbon-intensity store")
+    parser.add_argument('--store', default=str(DEFAULT_STORE_DIR))
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--from-regional', metavar='CSV',
+                        help="Derive flat profiles from a regional_carbon_intensity.csv")
+    source.add_argument('--from-hourly', metavar='CSV',
+                        help="Import a long CSV with region, datetime and intensity columns")
+    parser.add_argument('--region-col', default=None)
+    args = parser.parse_args()
+
+    if args.from_regional:
+        regional = read_table(args.from_regional)
+        profiles = derive_from_annual(regional, args.region_col or regional.columns[0])
+        source_path = args.from_regional
+    else:
+        profiles = import_hourly_csv(args.from_hourly, args.region_col or 'region')
+        source_path = args.from_hourly
+
+    store = HourlyIntensityStore.write(profiles, args.store, source=str(source_path))
+    print(f"Stored {len(store.regions)} hourly profiles in {args.store}")
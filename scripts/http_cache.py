@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from profiling import record_bytes
+
+DEFAULT_CACHE_DIR = Path('../data/cache/http')
+DEFAULT_TTL_S = 6 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Stop spending requests once this few remain in the rate-limit window
+MIN_REMAINING = 5
+# Longest wait for a rate-limit window to reset before giving up
+MAX_BACKOFF_S = 300
+
+
+class CacheMiss(requests.ConnectionError):
+    """Raised in offline mode for a URL that is not in the cache"""
+
+
+class CachedResponse:
+    """The parts of a requests.Response the downloaders use, backed by the cache"""
+
+    def __init__(self, url, status_code, headers, content, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}", response=self)
+
+
+class HttpCache:
+    """
+    Persistent cache of HTTP GET responses.
+
+    Bodies and their validators (ETag, Last-Modified) are stored per URL.
+    Entries younger than ``ttl`` are served without touching the network;
+    older ones are revalidated with a conditional request, and a 304 (which
+    GitHub does not count against the rate limit) just renews them. The
+    cache is kept under ``max_bytes`` by evicting the least recently used
+    entries.
+
+    ``X-RateLimit-Remaining`` is tracked across responses: once it runs low,
+    stale entries are served as they are until the window resets, and a
+    URL that is not cached waits for the reset. With ``offline`` set,
+    everything is served from the cache and a miss raises CacheMiss.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL_S, max_bytes=DEFAULT_MAX_BYTES,
+                 offline=False, session=None, min_remaining=MIN_REMAINING, max_backoff=MAX_BACKOFF_S):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.session = session or requests.Session()
+        self.min_remaining = min_remaining
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._usage = None
+        self._limited_until = 0.0
+        self.stats = {'hits': 0, 'revalidated': 0, 'fetched': 0, 'stale': 0}
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f"{key}.body", self.cache_dir / f"{key}.json"
+
+    def _load_usage(self):
+        """Size and last use (body mtime) of every entry, scanned once per process"""
+        if self._usage is None:
+            self._usage = {}
+            for body in self.cache_dir.glob('*.body'):
+                stat = body.stat()
+                self._usage[body] = (stat.st_size, stat.st_mtime)
+        return self._usage
+
+    def _touch(self, body):
+        now = time.time()
+        os.utime(body, (now, now))
+        with self._lock:
+            usage = self._load_usage()
+            usage[body] = (usage.get(body, (body.stat().st_size, now))[0], now)
+
+    def _lookup(self, url):
+        body, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            content = body.read_bytes()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+        return meta, content
+
+    def _write_atomic(self, path, data):
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def _store(self, url, response):
+        body, meta_path = self._paths(url)
+        meta = {
+            'url': url,
+            'stored_at': time.time(),
+            'headers': {name: response.headers[name] for name in ('content-type', 'etag', 'last-modified')
+                        if name in response.headers},
+        }
+        self._write_atomic(body, response.content)
+        self._write_atomic(meta_path, json.dumps(meta).encode())
+        with self._lock:
+            self._load_usage()[body] = (len(response.content), time.time())
+            self._evict()
+        return meta
+
+    def _renew(self, url, meta):
+        meta['stored_at'] = time.time()
+        self._write_atomic(self._paths(url)[1], json.dumps(meta).encode())
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits (lock held)"""
+        usage = self._usage
+        total = sum(size for size, _ in usage.values())
+        if total <= self.max_bytes:
+            return
+        for body in sorted(usage, key=lambda path: usage[path][1]):
+            if total <= self.max_bytes:
+                break
+            total -= usage.pop(body)[0]
+            body.unlink(missing_ok=True)
+            body.with_suffix('.json').unlink(missing_ok=True)
+
+    def _note_rate_limit(self, response):
+        remaining = response.headers.get('x-ratelimit-remaining')
+        if remaining is None or int(remaining) > self.min_remaining:
+            return
+        reset = float(response.headers.get('x-ratelimit-reset', time.time() + 60))
+        with self._lock:
+            self._limited_until = max(self._limited_until, reset)
+        logging.warning(f"Rate limit nearly spent ({remaining} left); "
+                        f"serving cached responses until {time.ctime(reset)}")
+
+    def _serve(self, url, meta, content, counter):
+        self._touch(self._paths(url)[0])
+        with self._lock:
+            self.stats[counter] += 1
+        return CachedResponse(url, 200, meta['headers'], content, from_cache=True)
+
+    def get(self, url, timeout=30, session=None):
+        """
+        GET ``url`` through the cache, returning a CachedResponse. Network
+        requests use ``session`` when given (e.g. a caller's pooled session)
+        and the cache's own session otherwise.
+        """
+        meta, content = self._lookup(url)
+        if meta is not None and (self.offline or time.time() - meta['stored_at'] < self.ttl):
+            return self._serve(url, meta, content, 'hits')
+        if self.offline:
+            raise CacheMiss(f"{url} is not cached and downloads are offline")
+
+        wait = self._limited_until - time.time()
+        if wait > 0:
+            if meta is not None:
+                return self._serve(url, meta, content, 'stale')
+            if wait > self.max_backoff:
+                raise requests.HTTPError(f"Rate limited for another {wait:.0f}s; {url} is not cached")
+            logging.info(f"Waiting {wait:.0f}s for the rate limit to reset")
+            time.sleep(wait)
+
+        headers = {}
+        if meta is not None:
+            if 'etag' in meta['headers']:
+                headers['If-None-Match'] = meta['headers']['etag']
+            if 'last-modified' in meta['headers']:
+                headers['If-Modified-Since'] = meta['headers']['last-modified']
+
+        response = (session or self.session).get(url, headers=headers, timeout=timeout)
+        self._note_rate_limit(response)
+        if response.status_code == 304 and meta is not None:
+            self._renew(url, meta)
+            return self._serve(url, meta, content, 'revalidated')
+        if response.status_code in (403, 429) and meta is not None:
+            # Rate limited: stale data beats none
+            return self._serve(url, meta, content, 'stale')
+
+        record_bytes(len(response.content))
+        with self._lock:
+            self.stats['fetched'] += 1
+        if response.status_code != 200:
+            return CachedResponse(url, response.status_code, response.headers, response.content,
+                                  from_cache=False)
+        meta = self._store(url, response)
+        return CachedResponse(url, 200, meta['headers'], response.content, from_cache=False)
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            for path in list(self.cache_dir.glob('*.body')) + list(self.cache_dir.glob('*.json')):
+                path.unlink()
+            self._usage = None
@@ -0,0 +1,182 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from output_sinks import read_table
+
+LB_TO_KG = 0.45359237
+
+# Column names expected in the job accounting table
+JOB_COLUMNS = {
+    'system': 'system',
+    'region': 'region',
+    'runtime_hours': 'runtime_hours',
+    'utilization': 'utilization',
+}
+# Columns ``estimate`` adds to each job
+ESTIMATE_COLUMNS = ['energy_kwh', 'co2_kg', 'co2_kg_lower', 'co2_kg_upper']
+
+
+def _lookup(index, keys):
+    """
+    Positions of ``keys`` in a prebuilt index (-1 when missing). Keys are
+    factorized first so each distinct value is hashed once per chunk.
+    """
+    codes, uniques = pd.factorize(keys)
+    positions = index.get_indexer(uniques)
+    return np.where(codes >= 0, positions[codes], -1)
+
+
+class JobFootprintEstimator:
+    """
+    Vectorized per-job energy and CO2 estimates for large job accounting
+    logs, joined against the outputs of ``analyze_system_power_profiles``
+    and ``calculate_regional_carbon_intensity``.
+
+    Base system power is drawn for the whole runtime; CPU and accelerator
+    power are scaled by the job's utilization (1.0 when not given).
+    Emissions bounds come from the regional 95% confidence interval.
+    """
+
+    def __init__(self, system_stats, regional_intensity, region_col='state', columns=None):
+        self.columns = dict(JOB_COLUMNS, **(columns or {}))
+
+        self.system_index = pd.Index(system_stats['system'])
+        self.base_power = system_stats['base_power'].to_numpy(dtype=float)
+        self.dynamic_power = (system_stats['cpu_power'] + system_stats['acc_power']).to_numpy(dtype=float)
+
+        self.region_index = pd.Index(regional_intensity[region_col])
+        self.intensity = regional_intensity[['mean', 'ci_lower', 'ci_upper']].to_numpy(dtype=float)
+
+        if not (self.system_index.is_unique and self.region_index.is_unique):
+            raise ValueError("System and region keys must be unique")
+
+    @classmethod
+    def from_files(cls, system_path, regional_path, region_col='state', columns=None):
+        """Build an estimator from the saved power profile and intensity tables, in any output format"""
+        return cls(read_table(system_path), read_table(regional_path), region_col, columns)
+
+    def estimate(self, jobs):
+        """
+        Return energy (kWh) and CO2 (kg, with lower/upper bounds) for every
+        job. Jobs whose system or region is unknown get NaN.
+        """
+        cols = self.columns
+        sys_pos = _lookup(self.system_index, jobs[cols['system']])
+        reg_pos = _lookup(self.region_index, jobs[cols['region']])
+
+        hours = jobs[cols['runtime_hours']].to_numpy(dtype=float)
+        if cols['utilization'] in jobs:
+            utilization = jobs[cols['utilization']].to_numpy(dtype=float)
+        else:
+            utilization = np.ones(len(jobs))
+
+        sys_ok = sys_pos >= 0
+        power_w = np.full(len(jobs), np.nan)
+        power_w[sys_ok] = (self.base_power[sys_pos[sys_ok]]
+                           + self.dynamic_power[sys_pos[sys_ok]] * utilization[sys_ok])
+        energy_kwh = power_w * hours / 1000
+
+        reg_ok = reg_pos >= 0
+        intensity = np.full((len(jobs), 3), np.nan)
+        intensity[reg_ok] = self.intensity[reg_pos[reg_ok]]
+        # kWh -> MWh, times lb/MWh, converted to kg
+        co2_kg = (energy_kwh / 1000)[:, None] * intensity * LB_TO_KG
+
+        return pd.DataFrame({
+            'energy_kwh': energy_kwh,
+            'co2_kg': co2_kg[:, 0],
+            'co2_kg_lower': co2_kg[:, 1],
+            'co2_kg_upper': co2_kg[:, 2],
+        }, index=jobs.index)
+
+    def _input_schema(self, input_path):
+        """
+        Arrow schema of a job log's columns: the file's own for Parquet; for
+        CSV, floats for the runtime and utilization and strings for every
+        other column, so a column's type never depends on which rows a
+        chunk happens to hold
+        """
+        input_path = Path(input_path)
+        if input_path.suffix == '.parquet':
+            return pq.read_schema(input_path)
+        numeric = {self.columns['runtime_hours'], self.columns['utilization']}
+        header = pd.read_csv(input_path, nrows=0).columns
+        return pa.schema([(col, pa.float64() if col in numeric else pa.string()) for col in header])
+
+    def _iter_chunks(self, input_path, chunksize, schema):
+        input_path = Path(input_path)
+        if input_path.suffix == '.parquet':
+            for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+        else:
+            dtypes = {field.name: 'float64' if field.type == pa.float64() else str for field in schema}
+            yield from pd.read_csv(input_path, chunksize=chunksize, dtype=dtypes)
+
+    def estimate_file(self, input_path, output_path, chunksize=1_000_000):
+        """
+        Stream a job log (CSV or Parquet) through ``estimate`` chunk by chunk
+        and append the input rows plus estimates to a Parquet file, keeping
+        memory bounded by the chunk size. Returns throughput statistics.
+        """
+        output_path = Path(output_path)
+        tmp_path = output_path.with_name(output_path.name + '.tmp')
+        input_schema = self._input_schema(input_path)
+        schema = input_schema
+        for col in ESTIMATE_COLUMNS:
+            schema = schema.append(pa.field(col, pa.float64()))
+        writer = None
+        rows = unmatched = 0
+        start = time.perf_counter()
+
+        try:
+            try:
+                for chunk in self._iter_chunks(input_path, chunksize, input_schema):
+                    result = pd.concat([chunk.reset_index(drop=True),
+                                        self.estimate(chunk).reset_index(drop=True)], axis=1)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, schema)
+                    writer.write_table(pa.Table.from_pandas(result, schema=schema, preserve_index=False))
+                    rows += len(result)
+                    unmatched += int(result['co2_kg'].isna().sum())
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            if writer is not None:
+                tmp_path.replace(output_path)
+        finally:
+            # A failed chunk leaves a partial file behind; the previous output stays
+            tmp_path.unlink(missing_ok=True)
+
+        elapsed = time.perf_counter() - start
+        return {
+            'rows': rows,
+            'unmatched_rows': unmatched,
+            'elapsed_s': elapsed,
+            'rows_per_s': rows / elapsed if elapsed else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate per-job energy use and CO2 emissions")
+    parser.add_argument('jobs', help="Job log (CSV or Parquet) with system, region, runtime_hours, utilization")
+    parser.add_argument('output', help="Parquet file to write the estimates to")
+    parser.add_argument('--systems', default='../data/system_power_profiles.csv')
+    parser.add_argument('--regional', default='../data/regional_carbon_intensity.csv')
+    parser.add_argument('--region-col', default='state')
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    estimator = JobFootprintEstimator.from_files(args.systems, args.regional, args.region_col)
+    stats = estimator.estimate_file(args.jobs, args.output, args.chunksize)
+
+    print(f"Processed {stats['rows']:,} jobs in {stats['elapsed_s']:.2f}s "
+          f"({stats['rows_per_s']:,.0f} rows/s)")
+    if stats['unmatched_rows']:
+        print(f"Warning: {stats['unmatched_rows']:,} jobs had an unknown system or region")
@@ -0,0 +1,369 @@
+import argparse
+import heapq
+import time
+
+import numpy as np
+import pandas as pd
+
+from job_footprint import LB_TO_KG
+from output_sinks import read_table
+
+# Columns expected in the job queue; allowed_regions is ';'-separated, with
+# the first entry taken as the job's home region (empty means any region)
+QUEUE_COLUMNS = {
+    'job_id': 'job_id',
+    'system': 'system',
+    'duration_hours': 'duration_hours',
+    'deadline_hours': 'deadline_hours',
+    'allowed_regions': 'allowed_regions',
+}
+
+
+def intensity_matrix(regions, horizon_hours, regional=None, region_col='state', store=None, start=None):
+    """
+    Region x hour intensity (lb/MWh) over the scheduling horizon, either
+    flat from annual regional means or sliced from an HourlyIntensityStore
+    starting at ``start`` (a timestamp)
+    """
+    regions = [str(r) for r in regions]
+    if store is not None:
+        rates = store.hourly_rates(regions, start, horizon_hours)
+    else:
+        annual = regional.set_index(regional[region_col].astype(str))['mean']
+        rates = np.repeat(annual.loc[regions].to_numpy(dtype=float)[:, None], horizon_hours, axis=1)
+    return pd.DataFrame(rates, index=regions)
+
+
+class _Slots:
+    """
+    Free slots per region and hour, with a mask per job duration of the
+    windows that include a full hour. Masks are updated only where an hour
+    fills up, so checking a window is a single lookup.
+    """
+
+    def __init__(self, capacity, horizon, durations):
+        self.free = np.repeat(np.asarray(capacity)[:, None], horizon, axis=1)
+        full_prefix = np.zeros((len(capacity), horizon + 1), dtype=np.int64)
+        np.cumsum(self.free <= 0, axis=1, out=full_prefix[:, 1:])
+        self.blocked = {int(d): full_prefix[:, d:] - full_prefix[:, :-d] > 0 for d in durations if 0 < d <= horizon}
+
+    def occupy(self, r, t, d):
+        row = self.free[r]
+        row[t:t + d] -= 1
+        for hour in np.flatnonzero(row[t:t + d] == 0) + t:
+            for length, blocked in self.blocked.items():
+                blocked[r, max(0, hour - length + 1):hour + 1] = True
+
+
+class CarbonAwareScheduler:
+    """
+    Place deferrable jobs in regions and start hours so total CO2 is
+    minimized, subject to per-region slot capacity and job deadlines.
+
+    Time is an hourly grid over the horizon of ``intensity`` (region x
+    hour, lb/MWh); durations are rounded up to whole hours and each job
+    occupies one of its region's ``capacity`` slots while it runs. Window
+    costs come from running sums of the intensity, so evaluating every
+    (region, start) option of a job is a few array operations.
+
+    The greedy pass pops jobs from a heap keyed on the CO2 they would save
+    against running in their home region at its average rate. Capacity
+    only shrinks during the pass, so a popped option that is still free is
+    still the job's best one; otherwise the job is re-evaluated and pushed
+    back. The optional refinement swaps jobs of equal duration between
+    slots when the higher-power job sits in the dirtier slot.
+    """
+
+    def __init__(self, intensity, capacity, system_power_w):
+        self.regions = pd.Index(intensity.index.astype(str))
+        self.rates = intensity.to_numpy(dtype=float)
+        self.horizon = self.rates.shape[1]
+        self.prefix = np.zeros((len(self.regions), self.horizon + 1))
+        np.cumsum(self.rates, axis=1, out=self.prefix[:, 1:])
+
+        if np.isscalar(capacity):
+            self.capacity = np.full(len(self.regions), int(capacity))
+        else:
+            self.capacity = pd.Series(capacity).reindex(self.regions).fillna(0).to_numpy(dtype=int)
+        self.system_power_w = pd.Series(system_power_w, dtype=float)
+        self._window_costs = {}
+
+    def window_cost(self, d):
+        """Intensity summed over every d-hour window, (region, start)"""
+        if d not in self._window_costs:
+            self._window_costs[d] = self.prefix[:, d:] - self.prefix[:, :-d]
+        return self._window_costs[d]
+
+    @classmethod
+    def from_analysis(cls, system_stats, regional, horizon_hours, capacity, region_col='state',
+                      store=None, start=None):
+        """Build from the outputs of the power and regional analysis stages"""
+        regions = regional[region_col].astype(str)
+        intensity = intensity_matrix(regions, horizon_hours, regional, region_col, store, start)
+        power = system_stats.set_index('system')['total_power']
+        return cls(intensity, capacity, power[~power.index.duplicated()])
+
+    def _prepare(self, jobs):
+        cols = QUEUE_COLUMNS
+        hours = jobs[cols['duration_hours']].to_numpy(dtype=float)
+        bad = ~(hours >= 0)
+        if bad.any():
+            raise ValueError(f"Jobs need a non-negative duration; got {hours[bad][:5].tolist()} "
+                             f"for jobs {jobs[cols['job_id']].to_numpy()[bad][:5].tolist()}")
+        # Even an instantaneous job holds its slot for the hour it starts in
+        duration = np.maximum(np.ceil(hours), 1).astype(int)
+        deadline = np.minimum(np.floor(jobs[cols['deadline_hours']].to_numpy(dtype=float)).astype(int),
+                              self.horizon)
+        power_kw = jobs[cols['system']].map(self.system_power_w).to_numpy(dtype=float) / 1000
+
+        allowed = jobs[cols['allowed_regions']] if cols['allowed_regions'] in jobs else \
+            pd.Series('', index=jobs.index)
+        codes, uniques = pd.factorize(allowed.fillna('').astype(str))
+        position = {region: i for i, region in enumerate(self.regions)}
+        every_region = np.arange(len(self.regions))
+        region_lists = []
+        for value in uniques:
+            names = [name.strip() for name in value.split(';') if name.strip()]
+            rows = [position[name] for name in names if name in position]
+            region_lists.append(np.array(rows, dtype=int) if names else every_region)
+        return duration, deadline, power_kw, codes, region_lists
+
+    def _best_option(self, slots, rows, d, deadline):
+        """Cheapest free (region, start) of a job, or None"""
+        last = deadline - d
+        if last < 0 or not len(rows):
+            return None
+        cost = self.window_cost(d)[rows, :last + 1]
+        cost[slots.blocked[d][rows, :last + 1]] = np.inf
+        k = int(cost.argmin())
+        if cost.flat[k] == np.inf:
+            return None
+        return int(rows[k // (last + 1)]), k % (last + 1), float(cost.flat[k])
+
+    def _earliest_option(self, slots, rows, d, deadline):
+        """Earliest free start over the job's regions, in listed order on ties"""
+        last = deadline - d
+        if last < 0 or not len(rows):
+            return None
+        free = ~slots.blocked[d][rows, :last + 1]
+        has_free = free.any(axis=1)
+        if not has_free.any():
+            return None
+        first = np.where(has_free, free.argmax(axis=1), last + 1)
+        i = int(first.argmin())
+        r, t = int(rows[i]), int(first[i])
+        return r, t, float(self.window_cost(d)[r, t])
+
+    def _initial_options(self, slots, duration, deadline, codes, region_lists):
+        """
+        Best option of every job before anything is placed, computed per
+        duration from running minima of the window costs over start hours
+        """
+        n = len(duration)
+        region, start, cost = np.full(n, -1), np.full(n, -1), np.full(n, np.inf)
+        # Jobs listing no known region have no options and stay unplaced
+        has_regions = np.array([len(rows) > 0 for rows in region_lists], dtype=bool)
+        width = max([len(rows) for rows in region_lists], default=0)
+        padded = np.full((len(region_lists), width), -1)
+        for i, rows in enumerate(region_lists):
+            padded[i, :len(rows)] = rows
+
+        for d in np.unique(duration):
+            jobs = np.flatnonzero((duration == d) & (deadline >= d) & has_regions[codes])
+            if not len(jobs) or d not in slots.blocked:
+                continue
+            window = np.where(slots.blocked[d], np.inf, self.window_cost(d))
+            running_min = np.minimum.accumulate(window, axis=1)
+            # Position of the running minimum, keeping the earliest on ties
+            steps = np.arange(window.shape[1])
+            improved = np.empty_like(window, dtype=bool)
+            improved[:, 0] = True
+            improved[:, 1:] = window[:, 1:] < running_min[:, :-1]
+            argmin = np.maximum.accumulate(np.where(improved, steps, 0), axis=1)
+
+            rows = padded[codes[jobs]]
+            last = (deadline[jobs] - d)[:, None]
+            values = np.where(rows >= 0, running_min[rows.clip(0), last], np.inf)
+            k = values.argmin(axis=1)
+            best = values[np.arange(len(jobs)), k]
+            chosen = rows[np.arange(len(jobs)), k]
+            found = np.isfinite(best)
+            region[jobs[found]] = chosen[found]
+            start[jobs[found]] = argmin[chosen[found], last[found, 0]]
+            cost[jobs[found]] = best[found]
+        return region, start, cost
+
+    def _plan(self, n):
+        return {'region': np.full(n, -1), 'start': np.full(n, -1), 'cost': np.full(n, np.nan)}
+
+    def fifo(self, jobs, prepared=None):
+        """Baseline: jobs in queue order, each at its earliest free start"""
+        duration, deadline, power_kw, codes, region_lists = prepared or self._prepare(jobs)
+        slots = _Slots(self.capacity, self.horizon, np.unique(duration))
+        plan = self._plan(len(jobs))
+        for j in range(len(jobs)):
+            if np.isnan(power_kw[j]):
+                continue
+            option = self._earliest_option(slots, region_lists[codes[j]], duration[j], deadline[j])
+            if option is not None:
+                r, t, cost = option
+                slots.occupy(r, t, duration[j])
+                plan['region'][j], plan['start'][j], plan['cost'][j] = r, t, cost
+        return plan
+
+    def greedy(self, jobs, prepared=None):
+        """Heap-based greedy placement minimizing CO2"""
+        duration, deadline, power_kw, codes, region_lists = prepared or self._prepare(jobs)
+        slots = _Slots(self.capacity, self.horizon, np.unique(duration))
+        plan = self._plan(len(jobs))
+
+        home_rate = np.array([self.rates[rows[0]].mean() if len(rows) else np.nan for rows in region_lists])
+        reference = power_kw * duration * home_rate[codes]
+        region, start, cost = self._initial_options(slots, duration, deadline, codes, region_lists)
+        keys = power_kw * cost - reference
+        heap = [(float(keys[j]), j, int(region[j]), int(start[j]), float(cost[j]))
+                for j in np.flatnonzero(np.isfinite(keys))]
+        heapq.heapify(heap)
+
+        while heap:
+            _, j, r, t, cost = heapq.heappop(heap)
+            d = duration[j]
+            if r >= 0 and not slots.blocked[d][r, t]:
+                slots.occupy(r, t, d)
+                plan['region'][j], plan['start'][j], plan['cost'][j] = r, t, cost
+                continue
+            option = self._best_option(slots, region_lists[codes[j]], d, deadline[j])
+            if option is not None:
+                r, t, cost = option
+                heapq.heappush(heap, (float(power_kw[j] * cost - reference[j]), j, r, t, cost))
+        return plan
+
+    def refine(self, jobs, plan, passes=3, max_candidates=256, chunk=4096, prepared=None):
+        """
+        Local search over pairwise swaps of equal-duration jobs: moving the
+        higher-power job into the cleaner slot saves
+        (power_a - power_b) * (cost_a - cost_b) and leaves capacity as is.
+
+        Each pass finds the best partner of every placed job among the
+        ``max_candidates`` cleanest slots of its duration, then applies the
+        non-overlapping swaps in order of decreasing power.
+        """
+        duration, deadline, power_kw, codes, region_lists = prepared or self._prepare(jobs)
+        allowed = np.zeros((len(region_lists), len(self.regions)), dtype=bool)
+        for i, rows in enumerate(region_lists):
+            allowed[i, rows] = True
+        region, start, cost = plan['region'], plan['start'], plan['cost']
+
+        swaps = 0
+        for _ in range(passes):
+            swapped = 0
+            placed = region >= 0
+            for d in np.unique(duration[placed]):
+                members = np.flatnonzero(placed & (duration == d))
+                members = members[np.argsort(-power_kw[members], kind='stable')]
+                pool = members[np.argsort(cost[members], kind='stable')][:max_candidates]
+
+                proposals = []
+                for lo in range(0, len(members), chunk):
+                    a = members[lo:lo + chunk]
+                    gain = (power_kw[a][:, None] - power_kw[pool]) * (cost[a][:, None] - cost[pool])
+                    ok = ((gain > 1e-9)
+                          & allowed[codes[a]][:, region[pool]]
+                          & allowed[codes[pool]][:, region[a]].T
+                          & (start[pool] + d <= deadline[a][:, None])
+                          & (start[a][:, None] + d <= deadline[pool]))
+                    best = np.where(ok, gain, -np.inf).argmax(axis=1)
+                    has = ok[np.arange(len(a)), best]
+                    proposals.extend(zip(a[has], pool[best[has]]))
+
+                used = set()
+                for a, b in proposals:
+                    if a in used or b in used:
+                        continue
+                    used.update((a, b))
+                    region[[a, b]] = region[[b, a]]
+                    start[[a, b]] = start[[b, a]]
+                    cost[[a, b]] = cost[[b, a]]
+                    swapped += 1
+            swaps += swapped
+            if not swapped:
+                break
+        plan['swaps'] = swaps
+        return plan
+
+    def _plan_frame(self, jobs, plan, power_kw, duration, prefix):
+        placed = plan['region'] >= 0
+        return pd.DataFrame({
+            f'{prefix}region': np.where(placed, self.regions.to_numpy(dtype=object)[plan['region']], None),
+            f'{prefix}start_hour': np.where(placed, plan['start'], -1),
+            f'{prefix}end_hour': np.where(placed, plan['start'] + duration, -1),
+            f'{prefix}emissions_kg': power_kw * plan['cost'] / 1000 * LB_TO_KG,
+        }, index=jobs.index)
+
+    def schedule(self, jobs, refine=False):
+        """
+        Place a job queue. Returns one row per job with the carbon-aware and
+        FIFO placements, and a summary of the emissions saved over the jobs
+        both plans could place.
+        """
+        start_time = time.perf_counter()
+        prepared = self._prepare(jobs)
+        fifo_plan = self.fifo(jobs, prepared)
+        plan = self.greedy(jobs, prepared)
+        if refine:
+            plan = self.refine(jobs, plan, prepared=prepared)
+        elapsed = time.perf_counter() - start_time
+
+        duration, _, power_kw, _, _ = prepared
+        result = pd.concat([
+            jobs[[QUEUE_COLUMNS['job_id'], QUEUE_COLUMNS['system']]],
+            self._plan_frame(jobs, plan, power_kw, duration, ''),
+            self._plan_frame(jobs, fifo_plan, power_kw, duration, 'fifo_'),
+        ], axis=1)
+
+        both = result['emissions_kg'].notna() & result['fifo_emissions_kg'].notna()
+        scheduled_kg = result.loc[both, 'emissions_kg'].sum()
+        fifo_kg = result.loc[both, 'fifo_emissions_kg'].sum()
+        summary = {
+            'jobs': len(jobs),
+            'placed': int(result['emissions_kg'].notna().sum()),
+            'fifo_placed': int(result['fifo_emissions_kg'].notna().sum()),
+            'emissions_kg': scheduled_kg,
+            'fifo_emissions_kg': fifo_kg,
+            'saved_kg': fifo_kg - scheduled_kg,
+            'saved_pct': 100 * (fifo_kg - scheduled_kg) / fifo_kg if fifo_kg else 0.0,
+            'swaps': plan.get('swaps', 0),
+            'elapsed_s': elapsed,
+        }
+        return result, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carbon-aware placement of deferrable jobs")
+    parser.add_argument('jobs', help="CSV with job_id, system, duration_hours, deadline_hours, allowed_regions")
+    parser.add_argument('output', help="CSV to write the placements to")
+    parser.add_argument('--systems', default='../data/system_power_profiles.csv')
+    parser.add_argument('--regional', default='../data/regional_carbon_intensity.csv')
+    parser.add_argument('--region-col', default='state')
+    parser.add_argument('--capacity', type=int, default=10, help="Concurrent job slots per region")
+    parser.add_argument('--hourly-store', help="HourlyIntensityStore directory for time-varying intensity")
+    parser.add_argument('--start', help="Horizon start (timestamp) when using --hourly-store")
+    parser.add_argument('--refine', action='store_true', help="Run the swap local search after the greedy pass")
+    args = parser.parse_args()
+
+    jobs = pd.read_csv(args.jobs)
+    store = None
+    if args.hourly_store:
+        from hourly_profiles import HourlyIntensityStore
+        store = HourlyIntensityStore(args.hourly_store)
+    horizon = int(np.ceil(jobs[QUEUE_COLUMNS['deadline_hours']].max()))
+    scheduler = CarbonAwareScheduler.from_analysis(
+        read_table(args.systems), read_table(args.regional), horizon, args.capacity,
+        args.region_col, store, args.start)
+
+    result, summary = scheduler.schedule(jobs, refine=args.refine)
+    result.to_csv(args.output, index=False)
+    print(f"Placed {summary['placed']:,} of {summary['jobs']:,} jobs in {summary['elapsed_s']:.2f}s "
+          f"(FIFO placed {summary['fifo_placed']:,})")
+    print(f"Emissions: {summary['emissions_kg']:,.0f} kg vs {summary['fifo_emissions_kg']:,.0f} kg FIFO, "
+          f"saving {summary['saved_kg']:,.0f} kg ({summary['saved_pct']:.1f}%)")
@@ -0,0 +1,208 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from job_footprint import LB_TO_KG
+from mlperf_ingest import CLEAN_MLPERF_PATH
+from output_sinks import SUFFIXES, get_sink, read_table
+from power_profiles import SYSTEM_COL
+
+BENCHMARK_COL = 'Benchmark'
+SCENARIO_COL = 'Scenario'
+RESULT_COL = 'Avg. Result'
+UNITS_COL = 'Units'
+PUBLIC_ID_COL = 'Public ID'
+ORGANIZATION_COL = 'Organization'
+
+# Scenarios reported as a latency (ms) rather than a throughput when the
+# export has no Units column
+LATENCY_SCENARIOS = {'SingleStream', 'MultiStream'}
+# Samples per query of the latency scenarios, to turn a latency into a rate
+SAMPLES_PER_QUERY = {'SingleStream': 1, 'MultiStream': 8}
+JOULES_PER_KWH = 3.6e6
+LEADERBOARD_COLUMNS = ['benchmark', 'scenario', 'rank', 'system', 'organization', 'public_id',
+                       'result', 'throughput', 'total_power', 'perf_per_watt', 'joules_per_inference']
+
+
+def _throughput(df):
+    """
+    Inferences per second of each result row. Throughput scenarios report
+    it directly; latency scenarios report ms per query, converted as one
+    query in flight at a time.
+    """
+    result = pd.to_numeric(df[RESULT_COL], errors='coerce').to_numpy(dtype=float)
+    scenario = df[SCENARIO_COL].astype(str)
+    if UNITS_COL in df:
+        units = df[UNITS_COL].astype(str).str.lower()
+        latency = (units.str.contains('ms') | units.str.contains('latency')).to_numpy()
+    else:
+        latency = scenario.isin(LATENCY_SCENARIOS).to_numpy()
+    samples = scenario.map(SAMPLES_PER_QUERY).fillna(1).to_numpy(dtype=float)
+    with np.errstate(divide='ignore'):
+        rate = np.where(latency, samples * 1000 / result, result)
+    return np.where(rate > 0, rate, np.nan)
+
+
+def carbon_per_1k_inferences(joules_per_inference, intensity_lb_mwh):
+    """gCO2 per 1000 inferences for energy per inference (J) and intensity (lb/MWh)"""
+    kwh_per_1k = np.asarray(joules_per_inference, dtype=float) * 1000 / JOULES_PER_KWH
+    # lb/MWh -> g/kWh is a factor of LB_TO_KG * 1000 / 1000
+    return kwh_per_1k * np.asarray(intensity_lb_mwh, dtype=float) * LB_TO_KG
+
+
+class EfficiencyLeaderboard:
+    """
+    Performance-per-watt rankings of MLPerf systems per (benchmark, scenario).
+
+    Every result row is joined to its system's estimated power draw from
+    ``analyze_system_power_profiles``, scored as inferences/s/W and ranked
+    within its benchmark and scenario, keeping each system's best row.
+
+    Only the ``depth`` best entries of each group are retained: scores of
+    existing rows never change, so a row outside the top ``depth`` can
+    never re-enter, and ``add`` re-ranks just the groups that received new
+    rows by merging them with the retained leaders. Selection within a
+    group uses ``np.argpartition``, so only the survivors are sorted.
+    """
+
+    def __init__(self, system_stats, depth=100):
+        self.system_index = pd.Index(system_stats['system'])
+        if not self.system_index.is_unique:
+            raise ValueError("System keys must be unique")
+        self.total_power = system_stats['total_power'].to_numpy(dtype=float)
+        self.depth = depth
+        self.entries = pd.DataFrame(columns=LEADERBOARD_COLUMNS)
+        self.rows_seen = 0
+        self.rows_skipped = 0
+
+    @classmethod
+    def from_results(cls, mlperf_df, system_stats, depth=100):
+        """Leaderboard over an initial table of MLPerf results"""
+        board = cls(system_stats, depth)
+        board.add(mlperf_df)
+        return board
+
+    def score(self, mlperf_df):
+        """
+        Result rows joined to system power, with throughput, perf/W and
+        energy per inference. Rows without a known system power or a
+        usable result are dropped.
+        """
+        positions = self.system_index.get_indexer(mlperf_df[SYSTEM_COL])
+        power = np.where(positions >= 0, self.total_power[positions.clip(0)], np.nan)
+        throughput = _throughput(mlperf_df)
+
+        scored = pd.DataFrame({
+            'benchmark': mlperf_df[BENCHMARK_COL].astype(str).to_numpy(),
+            'scenario': mlperf_df[SCENARIO_COL].astype(str).to_numpy(),
+            'system': mlperf_df[SYSTEM_COL].to_numpy(),
+            'organization': (mlperf_df[ORGANIZATION_COL].to_numpy() if ORGANIZATION_COL in mlperf_df
+                             else None),
+            'public_id': mlperf_df[PUBLIC_ID_COL].to_numpy() if PUBLIC_ID_COL in mlperf_df else None,
+            'result': pd.to_numeric(mlperf_df[RESULT_COL], errors='coerce').to_numpy(dtype=float),
+            'throughput': throughput,
+            'total_power': power,
+        })
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scored['perf_per_watt'] = throughput / power
+            scored['joules_per_inference'] = power / throughput
+        valid = np.isfinite(scored['perf_per_watt'].to_numpy()) & (power > 0)
+        return scored[valid].reset_index(drop=True)
+
+    def _rank(self, scored):
+        """Best row per system, then the top ``depth`` per group in rank order"""
+        best = scored.groupby(['benchmark', 'scenario', 'system'], sort=False, observed=True,
+                              dropna=False)['perf_per_watt'].idxmax()
+        scored = scored.loc[best.to_numpy()].reset_index(drop=True)
+
+        groups, _ = pd.factorize(pd.MultiIndex.from_arrays([scored['benchmark'], scored['scenario']]))
+        score = scored['perf_per_watt'].to_numpy()
+        order = np.argsort(groups, kind='stable')
+        bounds = np.flatnonzero(np.diff(groups[order])) + 1
+
+        keep, ranks = [], []
+        for members in np.split(order, bounds):
+            if len(members) > self.depth:
+                members = members[np.argpartition(-score[members], self.depth - 1)[:self.depth]]
+            members = members[np.argsort(-score[members], kind='stable')]
+            keep.append(members)
+            ranks.append(np.arange(1, len(members) + 1))
+        if not keep:
+            return scored.iloc[:0].assign(rank=np.array([], dtype=int))[LEADERBOARD_COLUMNS]
+        ranked = scored.iloc[np.concatenate(keep)].assign(rank=np.concatenate(ranks))
+        return ranked[LEADERBOARD_COLUMNS].reset_index(drop=True)
+
+    def add(self, mlperf_df):
+        """
+        Score new result rows and re-rank only the groups they touch.
+        Returns the (benchmark, scenario) groups that were re-ranked.
+        """
+        scored = self.score(mlperf_df)
+        self.rows_seen += len(mlperf_df)
+        self.rows_skipped += len(mlperf_df) - len(scored)
+        if scored.empty:
+            return []
+
+        touched = pd.MultiIndex.from_frame(scored[['benchmark', 'scenario']]).unique()
+        current = pd.MultiIndex.from_frame(self.entries[['benchmark', 'scenario']].astype(str))
+        affected = current.isin(touched)
+        candidates = pd.concat([self.entries[affected].drop(columns='rank'), scored],
+                               ignore_index=True)
+        entries = pd.concat([self.entries[~affected], self._rank(candidates)], ignore_index=True)
+        self.entries = entries.sort_values(['benchmark', 'scenario', 'rank'], ignore_index=True)
+        return list(touched)
+
+    def top_k(self, k=10, regions=None, benchmark=None, scenario=None):
+        """
+        The ``k`` most efficient systems of each group. With ``regions`` (a
+        Series of intensities in lb/MWh indexed by region), a
+        ``gco2_per_1k_<region>`` column is added for each region.
+        """
+        if k > self.depth:
+            raise ValueError(f"Only the top {self.depth} entries per group are retained")
+        top = self.entries[self.entries['rank'] <= k]
+        if benchmark is not None:
+            top = top[top['benchmark'] == benchmark]
+        if scenario is not None:
+            top = top[top['scenario'] == scenario]
+        top = top.reset_index(drop=True)
+        if regions is not None:
+            carbon = carbon_per_1k_inferences(top['joules_per_inference'].to_numpy()[:, None],
+                                              regions.to_numpy(dtype=float)[None, :])
+            columns = [f"gco2_per_1k_{region}" for region in regions.index]
+            top = pd.concat([top, pd.DataFrame(carbon, columns=columns)], axis=1)
+        return top
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank MLPerf systems by performance per watt")
+    parser.add_argument('--results', default=str(CLEAN_MLPERF_PATH), help="MLPerf inference results table")
+    parser.add_argument('--systems', default='../data/system_power_profiles.csv')
+    parser.add_argument('--regional', default='../data/regional_carbon_intensity.csv')
+    parser.add_argument('--regions', nargs='+',
+                        help="Regions to price carbon in (default: the cleanest and dirtiest)")
+    parser.add_argument('-k', type=int, default=5, help="Systems per benchmark and scenario")
+    parser.add_argument('--benchmark')
+    parser.add_argument('--scenario')
+    parser.add_argument('--output', help="Write the leaderboard to this file (format from the extension)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    board = EfficiencyLeaderboard.from_results(read_table(args.results), read_table(args.systems),
+                                               depth=max(args.k, 100))
+    elapsed = time.perf_counter() - start
+
+    regional = read_table(args.regional)
+    intensity = regional.set_index(regional.columns[0])['mean'].sort_values()
+    regions = intensity.loc[args.regions] if args.regions else intensity.iloc[[0, -1]]
+    top = board.top_k(args.k, regions, args.benchmark, args.scenario)
+
+    print(f"Ranked {board.rows_seen - board.rows_skipped:,} of {board.rows_seen:,} results "
+          f"in {elapsed:.2f}s")
+    print(top.drop(columns=['organization', 'public_id']).round(3).to_string(index=False))
+    if args.output:
+        path = get_sink(SUFFIXES.get(Path(args.output).suffix, 'csv')).write(top, args.output)
+        print(f"Saved leaderboard to {path}")
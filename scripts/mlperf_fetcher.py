@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import CacheMiss
+from profiling import record_bytes
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class MLPerfFetcher:
+    """
+    Concurrent fetcher for MLPerf result trees exposed through the GitHub
+    contents API.
+
+    Directory listings and JSON files are requested from a bounded thread
+    pool sharing one pooled session, so connections are reused across
+    requests. Submitter/benchmark directories are walked recursively. With
+    an HttpCache, requests go through it and unchanged responses are not
+    downloaded again.
+    """
+
+    def __init__(self, max_workers=8, retries=3, backoff=0.5, timeout=30, session=None, cache=None):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or self._make_session(max_workers)
+        self.cache = cache
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    @staticmethod
+    def _make_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _get(self, url):
+        """
+        GET a URL, retrying connection errors and retryable statuses with
+        exponential backoff
+        """
+        for attempt in range(self.retries + 1):
+            self._count('requests')
+            try:
+                if self.cache is not None:
+                    response = self.cache.get(url, timeout=self.timeout, session=self.session)
+                else:
+                    response = self.session.get(url, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    self._count('bytes', len(response.content))
+                    if self.cache is None:
+                        # The cache records the bytes it actually downloads
+                        record_bytes(len(response.content))
+                    return response
+                error = requests.HTTPError(f"{response.status_code} for url: {url}", response=response)
+            except CacheMiss:
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == self.retries:
+                raise error
+            delay = self.backoff * 2 ** attempt
+            logging.warning(f"Retrying {url} in {delay:.1f}s ({error})")
+            self._count('retries')
+            time.sleep(delay)
+
+    def _list_dir(self, url):
+        listing = self._get(url).json()
+        # The contents API returns a single object when the URL is a file
+        return listing if isinstance(listing, list) else [listing]
+
+    def _fetch_json(self, url):
+        data = self._get(url).json()
+        self._count('files')
+        return data
+
+    def fetch(self, api_url, suffix='.json'):
+        """
+        Recursively fetch every file ending in ``suffix`` under ``api_url``.
+
+        Returns the parsed files ordered by repository path. Failures below
+        the root directory are logged and counted in ``stats['failed']``.
+        """
+        self.stats = {'requests': 0, 'retries': 0, 'files': 0, 'bytes': 0, 'failed': 0}
+        results = {}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {pool.submit(self._list_dir, api_url): ('dir', api_url)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, key = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if key == api_url:
+                            raise
+                        logging.error(f"Error fetching {key}: {str(e)}")
+                        self.stats['failed'] += 1
+                        continue
+
+                    if kind == 'file':
+                        results[key] = result
+                        continue
+
+                    for entry in result:
+                        if entry.get('type') == 'dir':
+                            pending[pool.submit(self._list_dir, entry['url'])] = ('dir', entry['url'])
+                        elif entry.get('type') == 'file' and entry['name'].endswith(suffix):
+                            pending[pool.submit(self._fetch_json, entry['download_url'])] = ('file', entry['path'])
+
+        elapsed = time.perf_counter() - start
+        self.stats['elapsed_s'] = elapsed
+        self.stats['files_per_s'] = self.stats['files'] / elapsed if elapsed else 0.0
+        self.stats['mb_per_s'] = self.stats['bytes'] / 1e6 / elapsed if elapsed else 0.0
+
+        logging.info(
+            f"Fetched {self.stats['files']} files ({self.stats['bytes'] / 1e6:.1f} MB) "
+            f"in {elapsed:.2f}s: {self.stats['files_per_s']:.1f} files/s, "
+            f"{self.stats['mb_per_s']:.2f} MB/s, {self.stats['retries']} retries, "
+            f"{self.stats['failed']} failed"
+        )
+        return [results[path] for path in sorted(results)]
@@ -0,0 +1,138 @@
+import codecs
+import csv
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+RAW_MLPERF_PATH = Path('../data/Table - Inference_data.csv')
+CLEAN_MLPERF_PATH = Path('../data/mlperf_inference_clean.parquet')
+
+# Byte-order marks, longest first so UTF-32 is not mistaken for UTF-16
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# Explicit types for the MLPerf inference export; unlisted columns stay strings
+MLPERF_SCHEMA = {
+    'Public ID': 'string',
+    'Organization': 'string',
+    'Availability': 'string',
+    'System Name (click + for details)': 'string',
+    '# of Nodes': 'float64',
+    'Processor': 'string',
+    '# of Processors': 'float64',
+    'Host Processor Core Count': 'float64',
+    'Accelerator': 'string',
+    '# of Accelerators': 'float64',
+    'Benchmark': 'string',
+    'Scenario': 'string',
+    'Units': 'string',
+    'Avg. Result': 'float64',
+}
+
+
+def sniff_format(file_path, sample_size=64 * 1024):
+    """
+    Detect the encoding and delimiter of a CSV export from its first bytes.
+
+    The encoding comes from the byte-order mark when there is one, otherwise
+    UTF-8 if the sample decodes cleanly and cp1252 if not. The delimiter is
+    sniffed from the decoded sample.
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    encoding = None
+    for bom, name in BOMS:
+        if sample.startswith(bom):
+            encoding = name
+            break
+    if encoding is None:
+        try:
+            sample.decode('utf-8')
+            encoding = 'utf-8'
+        except UnicodeDecodeError as e:
+            # A sample cut mid-character is still UTF-8
+            encoding = 'utf-8' if e.start >= len(sample) - 3 else 'cp1252'
+
+    text = sample.decode(encoding, errors='ignore')
+    lines = text.splitlines()
+    if len(lines) > 1:
+        # Drop the last line, which may be cut off by the sample boundary
+        text = '\n'.join(lines[:-1])
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters='\t,;|').delimiter
+    except csv.Error:
+        delimiter = ','
+    return encoding, delimiter
+
+
+def _apply_schema(chunk, schema):
+    chunk.columns = chunk.columns.str.strip()
+    for col in chunk.columns:
+        dtype = schema.get(col, 'string')
+        if dtype == 'float64':
+            values = chunk[col].str.replace(',', '', regex=False).str.strip()
+            chunk[col] = pd.to_numeric(values, errors='coerce').astype('float64')
+        else:
+            chunk[col] = chunk[col].astype(dtype)
+    return chunk
+
+
+def iter_mlperf_chunks(file_path=RAW_MLPERF_PATH, chunksize=100_000, schema=MLPERF_SCHEMA):
+    """
+    Yield typed chunks of the raw MLPerf export, parsed exactly once
+    """
+    encoding, delimiter = sniff_format(file_path)
+    reader = pd.read_csv(file_path, encoding=encoding, sep=delimiter, dtype=str,
+                         chunksize=chunksize)
+    for chunk in reader:
+        yield _apply_schema(chunk, schema)
+
+
+def read_mlperf_csv(file_path=RAW_MLPERF_PATH, schema=MLPERF_SCHEMA):
+    """
+    Read a whole MLPerf export into memory with the typed schema applied
+    """
+    chunks = list(iter_mlperf_chunks(file_path, schema=schema))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def ingest_mlperf_csv(file_path=RAW_MLPERF_PATH, output_path=CLEAN_MLPERF_PATH,
+                      chunksize=100_000, schema=MLPERF_SCHEMA):
+    """
+    Stream a raw MLPerf export into a typed Parquet file chunk by chunk,
+    so memory stays flat regardless of the export size. Returns the number
+    of rows written.
+    """
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    writer = None
+    rows = 0
+    try:
+        try:
+            for chunk in iter_mlperf_chunks(file_path, chunksize, schema):
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if writer is None:
+            raise ValueError(f"No rows found in {file_path}")
+        tmp_path.replace(output_path)
+    finally:
+        # A failed chunk leaves a partial file behind; the previous output stays
+        tmp_path.unlink(missing_ok=True)
+    return rows
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from egrid_cache import file_sha256
+from mlperf_ingest import CLEAN_MLPERF_PATH, MLPERF_SCHEMA, read_mlperf_csv
+from output_sinks import ParquetSink
+from power_profiles import SYSTEM_COL
+
+DEFAULT_STORE_DIR = Path('../data/mlperf_store')
+MANIFEST_NAME = '_manifest.json'
+KEYS_NAME = '_row_keys.npy'
+ROUND_COL = 'round'
+# A result is identified by its round, submitter, system, benchmark and scenario
+KEY_COLUMNS = [ROUND_COL, 'Organization', SYSTEM_COL, 'Benchmark', 'Scenario']
+PARTITIONING = ds.partitioning(pa.schema([(ROUND_COL, pa.string())]), flavor='hive')
+
+
+def infer_round(df, file_path):
+    """
+    MLPerf round of an export, e.g. '4.0': from the Public ID prefix
+    ('4.0-0012') when the rows carry one, otherwise from the file name
+    """
+    if 'Public ID' in df:
+        prefixes = df['Public ID'].dropna().astype(str).str.extract(r'^(\d+\.\d+)-', expand=False)
+        prefixes = prefixes.dropna().unique()
+        if len(prefixes) == 1:
+            return prefixes[0]
+    match = re.search(r'v?(\d+\.\d+)', Path(file_path).stem)
+    if match is None:
+        raise ValueError(f"Cannot tell the MLPerf round of {file_path}; pass it explicitly")
+    return match.group(1)
+
+
+def row_keys(df):
+    """64-bit hash of each row's key columns"""
+    missing = [col for col in KEY_COLUMNS if col not in df]
+    if missing:
+        raise KeyError(f"MLPerf rows are missing key columns: {missing}")
+    keys = df[KEY_COLUMNS].astype('string').fillna('')
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class MLPerfRoundStore:
+    """
+    Append-only Parquet store of MLPerf inference results across rounds,
+    partitioned as ``round=X.Y``.
+
+    Every ingested export is recorded in a manifest with its size, mtime
+    and SHA-256, so unchanged files are skipped from a stat call and
+    renamed copies from their digest. Rows are hashed on KEY_COLUMNS and
+    only keys never seen before are appended, one part file per export.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.store_dir / MANIFEST_NAME
+        self.keys_path = self.store_dir / KEYS_NAME
+
+    def _read_manifest(self):
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text())
+        return {}
+
+    def _write_manifest(self, manifest):
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.manifest_path)
+
+    def _read_keys(self):
+        if self.keys_path.exists():
+            return np.load(self.keys_path)
+        return np.empty(0, dtype=np.uint64)
+
+    def _write_keys(self, keys):
+        tmp_path = self.keys_path.with_name(KEYS_NAME + '.tmp.npy')
+        np.save(tmp_path, keys)
+        os.replace(tmp_path, self.keys_path)
+
+    def _already_ingested(self, manifest, path):
+        """Digest of ``path`` and whether it was ingested before, hashing only if its stat changed"""
+        stat = path.stat()
+        for digest, entry in manifest.items():
+            if entry['path'] == str(path.resolve()) and entry['size'] == stat.st_size \
+                    and entry['mtime_ns'] == stat.st_mtime_ns:
+                return digest, True
+        digest = file_sha256(path)
+        return digest, digest in manifest
+
+    def ingest(self, paths, round_name=None, schema=MLPERF_SCHEMA):
+        """
+        Append the unseen rows of each export. Returns a frame with the rows
+        read and appended per file; skipped files are listed with 0 rows.
+        """
+        manifest = self._read_manifest()
+        seen = self._read_keys()
+        report = []
+
+        for path in map(Path, paths):
+            digest, done = self._already_ingested(manifest, path)
+            if done:
+                report.append({'file': path.name, 'round': manifest[digest]['round'],
+                               'rows': 0, 'appended': 0, 'skipped': True})
+                continue
+
+            df = read_mlperf_csv(path, schema=schema)
+            round_ = round_name or infer_round(df, path)
+            df.insert(0, ROUND_COL, round_)
+            keys = row_keys(df)
+            _, first = np.unique(keys, return_index=True)
+            fresh = np.zeros(len(df), dtype=bool)
+            fresh[first] = True
+            fresh &= ~np.isin(keys, seen)
+
+            new_rows = df[fresh].drop(columns=ROUND_COL)
+            if len(new_rows):
+                # Named by digest, so a rerun after a crash rewrites rather than duplicates
+                part = self.store_dir / f"{ROUND_COL}={round_}" / f"part-{digest[:16]}.parquet"
+                part.parent.mkdir(parents=True, exist_ok=True)
+                ParquetSink().write(new_rows.reset_index(drop=True), part)
+                seen = np.union1d(seen, keys[fresh])
+                self._write_keys(seen)
+
+            stat = path.stat()
+            manifest[digest] = {'path': str(path.resolve()), 'file': path.name, 'round': round_,
+                                'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                'rows': len(df), 'appended': int(fresh.sum())}
+            self._write_manifest(manifest)
+            report.append({'file': path.name, 'round': round_, 'rows': len(df),
+                           'appended': int(fresh.sum()), 'skipped': False})
+        return pd.DataFrame(report, columns=['file', 'round', 'rows', 'appended', 'skipped'])
+
+    def rounds(self):
+        return sorted({entry['round'] for entry in self._read_manifest().values()})
+
+    def load(self, rounds=None, columns=None):
+        """Stored results of the given rounds (all by default) with a ``round`` column"""
+        files = sorted(self.store_dir.glob(f"{ROUND_COL}=*/*.parquet"))
+        if not files:
+            return pd.DataFrame(columns=[ROUND_COL] + list(columns or []))
+        # Rounds export different columns; read them against the union
+        schema = pa.unify_schemas([pq.read_schema(f) for f in files] + [PARTITIONING.schema])
+        dataset = ds.dataset(files, schema=schema, format='parquet', partitioning=PARTITIONING,
+                             partition_base_dir=str(self.store_dir))
+        condition = None if rounds is None else ds.field(ROUND_COL).isin([str(r) for r in rounds])
+        if columns is not None:
+            columns = list(dict.fromkeys([ROUND_COL] + list(columns)))
+        return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+    def export(self, output_path=CLEAN_MLPERF_PATH, rounds=None):
+        """Write the stored results as the clean table the analysis reads"""
+        df = self.load(rounds)
+        return ParquetSink().write(df, output_path), len(df)
+
+
+def expand_exports(paths):
+    """CSV exports named directly or found in the given directories"""
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob('*.csv')) if path.is_dir() else [path])
+    return files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest MLPerf inference round exports")
+    parser.add_argument('--store', default=str(DEFAULT_STORE_DIR))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Append the unseen rows of round exports")
+    ingest.add_argument('exports', nargs='+', help="CSV exports or directories of them")
+    ingest.add_argument('--round', help="Round of the exports, if not in the Public IDs or file names")
+    ingest.add_argument('--export', action='store_true',
+                        help=f"Refresh {CLEAN_MLPERF_PATH.name} from the store afterwards")
+
+    export = commands.add_parser('export', help=f"Write the stored rounds to {CLEAN_MLPERF_PATH.name}")
+    export.add_argument('--rounds', nargs='+')
+    args = parser.parse_args()
+
+    store = MLPerfRoundStore(args.store)
+    if args.command == 'ingest':
+        start = time.perf_counter()
+        report = store.ingest(expand_exports(args.exports), args.round)
+        elapsed = time.perf_counter() - start
+        print(report.to_string(index=False))
+        print(f"\nAppended {report['appended'].sum():,} new rows from "
+              f"{(~report['skipped']).sum()} of {len(report)} files in {elapsed:.2f}s")
+    if args.command == 'export' or args.export:
+        path, rows = store.export(rounds=getattr(args, 'rounds', None))
+        print(f"Wrote {rows:,} results from rounds {', '.join(store.rounds())} to {path}")
@@ -0,0 +1,173 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from egrid_schema import EMISSIONS_COL
+
+# Default cut-offs: |z| < 3 for the mean/std rule, and 3.5 for the modified
+# z-score recommended by Iglewicz and Hoaglin
+DEFAULT_THRESHOLDS = {'zscore': 3.0, 'mad': 3.5}
+# Ratio of the MAD to the standard deviation for normal data
+MAD_SCALE = 0.6745
+# Ratio of the mean absolute deviation to the standard deviation, used when
+# over half of a group shares one value (e.g. zero-emission plants) and the
+# MAD is zero
+MEAN_AD_SCALE = 0.7979
+# Group label used when statistics are pooled over the whole column
+ALL_ROWS = '__all__'
+
+
+class OutlierFilter:
+    """
+    Outlier filter whose statistics are accumulated one chunk at a time.
+
+    ``method='zscore'`` flags values more than ``threshold`` population
+    standard deviations from the mean. Count, mean and sum of squared
+    deviations are computed per chunk and combined with the parallel form
+    of Welford's update (Chan et al.), so chunks never need to be held
+    together; with the defaults this reproduces ``abs(stats.zscore(x)) < 3``
+    over the whole column.
+
+    ``method='mad'`` flags values whose modified z-score,
+    0.6745 * |x - median| / MAD, reaches ``threshold``, falling back to the
+    mean absolute deviation when the MAD is zero. Medians cannot be merged
+    from summaries, so this mode keeps the values of each group.
+
+    With ``group_col`` set, statistics are kept per group (e.g. per state)
+    so each region is judged against its own distribution. Filters fitted
+    on separate chunks or in separate workers combine with ``merge``.
+    """
+
+    def __init__(self, value_col=EMISSIONS_COL, group_col=None, method='zscore', threshold=None):
+        if method not in DEFAULT_THRESHOLDS:
+            raise ValueError(f"Unknown outlier method {method!r}, expected one of {list(DEFAULT_THRESHOLDS)}")
+        self.value_col = value_col
+        self.group_col = group_col
+        self.method = method
+        self.threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+        self.moments = pd.DataFrame({'n': [], 'mean': [], 'm2': []}, dtype=float)
+        self.samples = {}
+
+    def _values_and_keys(self, chunk):
+        values = pd.to_numeric(chunk[self.value_col], errors='coerce')
+        if self.group_col is None:
+            keys = pd.Series(ALL_ROWS, index=chunk.index, dtype=object)
+        else:
+            keys = chunk[self.group_col].astype(object)
+        return values, keys
+
+    def _merge_moments(self, other):
+        index = self.moments.index.append(other.index).unique()
+        a = self.moments.reindex(index, fill_value=0.0)
+        b = other.reindex(index, fill_value=0.0)
+        n = a['n'] + b['n']
+        delta = b['mean'] - a['mean']
+        self.moments = pd.DataFrame({
+            'n': n,
+            'mean': a['mean'] + delta * b['n'] / n,
+            'm2': a['m2'] + b['m2'] + delta ** 2 * a['n'] * b['n'] / n,
+        })
+
+    def update(self, chunk):
+        """Add the rows of one chunk to the statistics"""
+        values, keys = self._values_and_keys(chunk)
+        valid = values.notna() & keys.notna()
+        x = values[valid].to_numpy(dtype=float)
+        if not len(x):
+            return self
+
+        codes, uniques = pd.factorize(keys[valid].to_numpy(), sort=False)
+        if self.method == 'mad':
+            order = np.argsort(codes, kind='stable')
+            bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+            for key, group in zip(uniques, np.split(x[order], bounds)):
+                self.samples.setdefault(key, []).append(group)
+            return self
+
+        n = np.bincount(codes, minlength=len(uniques)).astype(float)
+        mean = np.bincount(codes, weights=x, minlength=len(uniques)) / n
+        m2 = np.bincount(codes, weights=(x - mean[codes]) ** 2, minlength=len(uniques))
+        self._merge_moments(pd.DataFrame({'n': n, 'mean': mean, 'm2': m2}, index=pd.Index(uniques)))
+        return self
+
+    def fit(self, chunks):
+        """Accumulate statistics over an iterable of DataFrame chunks"""
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def merge(self, other):
+        """Fold in the statistics of a filter fitted on other chunks"""
+        if (other.value_col, other.group_col, other.method) != (self.value_col, self.group_col, self.method):
+            raise ValueError("Can only merge outlier filters with the same columns and method")
+        if self.method == 'mad':
+            for key, parts in other.samples.items():
+                self.samples.setdefault(key, []).extend(parts)
+        else:
+            self._merge_moments(other.moments)
+        return self
+
+    def statistics(self):
+        """Per-group count, centre and scale the scores are measured against"""
+        if self.method == 'zscore':
+            return pd.DataFrame({
+                'count': self.moments['n'].astype(int),
+                'center': self.moments['mean'],
+                'scale': np.sqrt(self.moments['m2'] / self.moments['n']),
+            })
+
+        rows = {}
+        for key, parts in self.samples.items():
+            x = np.concatenate(parts)
+            median = np.median(x)
+            deviation = np.abs(x - median)
+            mad = np.median(deviation)
+            scale = mad / MAD_SCALE if mad > 0 else deviation.mean() / MEAN_AD_SCALE
+            rows[key] = (len(x), median, scale)
+        return pd.DataFrame.from_dict(rows, orient='index', columns=['count', 'center', 'scale'])
+
+    def outliers(self, chunk, statistics=None):
+        """
+        Boolean Series marking the outliers of a chunk. Missing values and
+        rows of groups the filter has not seen are never flagged.
+        """
+        if statistics is None:
+            statistics = self.statistics()
+        values, keys = self._values_and_keys(chunk)
+        center = keys.map(statistics['center']).to_numpy(dtype=float)
+        scale = keys.map(statistics['scale']).to_numpy(dtype=float)
+        deviation = np.abs(values.to_numpy(dtype=float) - center)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score = deviation / scale
+        if self.method == 'mad':
+            # A zero scale (e.g. a single-plant state) only flags values off the median
+            score = np.where(deviation == 0, 0.0, score)
+        # As with stats.zscore, a zero standard deviation flags every value
+        flagged = ~(score < self.threshold) & ~np.isnan(deviation)
+        return pd.Series(flagged, index=chunk.index)
+
+    def apply(self, chunk, statistics=None):
+        """Return a copy of the chunk with outlying values set to NaN"""
+        chunk = chunk.copy()
+        chunk[self.value_col] = chunk[self.value_col].mask(self.outliers(chunk, statistics))
+        return chunk
+
+
+def merge_filters(filters):
+    """Combine filters fitted independently, e.g. one per worker, into the first"""
+    return reduce(OutlierFilter.merge, filters)
+
+
+def filter_outliers(df, value_col=EMISSIONS_COL, group_col=None, method='zscore', threshold=None,
+                    chunksize=None):
+    """
+    Set the outliers of ``value_col`` to NaN. With ``chunksize``, statistics
+    are accumulated over slices of that many rows. Returns the filtered
+    frame and the filter holding the fitted statistics.
+    """
+    outlier_filter = OutlierFilter(value_col, group_col, method, threshold)
+    step = chunksize or max(len(df), 1)
+    outlier_filter.fit(df.iloc[start:start + step] for start in range(0, len(df), step))
+    return outlier_filter.apply(df), outlier_filter
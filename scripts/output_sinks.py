@@ -0,0 +1,145 @@
+import os
+from pathlib import Path
+
+# Leading bytes of the columnar formats; anything else is read as CSV
+PARQUET_MAGIC = b'PAR1'
+FEATHER_MAGIC = b'ARROW1'
+DEFAULT_FORMAT = 'csv'
+
+
+class OutputSink:
+    """
+    Writes result tables in one file format.
+
+    Tables are named by path without caring about the extension; the sink
+    substitutes its own. Every write goes to a temporary file beside the
+    target and is renamed over it, so an interrupted run leaves the
+    previous file intact rather than a truncated one.
+    """
+
+    name = None
+    suffix = None
+
+    def __init__(self, compression=None):
+        self.compression = compression
+
+    def path_for(self, path):
+        """Where a table named ``path`` is written by this sink"""
+        return table_stem(path).with_name(table_stem(path).name + self.suffix)
+
+    def write(self, df, path):
+        """Atomically write ``df`` and return the path written"""
+        path = self.path_for(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            self._write(df, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return path
+
+    def _write(self, df, path):
+        raise NotImplementedError
+
+
+class CsvSink(OutputSink):
+    """Plain, uncompressed CSV so the files stay readable by any tool"""
+
+    name = 'csv'
+    suffix = '.csv'
+
+    def _write(self, df, path):
+        df.to_csv(path, index=False)
+
+
+class ParquetSink(OutputSink):
+    name = 'parquet'
+    suffix = '.parquet'
+
+    def __init__(self, compression='zstd'):
+        super().__init__(compression)
+
+    def _write(self, df, path):
+        df.to_parquet(path, index=False, compression=self.compression)
+
+
+class FeatherSink(OutputSink):
+    """Arrow IPC file format, memory-mappable and the fastest to reload"""
+
+    name = 'feather'
+    suffix = '.feather'
+
+    def __init__(self, compression='lz4'):
+        super().__init__(compression)
+
+    def _write(self, df, path):
+        df.reset_index(drop=True).to_feather(path, compression=self.compression)
+
+
+SINKS = {sink.name: sink for sink in (CsvSink, ParquetSink, FeatherSink)}
+SUFFIXES = {sink.suffix: sink.name for sink in SINKS.values()}
+
+
+def table_stem(path):
+    """
+    ``path`` without a table extension. Only the known extensions are
+    stripped, so names such as ``intensity_v1.2`` keep their dots.
+    """
+    path = Path(path)
+    if path.suffix in SUFFIXES:
+        return path.with_name(path.name[:-len(path.suffix)])
+    return path
+
+
+def get_sink(fmt=DEFAULT_FORMAT, compression=None):
+    """Sink for a format name, with its default compression unless given"""
+    if fmt not in SINKS:
+        raise ValueError(f"Unknown output format '{fmt}'; choose from {', '.join(SINKS)}")
+    return SINKS[fmt]() if compression is None else SINKS[fmt](compression)
+
+
+def detect_format(path):
+    """Format of a table file from its leading bytes"""
+    with open(path, 'rb') as f:
+        head = f.read(len(FEATHER_MAGIC))
+    if head.startswith(PARQUET_MAGIC):
+        return 'parquet'
+    if head.startswith(FEATHER_MAGIC):
+        return 'feather'
+    return 'csv'
+
+
+def resolve_table(path):
+    """
+    The file holding the table named ``path``: the most recently written
+    file with the same name and any supported extension, so a stale CSV
+    never shadows a newer Parquet copy. A path with some other extension
+    is used as it is.
+    """
+    path = Path(path)
+    stem = table_stem(path)
+    candidates = [stem.with_name(stem.name + suffix) for suffix in SUFFIXES]
+    if path not in candidates:
+        candidates.append(path)
+    candidates = [candidate for candidate in candidates if candidate.exists()]
+    if not candidates:
+        raise FileNotFoundError(f"No table found for {path} (tried {', '.join(SUFFIXES)})")
+    return max(candidates, key=lambda candidate: candidate.stat().st_mtime_ns)
+
+
+def read_table(path, columns=None):
+    """
+    Read a table written by any sink, detecting its format from the file
+    contents. ``path`` may name the table with a different extension.
+    """
+    # pandas is imported here so the report command can resolve tables cheaply
+    import pandas as pd
+
+    path = resolve_table(path)
+    fmt = detect_format(path)
+    if fmt == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    if fmt == 'feather':
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
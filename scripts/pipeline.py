@@ -0,0 +1,150 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from pathlib import Path
+
+from egrid_cache import file_sha256
+
+
+class Stage:
+    """
+    One step of an analysis pipeline.
+
+    ``func`` is called with the results of the stages named in ``inputs``.
+    The stage's fingerprint covers the source of ``func`` and of everything
+    in ``code`` (functions or modules it relies on), ``params``, the
+    contents of ``files`` and the fingerprints of its input stages. Missing
+    ``outputs`` files also force the stage to run.
+    """
+
+    def __init__(self, name, func, inputs=(), files=(), params=None, code=(), outputs=()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.files = [Path(f) for f in files]
+        self.params = params or {}
+        self.code = [func] + list(code)
+        self.outputs = [Path(f) for f in outputs]
+
+
+def source_digest(obj):
+    try:
+        source = inspect.getsource(obj)
+    except (OSError, TypeError):
+        source = repr(getattr(obj, '__code__', obj))
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+class PipelineRunner:
+    """
+    Run stages in dependency order, skipping any stage whose fingerprint
+    matches the one stored with its last result and loading that result
+    from disk instead.
+    """
+
+    def __init__(self, stages, cache_dir=Path('../data/cache/pipeline')):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _order(self):
+        """Topologically sort the stages"""
+        ordered, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle through stage '{name}'")
+            if name not in self.stages:
+                raise ValueError(f"Unknown pipeline stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].inputs:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    def _downstream(self, names):
+        """Expand a set of stage names with every stage that depends on them"""
+        expanded = set(names)
+        for name in self._order():
+            if any(dep in expanded for dep in self.stages[name].inputs):
+                expanded.add(name)
+        return expanded
+
+    def _fingerprint(self, stage, fingerprints):
+        payload = {
+            'stage': stage.name,
+            'code': [source_digest(obj) for obj in stage.code],
+            'params': stage.params,
+            'files': {str(f): file_sha256(f) if f.exists() else None for f in stage.files},
+            'inputs': {dep: fingerprints[dep] for dep in stage.inputs},
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _load(self, name, fingerprint):
+        meta_path = self.cache_dir / f"{name}.json"
+        result_path = self.cache_dir / f"{name}.pkl"
+        if not (meta_path.exists() and result_path.exists()):
+            return False, None
+        if json.loads(meta_path.read_text()).get('fingerprint') != fingerprint:
+            return False, None
+        with open(result_path, 'rb') as f:
+            return True, pickle.load(f)
+
+    def _store(self, name, fingerprint, result):
+        result_path = self.cache_dir / f"{name}.pkl"
+        tmp_path = result_path.with_suffix('.pkl.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, result_path)
+        (self.cache_dir / f"{name}.json").write_text(json.dumps({'fingerprint': fingerprint}))
+
+    def _upstream(self, names):
+        """Expand a set of stage names with every stage they depend on"""
+        expanded, todo = set(), list(names)
+        while todo:
+            name = todo.pop()
+            if name not in expanded:
+                expanded.add(name)
+                todo.extend(self.stages[name].inputs)
+        return expanded
+
+    def run(self, force=(), targets=None):
+        """
+        Run the pipeline and return the results of every stage by name.
+        ``force`` names stages to rerun regardless of their fingerprint
+        ('all' reruns everything); stages downstream of them rerun too.
+        With ``targets``, only those stages and their inputs are run.
+        """
+        force = set(self.stages) if 'all' in force else self._downstream(force)
+        needed = self._upstream(targets) if targets is not None else set(self.stages)
+        fingerprints, results = {}, {}
+
+        for name in self._order():
+            if name not in needed:
+                continue
+            stage = self.stages[name]
+            fingerprint = self._fingerprint(stage, fingerprints)
+            fingerprints[name] = fingerprint
+
+            outputs_present = all(path.exists() for path in stage.outputs)
+            if name not in force and outputs_present:
+                hit, result = self._load(name, fingerprint)
+                if hit:
+                    print(f"\nSkipping stage '{name}' (unchanged, loaded stored result)")
+                    results[name] = result
+                    continue
+
+            results[name] = stage.func(*[results[dep] for dep in stage.inputs])
+            self._store(name, fingerprint, results[name])
+
+        return results
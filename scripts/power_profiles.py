@@ -0,0 +1,113 @@
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SYSTEM_COL = 'System Name (click + for details)'
+ACCELERATOR_COL = 'Accelerator'
+ACCELERATOR_COUNT_COL = '# of Accelerators'
+PROCESSOR_COL = 'Processor'
+CORE_COUNT_COL = 'Host Processor Core Count'
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent / 'power_catalog.json'
+
+
+def _to_float(series):
+    """Parse a column to float, returning NaN where a value cannot be parsed"""
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        series = series.astype(str).str.strip().where(series.notna())
+    return pd.to_numeric(series, errors='coerce')
+
+
+class PowerCatalog:
+    """
+    Hardware power specifications used to estimate system power draw.
+
+    Accelerator entries are matched as substrings of the MLPerf
+    ``Accelerator`` field; when several match, the first entry in the
+    catalog wins.
+    """
+
+    def __init__(self, accelerators, base_power_w=200, cpu_watts_per_core=5,
+                 default_cpu_power_w=150, uncertainty=None):
+        self.patterns = [entry['pattern'] for entry in accelerators]
+        self.tdp_w = np.array([entry['tdp_w'] for entry in accelerators], dtype=float)
+        self.base_power_w = base_power_w
+        self.cpu_watts_per_core = cpu_watts_per_core
+        self.default_cpu_power_w = default_cpu_power_w
+        # Relative standard deviation of each power component estimate
+        self.uncertainty = uncertainty or {'base_power': 0.0, 'cpu_power': 0.0, 'acc_power': 0.0}
+        self._compiled = [re.compile(re.escape(p)) for p in self.patterns]
+
+    @classmethod
+    def load(cls, path=DEFAULT_CATALOG_PATH):
+        """Load a catalog from a JSON file"""
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(**spec)
+
+    def match_accelerators(self, accelerators):
+        """
+        Return the TDP (W) of the first matching catalog entry for each
+        accelerator string, or NaN when nothing matches.
+
+        Matching runs once per distinct string and is broadcast back.
+        """
+        codes, uniques = pd.factorize(pd.Series(accelerators).astype(str))
+        unique_tdp = np.full(len(uniques), np.nan)
+        unresolved = np.ones(len(uniques), dtype=bool)
+
+        for pattern, tdp in zip(self._compiled, self.tdp_w):
+            hit = np.fromiter((pattern.search(u) is not None for u in uniques),
+                              dtype=bool, count=len(uniques))
+            hit &= unresolved
+            unique_tdp[hit] = tdp
+            unresolved &= ~hit
+
+        # Missing accelerators are coded -1 by factorize
+        return np.where(codes >= 0, unique_tdp[codes.clip(0)], np.nan)
+
+
+def resolve_system_power(mlperf_df, catalog):
+    """
+    Estimate base/accelerator/CPU/total power for every system in the
+    MLPerf table using the first row reported for each system.
+
+    Returns the per-system frame together with the names of systems whose
+    accelerator or core counts could not be parsed.
+    """
+    systems = mlperf_df.drop_duplicates(SYSTEM_COL, keep='first')
+
+    accelerator = systems[ACCELERATOR_COL]
+    raw_count = systems[ACCELERATOR_COUNT_COL]
+    raw_cores = systems[CORE_COUNT_COL]
+    acc_count = _to_float(raw_count)
+    cores = _to_float(raw_cores)
+
+    tdp = catalog.match_accelerators(accelerator)
+    has_acc = (accelerator.notna() & raw_count.notna()).to_numpy() & ~np.isnan(tdp)
+    acc_power = np.where(has_acc & acc_count.notna().to_numpy(), tdp * acc_count.to_numpy(), 0.0)
+
+    cpu_power = np.where(cores.notna(), cores * catalog.cpu_watts_per_core,
+                         catalog.default_cpu_power_w)
+    base_power = np.full(len(systems), catalog.base_power_w)
+
+    system_stats_df = pd.DataFrame({
+        'system': systems[SYSTEM_COL].to_numpy(),
+        'accelerator': accelerator.to_numpy(),
+        'accelerator_count': raw_count.to_numpy(),
+        'processor': systems[PROCESSOR_COL].to_numpy(),
+        'core_count': raw_cores.to_numpy(),
+        'base_power': base_power,
+        'acc_power': acc_power,
+        'cpu_power': cpu_power,
+        'total_power': base_power + acc_power + cpu_power
+    })
+
+    bad_count = has_acc & acc_count.isna().to_numpy()
+    bad_cores = (raw_cores.notna() & cores.isna()).to_numpy()
+    unparsed = system_stats_df.loc[bad_count | bad_cores, 'system'].tolist()
+
+    return system_stats_df, unparsed
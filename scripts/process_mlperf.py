@@ -1,5 +1,7 @@
 import pandas as pd
 
+from mlperf_ingest import CLEAN_MLPERF_PATH, ingest_mlperf_csv, sniff_format
+
 def process_mlperf_data():
     """
     Process the MLPerf data with proper tab delimiter handling
@@ -7,11 +9,9 @@ def process_mlperf_data():
     file_path = '../data/Table - Inference_data.csv'
     
     try:
-        # Read with explicit tab delimiter and utf-16 encoding
-        df = pd.read_csv(file_path, encoding='utf-16', sep='\t')
-        
-        # Clean up column names
-        df.columns = df.columns.str.strip()
+        # Sniff encoding and delimiter, then parse once into typed Parquet
+        ingest_mlperf_csv(file_path, CLEAN_MLPERF_PATH)
+        df = pd.read_parquet(CLEAN_MLPERF_PATH)
         
         print("\nProcessed Dataset Overview:")
         print(f"Number of rows: {len(df)}")
@@ -37,9 +37,7 @@ def process_mlperf_data():
         if 'Avg. Result' in df.columns:
             print(df['Avg. Result'].describe())
         
-        # Save processed data
-        df.to_csv('../data/mlperf_inference_clean.csv', index=False)
-        print("\nSaved cleaned data to 'mlperf_inference_clean.csv'")
+        print(f"\nSaved cleaned data to '{CLEAN_MLPERF_PATH.name}'")
         
         return df
         
@@ -48,7 +46,8 @@ def process_mlperf_data():
         print("Attempting to read raw file content...")
         
         # Read raw file content for debugging
-        with open(file_path, 'r', encoding='utf-16') as f:
+        encoding, _ = sniff_format(file_path)
+        with open(file_path, 'r', encoding=encoding) as f:
             first_lines = [next(f) for _ in range(5)]
             print("\nFirst few lines of raw file:")
             for line in first_lines:
@@ -0,0 +1,231 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import sys
+from pathlib import Path
+
+
+def _count_rows(obj):
+    """Rows in a DataFrame/Series, or in every frame of a tuple or list"""
+    # pandas is only looked up, not imported, so the CLI can load this module cheaply
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, (tuple, list)):
+        return sum(_count_rows(item) for item in obj)
+    return 0
+
+
+class StageProfiler:
+    """
+    Collects wall/CPU time, tracemalloc peak, row counts and downloaded
+    bytes for pipeline stages, and writes them as a Chrome trace.
+
+    Disabled by default, in which case profiled stages run with only a
+    flag check of overhead. When ``cprofile_dir`` is set, each outermost
+    stage is also run under cProfile and dumped to ``<stage>.prof``
+    (cProfile cannot nest).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.cprofile_dir = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._active = []
+        self._origin = time.perf_counter()
+
+    def enable(self, cprofile_dir=None):
+        self.enabled = True
+        self.events = []
+        self._origin = time.perf_counter()
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+        if self.cprofile_dir:
+            self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def record_bytes(self, n_bytes):
+        """Attribute downloaded bytes to the innermost running stage"""
+        if not self.enabled:
+            return
+        stack = self._stack()
+        with self._lock:
+            # Worker threads (e.g. segmented downloads) have no stage of their
+            # own, so their bytes go to the most recently started stage
+            target = stack[-1] if stack else (self._active[-1] if self._active else None)
+            if target is not None:
+                target['bytes_downloaded'] += n_bytes
+
+    def start(self, name, inputs=()):
+        stack = self._stack()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]['peak_seen'] = max(stack[-1]['peak_seen'], peak)
+        tracemalloc.reset_peak()
+
+        record = {
+            'name': name,
+            'input_rows': _count_rows(list(inputs)),
+            'bytes_downloaded': 0,
+            'mem_start': current,
+            'peak_seen': 0,
+            'profile': None,
+        }
+        if self.cprofile_dir and not any(r['profile'] for r in stack):
+            record['profile'] = cProfile.Profile()
+            record['profile'].enable()
+        record['wall_start'] = time.perf_counter()
+        record['cpu_start'] = time.process_time()
+        stack.append(record)
+        with self._lock:
+            self._active.append(record)
+        return record
+
+    def finish(self, record, output=None):
+        wall_end = time.perf_counter()
+        cpu = time.process_time() - record['cpu_start']
+        if record['profile'] is not None:
+            record['profile'].disable()
+            record['profile'].dump_stats(self.cprofile_dir / f"{record['name']}.prof")
+
+        stack = self._stack()
+        stack.pop()
+        peak = max(tracemalloc.get_traced_memory()[1], record['peak_seen'])
+        if stack:
+            # Let the enclosing stage see this stage's peak after reset_peak
+            stack[-1]['peak_seen'] = max(stack[-1]['peak_seen'], peak)
+
+        event = {
+            'name': record['name'],
+            'ph': 'X',
+            'ts': (record['wall_start'] - self._origin) * 1e6,
+            'dur': (wall_end - record['wall_start']) * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {
+                'wall_s': wall_end - record['wall_start'],
+                'cpu_s': cpu,
+                'tracemalloc_peak_mb': max(0, peak - record['mem_start']) / 1e6,
+                'input_rows': record['input_rows'],
+                'output_rows': _count_rows(output),
+                'bytes_downloaded': record['bytes_downloaded'],
+            },
+        }
+        with self._lock:
+            self._active.remove(record)
+            self.events.append(event)
+            if stack:
+                stack[-1]['bytes_downloaded'] += record['bytes_downloaded']
+
+    def write_trace(self, path):
+        """Write the recorded stages in Chrome trace format (chrome://tracing, Perfetto)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, indent=1))
+        return path
+
+    def summary(self):
+        """Recorded stages as a DataFrame, one row per stage call"""
+        import pandas as pd
+        return pd.DataFrame([{'stage': e['name'], **e['args']} for e in self.events])
+
+
+PROFILER = StageProfiler()
+
+
+class profile_stage:
+    """
+    Profile a stage, either as a decorator or as a context manager:
+
+        @profile_stage('regional')
+        def calculate_regional_carbon_intensity(self, egrid_df): ...
+
+        with profile_stage('save'):
+            ...
+
+    As a decorator, DataFrame arguments count as input rows and the return
+    value as output rows. Without a name, the function's qualified name is
+    used.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self._records = []
+
+    def __call__(self, func):
+        name = self.name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            record = PROFILER.start(name, list(args) + list(kwargs.values()))
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                PROFILER.finish(record)
+                raise
+            PROFILER.finish(record, result)
+            return result
+
+        return wrapper
+
+    def __enter__(self):
+        record = PROFILER.start(self.name) if PROFILER.enabled else None
+        self._records.append(record)
+        return self
+
+    def __exit__(self, *exc_info):
+        record = self._records.pop()
+        if record is not None:
+            PROFILER.finish(record)
+        return False
+
+
+def record_bytes(n_bytes):
+    """Count bytes downloaded by the current stage"""
+    PROFILER.record_bytes(n_bytes)
+
+
+DEFAULT_TRACE_PATH = '../data/profile_trace.json'
+
+
+def add_profile_arguments(parser):
+    """Add the --profile and --cprofile-dir options to a script's parser"""
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, metavar='TRACE_JSON',
+                        help=f"Record per-stage timings to a Chrome trace (default {DEFAULT_TRACE_PATH})")
+    parser.add_argument('--cprofile-dir', metavar='DIR',
+                        help="With --profile, also dump a cProfile file per stage into DIR")
+
+
+def start_profiling(args):
+    """Enable the profiler if the script was run with --profile"""
+    if args.profile:
+        PROFILER.enable(cprofile_dir=args.cprofile_dir)
+
+
+def finish_profiling(args):
+    """Write the trace and print a per-stage summary if profiling was enabled"""
+    if not args.profile:
+        return
+    path = PROFILER.write_trace(args.profile)
+    print("\nStage profile:")
+    print(PROFILER.summary().to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print(f"Trace written to {path}")
+    PROFILER.disable()
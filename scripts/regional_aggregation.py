@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from egrid_schema import BA_COL, EMISSIONS_COL, GENERATION_COL, NERC_COL, STATE_COL, SUBREGION_COL
+
+# Grouping keys supported by the aggregation engine, mapped to PLNT22 columns
+GROUPING_COLUMNS = {
+    'state': STATE_COL,
+    'subregion': SUBREGION_COL,
+    'nerc_region': NERC_COL,
+    'balancing_authority': BA_COL,
+}
+
+
+def _t_margin(std, n, conf_level):
+    """
+    Margin of error of a t-based confidence interval, vectorized over groups.
+    Groups with fewer than two observations get a zero margin.
+    """
+    n = np.asarray(n, dtype=float)
+    dof = n - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_values = stats.t.ppf((1 + conf_level) / 2, np.where(dof > 0, dof, np.nan))
+        margin = t_values * (np.asarray(std, dtype=float) / np.sqrt(n))
+    return np.where(dof > 0, margin, 0.0)
+
+
+def _unweighted_stats(values, keys):
+    grouped = values.groupby(keys, sort=False, observed=True)
+    result = grouped.agg(['mean', 'std', 'count', 'median', 'min', 'max'])
+    result['std'] = result['std'].where(result['count'] > 1, 0)
+    return result, result['count'].to_numpy()
+
+
+def _weighted_stats(values, keys, weights):
+    """
+    Generation-weighted mean and standard deviation per group. The CI uses
+    Kish's effective sample size, (sum w)^2 / sum w^2, in place of the count.
+    """
+    codes, uniques = pd.factorize(keys, sort=False)
+    x = values.to_numpy(dtype=float)
+    w = weights.to_numpy(dtype=float)
+    n_groups = len(uniques)
+
+    sum_w = np.bincount(codes, weights=w, minlength=n_groups)
+    sum_w2 = np.bincount(codes, weights=w * w, minlength=n_groups)
+    mean = np.bincount(codes, weights=w * x, minlength=n_groups) / sum_w
+    sq_dev = np.bincount(codes, weights=w * (x - mean[codes]) ** 2, minlength=n_groups)
+    n_eff = sum_w ** 2 / sum_w2
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = sq_dev / sum_w * n_eff / (n_eff - 1)
+    std = np.where(n_eff > 1, np.sqrt(var), 0.0)
+
+    grouped = values.groupby(codes, sort=True)
+    result = pd.DataFrame({
+        'mean': mean,
+        'std': std,
+        'count': np.bincount(codes, minlength=n_groups),
+        'median': grouped.median().to_numpy(),
+        'min': grouped.min().to_numpy(),
+        'max': grouped.max().to_numpy(),
+    }, index=pd.Index(uniques))
+    return result, n_eff
+
+
+def aggregate_by_group(df, group_col, value_col=EMISSIONS_COL, weight_col=None,
+                       conf_level=0.95, name='state'):
+    """
+    Summary statistics and t-based confidence intervals for every group in a
+    single grouped pass.
+
+    Groups appear in order of first appearance, matching a loop over
+    ``df[group_col].unique()``. With ``weight_col`` set, only rows with a
+    positive weight contribute and mean/std/CI are weight-based.
+    """
+    valid = df[value_col].notna() & df[group_col].notna()
+    if weight_col is not None:
+        weights = pd.to_numeric(df[weight_col], errors='coerce')
+        valid &= weights > 0
+
+    values = df.loc[valid, value_col].astype(float)
+    keys = df.loc[valid, group_col]
+
+    if weight_col is None:
+        result, n = _unweighted_stats(values, keys)
+    else:
+        result, n = _weighted_stats(values, keys, weights[valid])
+
+    margin = _t_margin(result['std'], n, conf_level)
+    result['ci_lower'] = result['mean'] - margin
+    result['ci_upper'] = result['mean'] + margin
+
+    result.index.name = name
+    return result.reset_index()
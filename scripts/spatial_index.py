@@ -0,0 +1,163 @@
+import argparse
+import os
+import pickle
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from egrid_cache import EgridCache
+from egrid_loader import load_plant_columns
+from egrid_schema import (EMISSIONS_COL, GENERATION_COL, LAT_COL, LON_COL, ORIS_COL,
+                          SUBREGION_COL)
+
+EARTH_RADIUS_KM = 6371.0088
+INDEX_COLUMNS = [ORIS_COL, LAT_COL, LON_COL, SUBREGION_COL, EMISSIONS_COL, GENERATION_COL]
+
+
+def _unit_vectors(lat, lon):
+    """Points on the unit sphere for latitude/longitude in degrees"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord):
+    """Great-circle (haversine) distance for a chord length on the unit sphere"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+class PlantIndex:
+    """
+    Nearest-plant index over eGRID plant coordinates.
+
+    Plants are stored as unit vectors in a KD-tree. Chord length grows
+    monotonically with great-circle distance, so Euclidean neighbours are
+    exactly the haversine neighbours, and distances are converted to km on
+    the way out. Batched queries return the k nearest plants, an
+    inverse-distance and generation weighted local emission rate, and the
+    site's eGRID subregion.
+
+    PLNT22 has no subregion boundaries, so the subregion is the one holding
+    the most inverse-distance weight among the k nearest plants.
+    """
+
+    def __init__(self, lat, lon, rate, generation, subregion, oris):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.rate = np.asarray(rate, dtype=float)
+        self.generation = np.asarray(generation, dtype=float)
+        self.subregion_codes, self.subregions = pd.factorize(np.asarray(subregion, dtype=object))
+        self.oris = np.asarray(oris)
+        self.tree = cKDTree(_unit_vectors(self.lat, self.lon))
+
+    @classmethod
+    def from_plants(cls, plants):
+        """Build from a PLNT-shaped frame, skipping plants without coordinates"""
+        lat = pd.to_numeric(plants[LAT_COL], errors='coerce')
+        lon = pd.to_numeric(plants[LON_COL], errors='coerce')
+        valid = (lat.notna() & lon.notna()).to_numpy()
+        plants = plants[valid]
+        return cls(
+            lat[valid], lon[valid],
+            pd.to_numeric(plants[EMISSIONS_COL], errors='coerce'),
+            pd.to_numeric(plants[GENERATION_COL], errors='coerce'),
+            plants[SUBREGION_COL],
+            pd.to_numeric(plants[ORIS_COL], errors='coerce'),
+        )
+
+    @classmethod
+    def load_or_build(cls, workbook_path=Path('../data/egrid2022_data.xlsx'), sheet_name='PLNT22',
+                      cache_dir=None):
+        """
+        Load the index persisted for this version of the workbook, building
+        and storing it on first use
+        """
+        workbook_path = Path(workbook_path)
+        cache_dir = Path(cache_dir or workbook_path.parent / 'cache')
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        digest = EgridCache(cache_dir).digest(workbook_path)
+        path = cache_dir / f"plant_index__{sheet_name}__{digest[:16]}.pkl"
+
+        if path.exists():
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+
+        plants, _ = load_plant_columns(workbook_path, INDEX_COLUMNS, sheet_name, cache_dir=cache_dir)
+        index = cls.from_plants(plants)
+        for stale in cache_dir.glob(f"plant_index__{sheet_name}__*.pkl"):
+            stale.unlink()
+        tmp_path = path.with_suffix('.pkl.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return index
+
+    def __len__(self):
+        return len(self.lat)
+
+    def nearest(self, lat, lon, k=10, workers=1):
+        """
+        Distances (km) and positions of the ``k`` nearest plants of each site,
+        as (n_sites, k) arrays sorted by distance
+        """
+        k = min(k, len(self))
+        chord, idx = self.tree.query(_unit_vectors(lat, lon), k=k, workers=workers)
+        chord, idx = np.asarray(chord).reshape(-1, k), np.asarray(idx).reshape(-1, k)
+        return chord_to_km(chord), idx
+
+    def lookup(self, lat, lon, k=10, power=2.0, min_km=1.0, workers=1):
+        """
+        Local grid attributes of each site: nearest plant and its distance,
+        the emission rate of the k nearest plants weighted by generation and
+        inverse distance (``distance ** -power``, with distances floored at
+        ``min_km``), and the subregion.
+        """
+        dist, idx = self.nearest(lat, lon, k, workers)
+        n_sites, k = idx.shape
+        idw = np.maximum(dist, min_km) ** -power
+
+        rate = self.rate[idx]
+        generation = np.nan_to_num(self.generation[idx], nan=0.0)
+        weight = np.where(np.isnan(rate) | (generation <= 0), 0.0, idw * generation)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            local_rate = (weight * np.nan_to_num(rate)).sum(axis=1) / weight.sum(axis=1)
+
+        # Subregion with the largest share of inverse-distance weight
+        n_sub = len(self.subregions)
+        codes = self.subregion_codes[idx]
+        flat = (np.arange(n_sites)[:, None] * (n_sub + 1) + np.where(codes >= 0, codes, n_sub)).ravel()
+        votes = np.bincount(flat, weights=idw.ravel(), minlength=n_sites * (n_sub + 1))
+        votes = votes.reshape(n_sites, n_sub + 1)[:, :n_sub]
+        subregion = np.asarray(self.subregions, dtype=object)[votes.argmax(axis=1)]
+
+        return pd.DataFrame({
+            'nearest_oris': self.oris[idx[:, 0]],
+            'nearest_km': dist[:, 0],
+            'mean_neighbor_km': dist.mean(axis=1),
+            'local_rate_lb_mwh': local_rate,
+            'subregion': subregion,
+        })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up local grid intensity for site coordinates")
+    parser.add_argument('sites', help="CSV of sites with latitude and longitude columns")
+    parser.add_argument('output', help="CSV to write the sites with their grid attributes to")
+    parser.add_argument('--lat-col', default='latitude')
+    parser.add_argument('--lon-col', default='longitude')
+    parser.add_argument('-k', type=int, default=10, help="Plants per site")
+    parser.add_argument('--workbook', default='../data/egrid2022_data.xlsx')
+    args = parser.parse_args()
+
+    index = PlantIndex.load_or_build(args.workbook)
+    sites = pd.read_csv(args.sites)
+    start = time.perf_counter()
+    result = index.lookup(sites[args.lat_col], sites[args.lon_col], k=args.k)
+    elapsed = time.perf_counter() - start
+
+    pd.concat([sites.reset_index(drop=True), result], axis=1).to_csv(args.output, index=False)
+    print(f"Looked up {len(sites):,} sites against {len(index):,} plants in {elapsed * 1000:.1f} ms")
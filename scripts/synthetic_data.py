@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+from egrid_schema import PLANT_COLUMNS
+from mlperf_ingest import MLPERF_SCHEMA
+
+# State -> (eGRID subregion, NERC region, balancing authority, latitude, longitude)
+STATES = {
+    'AK': ('AKGD', 'ASCC', 'CEA', 61.4, -150.0), 'AL': ('SRSO', 'SERC', 'SOCO', 32.8, -86.8),
+    'AR': ('SRMV', 'SERC', 'MISO', 34.9, -92.4), 'AZ': ('AZNM', 'WECC', 'AZPS', 34.2, -111.7),
+    'CA': ('CAMX', 'WECC', 'CISO', 37.2, -119.5), 'CO': ('RMPA', 'WECC', 'PSCO', 39.0, -105.5),
+    'CT': ('NEWE', 'NPCC', 'ISNE', 41.6, -72.7), 'DC': ('RFCE', 'RFC', 'PJM', 38.9, -77.0),
+    'DE': ('RFCE', 'RFC', 'PJM', 39.0, -75.5), 'FL': ('FRCC', 'SERC', 'FPL', 28.6, -82.4),
+    'GA': ('SRSO', 'SERC', 'SOCO', 32.7, -83.4), 'HI': ('HIOA', 'HICC', 'HECO', 20.8, -156.3),
+    'IA': ('MROW', 'MRO', 'MISO', 42.1, -93.5), 'ID': ('NWPP', 'WECC', 'IPCO', 44.4, -114.6),
+    'IL': ('SRMW', 'SERC', 'MISO', 40.0, -89.2), 'IN': ('RFCW', 'RFC', 'MISO', 39.9, -86.3),
+    'KS': ('SPNO', 'MRO', 'SWPP', 38.5, -98.4), 'KY': ('SRTV', 'SERC', 'TVA', 37.5, -85.3),
+    'LA': ('SRMV', 'SERC', 'MISO', 31.1, -92.0), 'MA': ('NEWE', 'NPCC', 'ISNE', 42.3, -71.8),
+    'MD': ('RFCE', 'RFC', 'PJM', 39.0, -76.8), 'ME': ('NEWE', 'NPCC', 'ISNE', 45.4, -69.2),
+    'MI': ('RFCM', 'RFC', 'MISO', 44.3, -85.4), 'MN': ('MROW', 'MRO', 'MISO', 46.3, -94.3),
+    'MO': ('SRMW', 'SERC', 'MISO', 38.4, -92.5), 'MS': ('SRMV', 'SERC', 'MISO', 32.7, -89.7),
+    'MT': ('NWPP', 'WECC', 'NWMT', 47.0, -109.6), 'NC': ('SRVC', 'SERC', 'DUK', 35.6, -79.4),
+    'ND': ('MROW', 'MRO', 'MISO', 47.5, -100.5), 'NE': ('MROW', 'MRO', 'SWPP', 41.5, -99.8),
+    'NH': ('NEWE', 'NPCC', 'ISNE', 43.7, -71.6), 'NJ': ('RFCE', 'RFC', 'PJM', 40.2, -74.7),
+    'NM': ('AZNM', 'WECC', 'PNM', 34.4, -106.1), 'NV': ('NWPP', 'WECC', 'NEVP', 39.3, -116.6),
+    'NY': ('NYUP', 'NPCC', 'NYIS', 42.9, -75.5), 'OH': ('RFCW', 'RFC', 'PJM', 40.3, -82.8),
+    'OK': ('SPSO', 'MRO', 'SWPP', 35.6, -97.5), 'OR': ('NWPP', 'WECC', 'BPAT', 43.9, -120.6),
+    'PA': ('RFCE', 'RFC', 'PJM', 40.9, -77.8), 'RI': ('NEWE', 'NPCC', 'ISNE', 41.7, -71.5),
+    'SC': ('SRVC', 'SERC', 'SCEG', 33.9, -80.9), 'SD': ('MROW', 'MRO', 'SWPP', 44.4, -100.2),
+    'TN': ('SRTV', 'SERC', 'TVA', 35.9, -86.4), 'TX': ('ERCT', 'TRE', 'ERCO', 31.5, -99.3),
+    'UT': ('NWPP', 'WECC', 'PACE', 39.3, -111.7), 'VA': ('SRVC', 'SERC', 'PJM', 37.5, -78.9),
+    'VT': ('NEWE', 'NPCC', 'ISNE', 44.1, -72.7), 'WA': ('NWPP', 'WECC', 'BPAT', 47.4, -120.5),
+    'WI': ('MROE', 'MRO', 'MISO', 44.6, -89.9), 'WV': ('RFCW', 'RFC', 'PJM', 38.6, -80.6),
+    'WY': ('RMPA', 'WECC', 'PACE', 43.0, -107.6), 'PR': ('PRMS', 'PR', 'PREPA', 18.2, -66.5),
+}
+
+# Fuel category -> (share of plants, mean CO2 rate lb/MWh, typical capacity MW)
+FUELS = {
+    'SOLAR': (0.35, 0.0, 5), 'GAS': (0.20, 1100.0, 150), 'WIND': (0.12, 0.0, 80),
+    'HYDRO': (0.11, 0.0, 30), 'OIL': (0.09, 1800.0, 10), 'BIOMASS': (0.06, 2800.0, 15),
+    'COAL': (0.03, 2200.0, 600), 'OTHF': (0.02, 1500.0, 20), 'NUCLEAR': (0.01, 0.0, 1800),
+    'GEOTHERMAL': (0.01, 100.0, 40),
+}
+
+MLPERF_ACCELERATORS = [
+    ('NVIDIA H100-SXM-80GB', [1, 4, 8]), ('NVIDIA H100-PCIe-80GB', [1, 2, 8]),
+    ('NVIDIA A100-SXM-80GB', [1, 4, 8]), ('NVIDIA A100-PCIe-80GB', [1, 2, 4, 8]),
+    ('NVIDIA L4', [1, 4, 8]), ('NVIDIA T4', [1, 4, 20]), ('Qualcomm Cloud AI 100', [1, 8, 16]),
+]
+MLPERF_BENCHMARKS = ['resnet', 'retinanet', 'bert-99', 'bert-99.9', 'rnnt', '3d-unet-99',
+                     'dlrm-v2-99', 'gptj-99', 'llama2-70b-99', 'stable-diffusion-xl']
+MLPERF_SCENARIOS = ['Offline', 'Server', 'SingleStream', 'MultiStream']
+
+
+def make_egrid_plants(n_plants, seed=0, include_code_row=True, year=2022):
+    """
+    Synthetic frame shaped like the eGRID PLNTyy sheet: descriptive column
+    names, a leading row of field codes and object columns, as read_excel
+    returns them
+    """
+    rng = np.random.default_rng(seed)
+    states = np.array(list(STATES))
+    state_info = pd.DataFrame.from_dict(
+        STATES, orient='index', columns=['subregion', 'nerc', 'ba', 'lat', 'lon'])
+
+    fuels = np.array(list(FUELS))
+    shares = np.array([FUELS[f][0] for f in fuels])
+    fuel_idx = rng.choice(len(fuels), size=n_plants, p=shares / shares.sum())
+    mean_rate = np.array([FUELS[f][1] for f in fuels])[fuel_idx]
+    typical_cap = np.array([FUELS[f][2] for f in fuels])[fuel_idx]
+
+    state = states[rng.integers(0, len(states), n_plants)]
+    info = state_info.loc[state]
+
+    capacity = typical_cap * rng.lognormal(0, 0.8, n_plants)
+    generation = capacity * 8760 * rng.uniform(0.05, 0.9, n_plants)
+    rate = np.where(mean_rate > 0, mean_rate * rng.lognormal(0, 0.25, n_plants), 0.0)
+    # A few missing and extreme rates, as in the real sheet
+    rate[rng.random(n_plants) < 0.02] = np.nan
+    extreme = rng.random(n_plants) < 0.002
+    rate[extreme] = rng.uniform(2e4, 2e5, extreme.sum())
+
+    df = pd.DataFrame({
+        PLANT_COLUMNS['SEQPLT']: np.arange(1, n_plants + 1),
+        PLANT_COLUMNS['YEAR']: year,
+        PLANT_COLUMNS['PSTATABB']: state,
+        PLANT_COLUMNS['PNAME']: [f'Plant {i}' for i in range(n_plants)],
+        PLANT_COLUMNS['ORISPL']: rng.permutation(n_plants) + 1,
+        PLANT_COLUMNS['BACODE']: info['ba'].to_numpy(),
+        PLANT_COLUMNS['NERC']: info['nerc'].to_numpy(),
+        PLANT_COLUMNS['SUBRGN']: info['subregion'].to_numpy(),
+        PLANT_COLUMNS['LAT']: info['lat'].to_numpy() + rng.normal(0, 1.2, n_plants),
+        PLANT_COLUMNS['LON']: info['lon'].to_numpy() + rng.normal(0, 1.8, n_plants),
+        PLANT_COLUMNS['PLPRMFL']: fuels[fuel_idx],
+        PLANT_COLUMNS['PLFUELCT']: fuels[fuel_idx],
+        PLANT_COLUMNS['NAMEPCAP']: capacity.round(1),
+        PLANT_COLUMNS['PLNGENAN']: generation.round(3),
+        PLANT_COLUMNS['PLCO2AN']: (generation * np.nan_to_num(rate) / 2000).round(3),
+        PLANT_COLUMNS['PLCO2RTA']: rate.round(3),
+    })
+
+    if include_code_row:
+        codes = pd.DataFrame([list(PLANT_COLUMNS)], columns=df.columns)
+        df = pd.concat([codes, df.astype(object)], ignore_index=True)
+    return df
+
+
+def make_mlperf_inference(n_rows, n_systems=None, seed=0):
+    """
+    Synthetic frame shaped like the typed MLPerf inference table written by
+    mlperf_ingest: one row per system x benchmark x scenario result
+    """
+    rng = np.random.default_rng(seed)
+    n_systems = n_systems or max(1, n_rows // 20)
+
+    acc_idx = rng.integers(0, len(MLPERF_ACCELERATORS), n_systems)
+    acc_name = np.array([MLPERF_ACCELERATORS[i][0] for i in acc_idx])
+    acc_count = np.array([rng.choice(MLPERF_ACCELERATORS[i][1]) for i in acc_idx], dtype=float)
+    cores = rng.choice([16, 32, 56, 64, 96, 128], n_systems).astype(float)
+    cores[rng.random(n_systems) < 0.05] = np.nan
+
+    system = rng.integers(0, n_systems, n_rows)
+    df = pd.DataFrame({
+        'Public ID': [f'4.1-{i:07d}' for i in range(n_rows)],
+        'Organization': rng.choice(['NVIDIA', 'Dell', 'HPE', 'Lenovo', 'Google', 'Qualcomm'], n_rows),
+        'Availability': rng.choice(['Available', 'Preview'], n_rows),
+        'System Name (click + for details)': [f'System {i}' for i in system],
+        '# of Nodes': 1.0,
+        'Processor': 'Intel(R) Xeon(R) Platinum 8480+',
+        '# of Processors': 2.0,
+        'Host Processor Core Count': cores[system],
+        'Accelerator': acc_name[system],
+        '# of Accelerators': acc_count[system],
+        'Benchmark': rng.choice(MLPERF_BENCHMARKS, n_rows),
+        'Scenario': rng.choice(MLPERF_SCENARIOS, n_rows),
+        'Units': 'Samples/s',
+        'Avg. Result': (acc_count[system] * rng.lognormal(7, 1.5, n_rows)).round(2),
+    })
+    for col, dtype in MLPERF_SCHEMA.items():
+        df[col] = df[col].astype(dtype)
+    return df
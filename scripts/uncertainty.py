@@ -0,0 +1,193 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+LB_TO_KG = 0.45359237
+# 1 gCO2/kWh is 1 kgCO2/MWh
+G_PER_KWH_TO_LB_PER_MWH = 1 / LB_TO_KG
+
+POWER_COMPONENTS = ['base_power', 'cpu_power', 'acc_power']
+
+
+def _lognormal_params(mean, sd):
+    """
+    Log-space location and scale of lognormals with the given mean and
+    standard deviation. Zero means give a distribution fixed at zero.
+    """
+    mean = np.asarray(mean, dtype=float)
+    sd = np.asarray(sd, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(np.log1p((sd / mean) ** 2))
+        mu = np.log(mean) - sigma ** 2 / 2
+    positive = mean > 0
+    return np.where(positive, mu, -np.inf), np.where(positive, np.nan_to_num(sigma), 0.0)
+
+
+def intensity_from_regional(regional_intensity, region_col='state'):
+    """
+    Intensity inputs (lb/MWh) from ``calculate_regional_carbon_intensity``.
+    The uncertainty is the standard error of the regional mean.
+    """
+    count = regional_intensity['count'].to_numpy(dtype=float)
+    sd = regional_intensity['std'].to_numpy(dtype=float) / np.sqrt(count)
+    return (regional_intensity[region_col].to_numpy(),
+            regional_intensity['mean'].to_numpy(dtype=float), sd)
+
+
+def intensity_from_analysis(carbon_intensity):
+    """
+    Intensity inputs (lb/MWh) from ``GreenAIAnalysis.load_carbon_intensity_data``
+    """
+    mean = carbon_intensity['carbon_intensity_gco2_per_kwh'].to_numpy(dtype=float)
+    sd = carbon_intensity['uncertainty'].to_numpy(dtype=float)
+    return (carbon_intensity['region'].to_numpy(),
+            mean * G_PER_KWH_TO_LB_PER_MWH, sd * G_PER_KWH_TO_LB_PER_MWH)
+
+
+def _simulate_batches(task):
+    """
+    Run a list of draw batches and return the merged histogram counts plus
+    the per-batch sums. Top level so it can run in a worker process.
+
+    Work on the draws x systems x regions array is kept to one add, one
+    multiply and a bincount: bin positions are built from log power and
+    log intensity separately, and sums come from a matrix product.
+    """
+    seeds, sizes, p = task
+    n_systems, n_components = p['power_mu'].shape
+    n_regions = p['intensity_mu'].size
+    counts = np.zeros(n_systems * n_regions * p['n_bins'], dtype=np.int64)
+    pair_offset = np.arange(n_systems * n_regions).reshape(n_systems, n_regions) * p['n_bins']
+    inv_width = (1 / p['width']).astype(np.float32)
+    sums = []
+
+    for seed, n in zip(seeds, sizes):
+        rng = np.random.default_rng(seed)
+        # Single precision halves the cost of drawing and is ample for MC error
+        z_power = rng.standard_normal((n, n_systems, n_components), dtype=np.float32)
+        z_intensity = rng.standard_normal((n, n_regions), dtype=np.float32)
+
+        power = np.exp(p['power_mu'] + p['power_sigma'] * z_power).sum(axis=2)
+        log_intensity = p['intensity_mu'] + p['intensity_sigma'] * z_intensity
+        sums.append(power.T.astype(float) @ np.exp(log_intensity.astype(float)) * p['scale'])
+
+        # Offsets from the bottom of each pair's histogram range, in log space
+        with np.errstate(divide='ignore'):
+            log_power = np.log(power) - p['log_power_lo']
+        position = log_power[:, :, None] + (log_intensity - p['log_intensity_lo'])[:, None, :]
+        position *= inv_width
+        # Zero power or intensity draws (log = -inf) land in the first bin
+        np.clip(position, 0, p['n_bins'] - 1, out=position)
+        bins = position.astype(np.int64)
+        bins += pair_offset
+        counts += np.bincount(bins.ravel(), minlength=counts.size)
+
+    return counts, sums
+
+
+class FootprintMonteCarlo:
+    """
+    Monte Carlo propagation of grid-intensity and power-model uncertainty
+    into CO2 estimates for every system x region pair.
+
+    Each draw samples every system's power components and every region's
+    intensity together, as lognormals matching the given means and standard
+    deviations. Draws run in fixed-size batches, each seeded from its own
+    child of ``np.random.SeedSequence(seed)``, and are binned into per-pair
+    log-spaced histograms from which percentiles are read. Batches and
+    seeds do not depend on the worker count, histogram counts are exact
+    integers and per-batch sums are added in batch order, so results for a
+    given seed are identical however many workers are used.
+    """
+
+    def __init__(self, system_stats, regions, intensity_mean, intensity_sd,
+                 power_uncertainty, n_bins=1024, tail_sigmas=8.0):
+        self.systems = system_stats['system'].to_numpy()
+        self.regions = np.asarray(regions)
+        self.n_bins = n_bins
+
+        means = system_stats[POWER_COMPONENTS].to_numpy(dtype=float)
+        rel_sd = np.array([power_uncertainty.get(c, 0.0) for c in POWER_COMPONENTS])
+        self.power_mu, self.power_sigma = _lognormal_params(means, means * rel_sd)
+        self.intensity_mu, self.intensity_sigma = _lognormal_params(intensity_mean, intensity_sd)
+
+        # Histogram range per pair: +/- tail_sigmas around each lognormal
+        with np.errstate(divide='ignore'):
+            log_power_lo = np.log(np.exp(self.power_mu - tail_sigmas * self.power_sigma).sum(axis=1))
+            log_power_hi = np.log(np.exp(self.power_mu + tail_sigmas * self.power_sigma).sum(axis=1))
+        log_int_lo = self.intensity_mu - tail_sigmas * self.intensity_sigma
+        log_int_hi = self.intensity_mu + tail_sigmas * self.intensity_sigma
+        # Systems or regions fixed at zero have no log range: give them a
+        # finite one so every draw (log = -inf) lands in the first bin, and
+        # report their percentiles as zero
+        self.zero = ~(np.isfinite(log_power_lo)[:, None] & np.isfinite(log_int_lo)[None, :])
+        self.log_power_lo = np.where(np.isfinite(log_power_lo), log_power_lo, 0.0)
+        self.log_intensity_lo = np.where(np.isfinite(log_int_lo), log_int_lo, 0.0)
+        self.lo = self.log_power_lo[:, None] + self.log_intensity_lo[None, :]
+        hi = log_power_hi[:, None] + log_int_hi[None, :]
+        self.width = np.maximum(np.nan_to_num(hi - self.lo), 1e-9) / n_bins
+
+    def run(self, n_draws=1_000_000, seed=0, hours=1.0, percentiles=(5, 50, 95),
+            batch_size=None, workers=1):
+        """
+        Simulate ``n_draws`` joint draws and return the mean and percentiles
+        of CO2 (kg) for ``hours`` of operation, one row per system x region
+        """
+        n_systems, n_regions = self.lo.shape
+        if batch_size is None:
+            # Keep each batch's draw array around 4M values
+            batch_size = max(1, 4_000_000 // max(1, n_systems * n_regions))
+        sizes = [batch_size] * (n_draws // batch_size)
+        if n_draws % batch_size:
+            sizes.append(n_draws % batch_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+        # W * h -> kWh -> MWh, times lb/MWh, converted to kg
+        f32 = np.float32
+        params = {
+            'power_mu': self.power_mu.astype(f32), 'power_sigma': self.power_sigma.astype(f32),
+            'intensity_mu': self.intensity_mu.astype(f32),
+            'intensity_sigma': self.intensity_sigma.astype(f32),
+            'log_power_lo': self.log_power_lo.astype(f32),
+            'log_intensity_lo': self.log_intensity_lo.astype(f32),
+            'width': self.width,
+            'scale': hours / 1e6 * LB_TO_KG,
+            'n_bins': self.n_bins,
+        }
+
+        n_tasks = max(1, min(workers, len(sizes)))
+        bounds = np.linspace(0, len(sizes), n_tasks + 1).astype(int)
+        tasks = [(seeds[a:b], sizes[a:b], params) for a, b in zip(bounds[:-1], bounds[1:])]
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(_simulate_batches, tasks))
+        else:
+            outputs = [_simulate_batches(task) for task in tasks]
+
+        counts = sum(out[0] for out in outputs).reshape(n_systems, n_regions, self.n_bins)
+        total = np.zeros((n_systems, n_regions))
+        for out in outputs:
+            for batch_sum in out[1]:
+                total += batch_sum
+
+        result = pd.DataFrame({
+            'system': np.repeat(self.systems, n_regions),
+            'region': np.tile(self.regions, n_systems),
+            'mean_co2_kg': (total / n_draws).ravel(),
+        })
+        for q in percentiles:
+            log_value = self._log_percentile(counts, n_draws, q)
+            result[f'p{q:g}_co2_kg'] = (np.exp(log_value) * params['scale']).ravel()
+        return result
+
+    def _log_percentile(self, counts, n_draws, q):
+        """Read a percentile off the histograms, interpolating within a bin"""
+        cumulative = np.cumsum(counts, axis=2)
+        target = q / 100 * n_draws
+        bin_index = np.minimum((cumulative < target).sum(axis=2), self.n_bins - 1)
+        in_bin = np.take_along_axis(counts, bin_index[..., None], axis=2)[..., 0]
+        before = np.take_along_axis(cumulative, bin_index[..., None], axis=2)[..., 0] - in_bin
+        frac = np.clip((target - before) / np.maximum(in_bin, 1), 0, 1)
+        return np.where(self.zero, -np.inf, self.lo + self.width * (bin_index + frac))
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The analysis modules live in scripts/ and import each other as siblings
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
@@ -0,0 +1,14 @@
+import egrid_schema
+import mlperf_ingest
+from carbon_footprint_analysis import CarbonFootprintAnalyzer
+
+
+def test_load_stage_fingerprints_the_schema_modules(tmp_path, monkeypatch):
+    # The analyzer creates ../images beside the working directory
+    (tmp_path / 'work').mkdir()
+    monkeypatch.chdir(tmp_path / 'work')
+    stages = CarbonFootprintAnalyzer().build_pipeline().stages
+
+    assert egrid_schema in stages['load'].code
+    assert mlperf_ingest in stages['load'].code
+    assert egrid_schema in stages['regional'].code
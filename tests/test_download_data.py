@@ -0,0 +1,81 @@
+import importlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class RangeServer(ThreadingHTTPServer):
+    """Serves one file, honouring Range requests the way a static file server does"""
+
+    daemon_threads = True
+
+    def __init__(self, body):
+        super().__init__(('127.0.0.1', 0), RangeHandler)
+        self.body = body
+        self.ranges = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/egrid.xlsx"
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.server.body
+        requested = self.headers.get('Range')
+        self.server.ranges.append(requested)
+        start = int(requested[len('bytes='):-1]) if requested else 0
+        if start >= len(body):
+            self.send_response(416)
+            self.send_header('Content-Range', f"bytes */{len(body)}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(206 if requested else 200)
+        if requested:
+            self.send_header('Content-Range', f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.send_header('Content-Length', str(len(body) - start))
+        self.end_headers()
+        self.wfile.write(body[start:])
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch):
+    # The module logs to ../data/download.log and the downloader writes to ../data
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'work').mkdir()
+    monkeypatch.chdir(tmp_path / 'work')
+    return importlib.import_module('download_data').DataDownloader()
+
+
+def serve(body):
+    server = RangeServer(body)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_complete_partial_file_is_moved_into_place(downloader):
+    server = serve(b'x' * 100)
+    (downloader.data_dir / 'egrid.xlsx.part').write_bytes(b'x' * 100)
+    try:
+        path = downloader.download_file(server.url, 'egrid.xlsx')
+    finally:
+        server.shutdown()
+    assert path.read_bytes() == b'x' * 100
+    assert server.ranges == ['bytes=100-']
+
+
+def test_partial_file_longer_than_remote_is_discarded(downloader):
+    server = serve(b'new contents')
+    (downloader.data_dir / 'egrid.xlsx.part').write_bytes(b'stale and longer contents')
+    try:
+        path = downloader.download_file(server.url, 'egrid.xlsx')
+    finally:
+        server.shutdown()
+    assert path.read_bytes() == b'new contents'
+    assert server.ranges == ['bytes=25-', None]
+    assert not (downloader.data_dir / 'egrid.xlsx.part').exists()
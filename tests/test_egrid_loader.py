@@ -0,0 +1,21 @@
+from egrid_cache import EgridCache, _to_arrow_safe
+from egrid_loader import format_memory_report, load_plant_columns
+from egrid_schema import EMISSIONS_COL, STATE_COL
+from synthetic_data import make_egrid_plants
+
+
+def test_report_separates_projection_from_compaction(tmp_path):
+    workbook = tmp_path / 'egrid2022_data.xlsx'
+    workbook.write_bytes(b'stand-in workbook')
+    cache = EgridCache(tmp_path / 'cache')
+    sheet = make_egrid_plants(500, seed=4)
+    entry = cache._entry_path(workbook, 'PLNT22', cache.digest(workbook))
+    _to_arrow_safe(sheet).to_parquet(entry, index=False)
+
+    df, report = load_plant_columns(workbook, [EMISSIONS_COL], cache_dir=cache.cache_dir)
+    assert list(df.columns) == [STATE_COL, EMISSIONS_COL]
+    assert report['columns_available'] == sheet.shape[1]
+    assert 0 < report['projected_bytes'] < report['sheet_bytes']
+    # Compaction is measured on the projected columns only
+    assert report['bytes_after'] < report['bytes_before']
+    assert 'MB of sheet data' in format_memory_report(report)
@@ -0,0 +1,65 @@
+import pandas as pd
+
+import egrid_store
+from egrid_schema import BA_COL, STATE_COL
+from egrid_store import EgridStore
+from synthetic_data import make_egrid_plants
+
+
+def _add_year(store, tmp_path, monkeypatch, year, sheet, force=False):
+    workbook = tmp_path / f"egrid{year}_data.xlsx"
+    workbook.write_bytes(str(year).encode())
+    monkeypatch.setattr(egrid_store, 'read_egrid_sheet', lambda *args, **kwargs: sheet)
+    return store.add_year(workbook, force=force)
+
+
+def test_years_with_different_fields_load_together(tmp_path, monkeypatch):
+    store = EgridStore(tmp_path / 'store')
+    older = make_egrid_plants(300, seed=1, year=2020).drop(columns=[BA_COL])
+    _add_year(store, tmp_path, monkeypatch, 2020, older)
+    _add_year(store, tmp_path, monkeypatch, 2022, make_egrid_plants(300, seed=2))
+
+    df = store.load(columns=[BA_COL])
+    assert sorted(df['year'].unique()) == [2020, 2022]
+    assert df.loc[df['year'] == 2020, BA_COL].isna().all()
+    assert df.loc[df['year'] == 2022, BA_COL].notna().any()
+
+    trend = store.regional_trend('balancing_authority')
+    assert set(trend['year']) == {2022}
+    assert store.load(years=[2020]).shape[0] == 300
+
+
+def test_unchanged_year_is_skipped(tmp_path, monkeypatch):
+    store = EgridStore(tmp_path / 'store')
+    sheet = make_egrid_plants(100, seed=3)
+    assert _add_year(store, tmp_path, monkeypatch, 2022, sheet) == 100
+    assert _add_year(store, tmp_path, monkeypatch, 2022, sheet) == 0
+    assert isinstance(store.load(), pd.DataFrame)
+
+
+def test_load_opens_only_the_requested_partitions(tmp_path, monkeypatch):
+    store = EgridStore(tmp_path / 'store')
+    _add_year(store, tmp_path, monkeypatch, 2020, make_egrid_plants(300, seed=1, year=2020))
+    _add_year(store, tmp_path, monkeypatch, 2022, make_egrid_plants(300, seed=2))
+    state = sorted(p.name for p in (tmp_path / 'store' / 'year=2022').iterdir())[0].split('=')[1]
+
+    opened = []
+    read_schema = egrid_store.pq.read_schema
+    monkeypatch.setattr(egrid_store.pq, 'read_schema', lambda f: opened.append(f) or read_schema(f))
+    df = store.load(years=[2022, 2022], states=[state])
+
+    assert {f.relative_to(tmp_path / 'store').parts[:2] for f in opened} == {('year=2022', f'state={state}')}
+    assert set(df['year']) == {2022} and set(df[STATE_COL].astype(str)) == {state}
+
+
+def test_reingest_after_a_crashed_swap(tmp_path, monkeypatch):
+    store = EgridStore(tmp_path / 'store')
+    _add_year(store, tmp_path, monkeypatch, 2022, make_egrid_plants(100, seed=3))
+    stale = tmp_path / 'store' / '.year=2022.old' / 'state=TX'
+    stale.mkdir(parents=True)
+    (stale / 'part-0.parquet').write_bytes(b'partial')
+
+    assert _add_year(store, tmp_path, monkeypatch, 2022, make_egrid_plants(120, seed=4),
+                     force=True) == 120
+    assert not stale.parent.exists()
+    assert len(store.load()) == 120
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+import types
+
+import green_ai
+from output_sinks import SINKS
+from regional_aggregation import GROUPING_COLUMNS
+
+
+def test_choices_match_their_sources():
+    assert green_ai.GROUPING_CHOICES == list(GROUPING_COLUMNS)
+    assert green_ai.FORMAT_CHOICES == list(SINKS)
+
+
+def test_download_passes_cache_ttl(monkeypatch):
+    # A stand-in module: importing download_data sets up a log file under ../data
+    calls = []
+    download_data = types.SimpleNamespace(DEFAULT_TTL_S=6 * 3600,
+                                          download_all=lambda **kwargs: calls.append(kwargs))
+    monkeypatch.setitem(sys.modules, 'download_data', download_data)
+
+    parser = green_ai.build_parser()
+    green_ai.run_download(parser.parse_args(['download', '--offline', '--cache-ttl', '60']))
+    green_ai.run_download(parser.parse_args(['download']))
+    assert calls == [{'offline': True, 'cache_ttl': 60.0},
+                     {'offline': False, 'cache_ttl': download_data.DEFAULT_TTL_S}]
+
+
+def test_startup_imports_only_the_standard_library():
+    code = ("import sys, green_ai; green_ai.build_parser(); "
+            "print(sorted({'pandas', 'numpy', 'requests'} & set(sys.modules)))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=green_ai.SCRIPTS_DIR,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == '[]'
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from hourly_profiles import HOURS_PER_YEAR, HourlyIntensityStore
+from job_scheduler import intensity_matrix
+
+
+def make_store(tmp_path):
+    # Each hour's intensity is its hour of the (common) year, plus 10000 in CA
+    hours = np.arange(HOURS_PER_YEAR, dtype=float)
+    profiles = pd.DataFrame([hours, hours + 10000], index=['TX', 'CA'])
+    return HourlyIntensityStore.write(profiles, tmp_path / 'hourly')
+
+
+def test_hourly_rates_follow_the_calendar(tmp_path):
+    store = make_store(tmp_path)
+    # Feb 28 23:00 of a leap year, then Feb 29 repeating Feb 28, then Mar 1
+    rates = store.hourly_rates(['TX'], '2024-02-28T23', 26)[0]
+    assert rates[:3].tolist() == [1415, 1392, 1393]
+    assert rates[-1] == 59 * 24
+    # The year rolls over instead of wrapping mid-profile
+    assert store.hourly_rates(['CA', 'TX'], '2024-12-31T22', 3).tolist() == \
+        [[18758, 18759, 10000], [8758, 8759, 0]]
+
+
+def test_hourly_rates_match_integrate(tmp_path):
+    store = make_store(tmp_path)
+    start = np.datetime64('2024-02-27T12', 'h')
+    starts = start + np.arange(72).astype('timedelta64[h]')
+    integrals = store.integrate(['TX'] * 72, starts, starts + np.timedelta64(1, 'h'))
+    np.testing.assert_allclose(store.hourly_rates(['TX'], start, 72)[0], integrals)
+
+
+def test_scheduler_intensity_from_store(tmp_path):
+    store = make_store(tmp_path)
+    matrix = intensity_matrix(['CA', 'TX'], 4, store=store, start='2023-03-01T00')
+    assert matrix.loc['TX'].tolist() == [1416, 1417, 1418, 1419]
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from job_footprint import LB_TO_KG, JobFootprintEstimator
+
+
+def make_estimator():
+    systems = pd.DataFrame({'system': ['a100', 'cpu'], 'base_power': [200.0, 100.0],
+                            'cpu_power': [300.0, 200.0], 'acc_power': [1500.0, 0.0]})
+    regional = pd.DataFrame({'state': ['TX', 'CA'], 'mean': [900.0, 500.0],
+                             'ci_lower': [850.0, 450.0], 'ci_upper': [950.0, 550.0]})
+    return JobFootprintEstimator(systems, regional)
+
+
+def make_jobs(n=10):
+    return pd.DataFrame({
+        'system': ['a100', 'cpu'] * (n // 2),
+        'region': ['TX', 'CA', 'TX', 'NY', 'CA'] * (n // 5),
+        'runtime_hours': np.arange(1, n + 1, dtype=float),
+        'utilization': 0.5,
+        # Free text that only appears after the first chunk
+        'note': [None] * (n // 2) + ['y'] * (n - n // 2),
+    })
+
+
+def test_estimate():
+    jobs = make_jobs()
+    result = make_estimator().estimate(jobs)
+    first = result.iloc[0]
+    assert np.isclose(first['energy_kwh'], (200 + 1800 * 0.5) / 1000)
+    assert np.isclose(first['co2_kg'], first['energy_kwh'] / 1000 * 900 * LB_TO_KG)
+    assert result['co2_kg'].isna().tolist() == (jobs['region'] == 'NY').tolist()
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_estimate_file_in_chunks(tmp_path, suffix):
+    jobs = make_jobs()
+    path = tmp_path / f'jobs{suffix}'
+    jobs.to_csv(path, index=False) if suffix == '.csv' else jobs.to_parquet(path, index=False)
+
+    stats = make_estimator().estimate_file(path, tmp_path / 'out.parquet', chunksize=3)
+    assert stats['rows'] == 10 and stats['unmatched_rows'] == 2
+    out = pd.read_parquet(tmp_path / 'out.parquet')
+    assert out['note'].tolist() == jobs['note'].tolist()
+    np.testing.assert_allclose(out['co2_kg'], make_estimator().estimate(jobs)['co2_kg'])
+    assert not (tmp_path / 'out.parquet.tmp').exists()
+
+
+def test_failed_run_keeps_previous_output_and_no_temp_file(tmp_path):
+    jobs = make_jobs().astype({'runtime_hours': object})
+    jobs.loc[7, 'runtime_hours'] = 'unknown'
+    jobs.to_csv(tmp_path / 'jobs.csv', index=False)
+    pd.DataFrame({'old': [1]}).to_parquet(tmp_path / 'out.parquet')
+
+    with pytest.raises(ValueError):
+        make_estimator().estimate_file(tmp_path / 'jobs.csv', tmp_path / 'out.parquet', chunksize=3)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['jobs.csv', 'out.parquet']
+    assert list(pd.read_parquet(tmp_path / 'out.parquet').columns) == ['old']
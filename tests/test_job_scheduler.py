@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from job_scheduler import CarbonAwareScheduler
+
+
+def make_scheduler():
+    # Texas is cleanest in hours 2-3, California flat
+    intensity = pd.DataFrame([[900., 900., 300., 300., 900., 900.],
+                              [600., 600., 600., 600., 600., 600.]], index=['TX', 'CA'])
+    return CarbonAwareScheduler(intensity, capacity=1, system_power_w={'a100': 2000., 'cpu': 500.})
+
+
+def make_jobs(**columns):
+    jobs = {'job_id': [1, 2, 3], 'system': ['a100', 'cpu', 'a100'], 'duration_hours': [2, 2, 1],
+            'deadline_hours': [6, 6, 6], 'allowed_regions': ['TX;CA', 'TX;CA', 'TX;CA']}
+    jobs.update(columns)
+    return pd.DataFrame(jobs)
+
+
+def test_greedy_puts_the_largest_job_in_the_cleanest_window():
+    result, summary = make_scheduler().schedule(make_jobs())
+    first = result.set_index('job_id').loc[1]
+    assert (first['region'], first['start_hour']) == ('TX', 2)
+    assert summary['placed'] == 3
+    assert summary['emissions_kg'] <= summary['fifo_emissions_kg']
+
+
+def test_zero_duration_jobs_take_one_hour():
+    result, summary = make_scheduler().schedule(make_jobs(duration_hours=[0, 2, 0.5]))
+    assert summary['placed'] == 3
+    placed = result.set_index('job_id')
+    assert (placed['end_hour'] - placed['start_hour']).loc[[1, 3]].tolist() == [1, 1]
+
+
+def test_negative_duration_is_rejected():
+    with pytest.raises(ValueError, match='non-negative duration'):
+        make_scheduler().schedule(make_jobs(duration_hours=[2, -1, 1]))
+
+
+def test_jobs_without_a_known_region_stay_unplaced():
+    result, summary = make_scheduler().schedule(make_jobs(allowed_regions=['NY', 'TX', 'NY;NJ']))
+    placed = result.set_index('job_id')['region']
+    assert placed.loc[2] == 'TX'
+    assert placed.loc[[1, 3]].isna().all()
+    assert summary['placed'] == summary['fifo_placed'] == 1
+
+
+def test_queue_with_no_known_regions_at_all():
+    result, summary = make_scheduler().schedule(make_jobs(allowed_regions=['NY', 'NY', 'NJ']))
+    assert summary['placed'] == 0
+    assert np.isnan(result['emissions_kg']).all()
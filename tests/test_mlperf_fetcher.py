@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mlperf_fetcher import MLPerfFetcher
+
+# Submitter -> benchmark -> result files of the stand-in results tree
+TREE = {
+    'NVIDIA': {'bert': ['run_0.json', 'run_1.json'], 'resnet': ['run_0.json']},
+    'Intel': {'bert': ['run_0.json'], 'rnnt': ['run_0.json', 'notes.txt']},
+}
+FLAKY_PATH = 'results/NVIDIA/resnet/run_0.json'
+
+
+class StandInServer(ThreadingHTTPServer):
+    """GitHub contents API stand-in serving TREE, with one file failing once with 503"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def listing(self, path):
+        parts = path.split('/')[1:]
+        node = TREE
+        for part in parts:
+            node = node[part]
+        entries = []
+        for name in node:
+            child = f"{path}/{name}"
+            if isinstance(node, dict):
+                entries.append({'name': name, 'path': child, 'type': 'dir',
+                                'url': f"{self.base}/contents/{child}"})
+            else:
+                entries.append({'name': name, 'path': child, 'type': 'file',
+                                'download_url': f"{self.base}/raw/{child}"})
+        return entries
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            attempt = server.hits[self.path]
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            # Hold the request open so concurrent requests overlap
+            time.sleep(0.02)
+            kind, _, path = self.path.lstrip('/').partition('/')
+            if kind == 'contents':
+                self._send(200, server.listing(path))
+            elif path == FLAKY_PATH and attempt == 1:
+                self._send(503)
+            else:
+                self._send(200, {'path': path})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_walks_tree_retries_and_counts(server):
+    fetcher = MLPerfFetcher(max_workers=3, backoff=0.01)
+    results = fetcher.fetch(f"{server.base}/contents/results")
+
+    expected = sorted(f"results/{submitter}/{benchmark}/{name}"
+                      for submitter, benchmarks in TREE.items()
+                      for benchmark, names in benchmarks.items()
+                      for name in names if name.endswith('.json'))
+    # Ordered by repository path, non-JSON files skipped
+    assert [result['path'] for result in results] == expected
+
+    n_dirs = 1 + sum(1 + len(benchmarks) for benchmarks in TREE.values())
+    assert fetcher.stats['files'] == len(expected)
+    assert fetcher.stats['retries'] == 1
+    assert fetcher.stats['failed'] == 0
+    assert fetcher.stats['requests'] == n_dirs + len(expected) + 1
+    assert fetcher.stats['bytes'] > 0
+    assert fetcher.stats['files_per_s'] > 0
+    assert server.hits[f"/raw/{FLAKY_PATH}"] == 2
+
+
+def test_fetch_concurrency_is_bounded(server):
+    fetcher = MLPerfFetcher(max_workers=2, backoff=0.01)
+    fetcher.fetch(f"{server.base}/contents/results")
+    assert 1 <= server.max_in_flight <= 2
+
+
+def test_fetch_reports_failures_below_root(server, monkeypatch):
+    monkeypatch.setattr('mlperf_fetcher.RETRY_STATUSES', set())
+    fetcher = MLPerfFetcher(max_workers=2, retries=0)
+    results = fetcher.fetch(f"{server.base}/contents/results")
+    assert fetcher.stats['failed'] == 1
+    assert FLAKY_PATH not in [result['path'] for result in results]
+
+
+def test_cached_fetch_uses_pooled_session_and_skips_network(server, tmp_path):
+    from http_cache import HttpCache
+
+    cache = HttpCache(tmp_path / 'http')
+    fetcher = MLPerfFetcher(max_workers=3, backoff=0.01, cache=cache)
+    used = []
+    original_get = fetcher.session.get
+    fetcher.session.get = lambda url, **kwargs: used.append(url) or original_get(url, **kwargs)
+
+    first = fetcher.fetch(f"{server.base}/contents/results")
+    assert len(used) == sum(server.hits.values())
+
+    hits_before = dict(server.hits)
+    assert fetcher.fetch(f"{server.base}/contents/results") == first
+    assert server.hits == hits_before
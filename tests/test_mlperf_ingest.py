@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+import mlperf_ingest
+from mlperf_ingest import ingest_mlperf_csv
+
+
+def test_failed_ingest_keeps_previous_output_and_no_temp_file(tmp_path, monkeypatch):
+    output = tmp_path / 'clean.parquet'
+    pd.DataFrame({'System': ['old']}).to_parquet(output)
+
+    def chunks(*args):
+        yield pd.DataFrame({'System': ['a', 'b']})
+        raise ValueError("bad chunk")
+
+    monkeypatch.setattr(mlperf_ingest, 'iter_mlperf_chunks', chunks)
+    with pytest.raises(ValueError, match='bad chunk'):
+        ingest_mlperf_csv(tmp_path / 'raw.csv', output)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['clean.parquet']
+    assert pd.read_parquet(output)['System'].tolist() == ['old']
+
+
+def test_ingest_streams_chunks_into_one_file(tmp_path):
+    raw = tmp_path / 'raw.csv'
+    pd.DataFrame({'System': list('abcde'), 'Avg. Result': ['1', '2', 'x', '4', '5']}).to_csv(raw, index=False)
+    assert ingest_mlperf_csv(raw, tmp_path / 'clean.parquet', chunksize=2) == 5
+    df = pd.read_parquet(tmp_path / 'clean.parquet')
+    assert df['System'].tolist() == list('abcde')
+    assert df['Avg. Result'].isna().sum() == 1
@@ -0,0 +1,21 @@
+import os
+
+import pandas as pd
+
+from output_sinks import CsvSink, ParquetSink, read_table, resolve_table
+
+
+def test_newer_parquet_wins_over_stale_csv_named_exactly(tmp_path):
+    CsvSink().write(pd.DataFrame({'x': [1]}), tmp_path / 'table.csv')
+    os.utime(tmp_path / 'table.csv', ns=(0, 0))
+    ParquetSink().write(pd.DataFrame({'x': [2]}), tmp_path / 'table.csv')
+
+    assert resolve_table(tmp_path / 'table.csv') == tmp_path / 'table.parquet'
+    assert read_table(tmp_path / 'table.csv')['x'].tolist() == [2]
+
+
+def test_dotted_names_keep_their_stem(tmp_path):
+    path = ParquetSink().write(pd.DataFrame({'x': [1]}), tmp_path / 'intensity_v1.2')
+    assert path == tmp_path / 'intensity_v1.2.parquet'
+    assert CsvSink().path_for(path) == tmp_path / 'intensity_v1.2.csv'
+    assert resolve_table(tmp_path / 'intensity_v1.2') == path
@@ -0,0 +1,9 @@
+import numpy as np
+
+from power_profiles import PowerCatalog
+
+
+def test_missing_accelerators_have_no_tdp():
+    catalog = PowerCatalog([{'pattern': 'H100', 'tdp_w': 700}, {'pattern': 'A100', 'tdp_w': 400}])
+    tdp = catalog.match_accelerators(['TPU v4', None, 'NVIDIA H100-SXM', np.nan, 'NVIDIA A100'])
+    np.testing.assert_array_equal(tdp, [np.nan, np.nan, 700, np.nan, 400])
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from uncertainty import FootprintMonteCarlo
+
+UNCERTAINTY = {'base_power': 0.1, 'cpu_power': 0.2, 'acc_power': 0.15}
+
+
+def make_systems():
+    return pd.DataFrame({'system': ['a100', 'idle'], 'base_power': [200.0, 0.0],
+                         'cpu_power': [300.0, 0.0], 'acc_power': [1600.0, 0.0]})
+
+
+def test_zero_mean_regions_and_systems_report_zero():
+    mc = FootprintMonteCarlo(make_systems(), ['dirty', 'hydro'], np.array([800., 0.]),
+                             np.array([50., 0.]), UNCERTAINTY)
+    result = mc.run(20000).set_index(['system', 'region'])
+
+    assert (result.loc[('a100', 'hydro')] == 0).all()
+    assert (result.loc[('idle', 'dirty')] == 0).all()
+    live = result.loc[('a100', 'dirty')]
+    # 2.1 kW for an hour at 800 lb/MWh is about 0.76 kg
+    assert np.isclose(live['mean_co2_kg'], 2.1 * 800 / 1000 * 0.45359237, rtol=0.02)
+    assert live['p5_co2_kg'] < live['p50_co2_kg'] < live['p95_co2_kg']
+
+
+def test_same_seed_gives_same_results():
+    mc = FootprintMonteCarlo(make_systems(), ['dirty', 'hydro'], np.array([800., 0.]),
+                             np.array([50., 0.]), UNCERTAINTY)
+    pd.testing.assert_frame_equal(mc.run(10000, batch_size=1000), mc.run(10000, batch_size=1000))
+
+
+def test_results_do_not_depend_on_worker_count():
+    mc = FootprintMonteCarlo(make_systems(), ['dirty', 'hydro'], np.array([800., 0.]),
+                             np.array([50., 0.]), UNCERTAINTY)
+    serial = mc.run(20000, seed=7, batch_size=3000, workers=1)
+    parallel = mc.run(20000, seed=7, batch_size=3000, workers=2)
+    pd.testing.assert_frame_equal(serial, parallel, check_exact=True)